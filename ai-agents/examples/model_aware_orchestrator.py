@@ -1,5 +1,6 @@
 """Example of model-aware orchestrator."""
 
+import asyncio
 import sys
 import os
 
@@ -45,6 +46,18 @@ class SmartOrchestrator(ModelAwareAgent):
                 file_count=file_count
             )
 
+    async def process_tasks(self, tasks):
+        """Process independent tasks concurrently, e.g. many code reviews."""
+        return await self.gather_tasks([
+            {
+                "task_type": "code_review",
+                "description": f"Review {len(task.get('files', []))} files for code quality",
+                "task_fn": lambda model, task=task: self._review_code(task["data"], model),
+                "file_count": len(task.get("files", [])),
+            }
+            for task in tasks
+        ], return_exceptions=True)
+
     def _generate_summary(self, data, model):
         """Generate summary using selected model."""
         print(f"[{self.agent_name}] Generating summary with {model}")
@@ -93,4 +106,9 @@ if __name__ == "__main__":
         result = orchestrator.process_task(task)
         print(f"Result: {result}\n")
     
+    print("=== Concurrent Reviews ===\n")
+    reviews = [{"data": {"pr": n}, "files": [f"file{n}.py"]} for n in range(5)]
+    for result in asyncio.run(orchestrator.process_tasks(reviews)):
+        print(f"Result: {result}")
+
     print("\nCheck ./usage_metrics.jsonl for logged model decisions")
\ No newline at end of file
@@ -2,6 +2,18 @@
 
 from .model_router import ModelRouter, ModelType, TaskComplexity
 from .usage_tracker import UsageTracker
+from .partitioned_log import PartitionedLog
+from .metrics_sink import MetricsSink, get_sink
+from .usage_columns import ColumnTable
+from .trigger_matcher import TriggerMatcher
+from .routing_cache import DecisionCache
+from .learned_router import LearnedRouter
+from .routing_sim import RoutingReplay
+from .request_scheduler import RequestScheduler, get_scheduler
+from .shared_limiter import SharedRateLimiter
+from .response_cache import ResponseCache
+from .retry_policy import RetryPolicy
+from .cost_ledger import MODEL_PRICING, BudgetExceededError, CostLedger, get_ledger
 from .model_aware_agent import ModelAwareAgent
 from .git_manager import GitManager
 from .git_aware_agent import GitAwareAgent
@@ -11,6 +23,23 @@ __all__ = [
     'ModelType', 
     'TaskComplexity',
     'UsageTracker',
+    'PartitionedLog',
+    'MetricsSink',
+    'get_sink',
+    'ColumnTable',
+    'TriggerMatcher',
+    'DecisionCache',
+    'LearnedRouter',
+    'RoutingReplay',
+    'RequestScheduler',
+    'get_scheduler',
+    'SharedRateLimiter',
+    'ResponseCache',
+    'RetryPolicy',
+    'MODEL_PRICING',
+    'BudgetExceededError',
+    'CostLedger',
+    'get_ledger',
     'ModelAwareAgent',
     'GitManager',
     'GitAwareAgent'
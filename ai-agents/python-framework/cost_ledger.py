@@ -0,0 +1,213 @@
+"""Token cost accounting and spend budgets for model routing."""
+
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from .model_router import ModelType
+from .routing_config import load_routing_config
+
+# USD per million tokens
+MODEL_PRICING = {
+    ModelType.OPUS: {"input": 15.00, "output": 75.00, "cache_write": 18.75, "cache_read": 1.50},
+    ModelType.SONNET: {"input": 3.00, "output": 15.00, "cache_write": 3.75, "cache_read": 0.30},
+}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_tokens", "cache_read_tokens")
+
+
+class BudgetExceededError(Exception):
+    """Raised when an agent or project has spent its budget for the period."""
+
+    def __init__(self, scope: str, name: str, spent: float, limit: float):
+        self.scope = scope
+        self.name = name
+        self.spent = spent
+        self.limit = limit
+        super().__init__(f"{scope} '{name}' spent ${spent:.2f} of its ${limit:.2f} budget")
+
+
+def get_pricing(model: str) -> Dict[str, float]:
+    """Price table for a model id, matching on the model family."""
+    for model_type, prices in MODEL_PRICING.items():
+        if model == model_type.value:
+            return prices
+    return MODEL_PRICING[ModelType.OPUS] if "opus" in model.lower() else MODEL_PRICING[ModelType.SONNET]
+
+
+def compute_cost(model: str, usage: Dict[str, int]) -> float:
+    """Cost in USD of a request's input, output and cache tokens."""
+    prices = get_pricing(model)
+    return (
+        usage.get("input_tokens", 0) * prices["input"]
+        + usage.get("output_tokens", 0) * prices["output"]
+        + usage.get("cache_creation_tokens", 0) * prices["cache_write"]
+        + usage.get("cache_read_tokens", 0) * prices["cache_read"]
+    ) / 1_000_000
+
+
+def extract_usage(result: Any) -> Dict[str, int]:
+    """
+    Read token usage from an API response.
+
+    Understands Anthropic SDK messages (result.usage.input_tokens, ...) and
+    plain dicts with a "usage" mapping. Returns zeros when there is none.
+    """
+    usage = getattr(result, "usage", None)
+    if usage is None and isinstance(result, dict):
+        usage = result.get("usage")
+    if usage is None:
+        return {field: 0 for field in USAGE_FIELDS}
+
+    def read(*names):
+        for name in names:
+            value = usage.get(name) if isinstance(usage, dict) else getattr(usage, name, None)
+            if value:
+                return int(value)
+        return 0
+
+    return {
+        "input_tokens": read("input_tokens", "prompt_tokens"),
+        "output_tokens": read("output_tokens", "completion_tokens"),
+        "cache_creation_tokens": read("cache_creation_input_tokens", "cache_creation_tokens"),
+        "cache_read_tokens": read("cache_read_input_tokens", "cache_read_tokens"),
+    }
+
+
+def default_project() -> str:
+    """Project name from CDC_PROJECT_PATH, or the working directory."""
+    return os.path.basename(os.path.abspath(os.getenv('CDC_PROJECT_PATH', os.getcwd())))
+
+
+class CostLedger:
+    """
+    Running cost totals and per-agent / per-project budgets.
+
+    Totals live in memory and every request updates them in O(1), so budget
+    checks never re-read the usage log. Budgets apply per calendar period
+    (UTC day or month). At downgrade_at of a budget Opus requests are
+    routed to Sonnet; once the budget is spent requests are refused.
+    """
+
+    def __init__(
+        self,
+        agent_budgets: Optional[Dict[str, float]] = None,
+        project_budgets: Optional[Dict[str, float]] = None,
+        period: str = "month",
+        downgrade_at: float = 0.8
+    ):
+        self.budgets = {"agent": dict(agent_budgets or {}), "project": dict(project_budgets or {})}
+        self.period = period
+        self.downgrade_at = downgrade_at
+        self.totals = {"cost": 0.0, "by_model": {}, "by_agent": {}, "by_project": {}}
+        self._period_key = self._current_period()
+        self._period_spend = {"agent": {}, "project": {}}
+        self._lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self.seeded = False
+
+    @classmethod
+    def from_config(cls, path: Optional[str] = None) -> "CostLedger":
+        """Create a ledger from the budgets section of model_routing.yaml."""
+        budgets = load_routing_config(path).get("budgets", {}) or {}
+        return cls(
+            agent_budgets=budgets.get("agents"),
+            project_budgets=budgets.get("projects"),
+            period=budgets.get("period", "month"),
+            downgrade_at=float(budgets.get("downgrade_at", 0.8)),
+        )
+
+    def has_budgets(self) -> bool:
+        return bool(self.budgets["agent"] or self.budgets["project"])
+
+    def period_start(self) -> datetime:
+        now = datetime.utcnow()
+        if self.period == "day":
+            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    def _current_period(self, timestamp: Optional[str] = None) -> str:
+        timestamp = timestamp or datetime.utcnow().isoformat()
+        return timestamp[:10] if self.period == "day" else timestamp[:7]
+
+    def _roll_period(self):
+        key = self._current_period()
+        if key != self._period_key:
+            self._period_key = key
+            self._period_spend = {"agent": {}, "project": {}}
+
+    def record(self, model: str, cost: float, agent: Optional[str] = None,
+               project: Optional[str] = None, timestamp: Optional[str] = None):
+        """Add one request's cost to the running totals."""
+        with self._lock:
+            self._roll_period()
+            self.totals["cost"] += cost
+            self.totals["by_model"][model] = self.totals["by_model"].get(model, 0.0) + cost
+            if agent:
+                self.totals["by_agent"][agent] = self.totals["by_agent"].get(agent, 0.0) + cost
+            if project:
+                self.totals["by_project"][project] = self.totals["by_project"].get(project, 0.0) + cost
+
+            if timestamp is None or self._current_period(timestamp) == self._period_key:
+                for scope, name in (("agent", agent), ("project", project)):
+                    if name:
+                        spend = self._period_spend[scope]
+                        spend[name] = spend.get(name, 0.0) + cost
+
+    def seed(self, entries: Iterable[Dict]):
+        """
+        Load spend for the current period from logged usage entries, once.
+        Later calls do not read entries, so pass a generator.
+        """
+        with self._seed_lock:
+            if self.seeded:
+                return
+            for entry in entries:
+                self.record(entry.get("model", ""), entry.get("cost_usd", 0.0) or 0.0,
+                            entry.get("agent"), entry.get("project"), entry.get("timestamp"))
+            self.seeded = True
+
+    def spent(self, scope: str, name: str) -> float:
+        """Spend of an agent or project in the current period."""
+        with self._lock:
+            self._roll_period()
+            return self._period_spend[scope].get(name, 0.0)
+
+    def check(self, model: str, agent: Optional[str] = None, project: Optional[str] = None) -> str:
+        """
+        Apply budgets to a routing decision.
+
+        Returns:
+            The model to use: unchanged, or Sonnet when a budget is close
+            to being spent
+
+        Raises:
+            BudgetExceededError: if the agent or project budget is spent
+        """
+        for scope, name in (("agent", agent), ("project", project)):
+            limit = self.budgets[scope].get(name) if name else None
+            if limit is None:
+                continue
+            spent = self.spent(scope, name)
+            if spent >= limit:
+                raise BudgetExceededError(scope, name, spent, limit)
+            if spent >= limit * self.downgrade_at and model == ModelType.OPUS.value:
+                model = ModelType.SONNET.value
+        return model
+
+
+_ledger: Optional[CostLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> CostLedger:
+    """
+    Return the process-wide ledger shared by every UsageTracker and
+    ModelRouter, so budgets count the spend of all agents in the process.
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = CostLedger.from_config()
+        return _ledger
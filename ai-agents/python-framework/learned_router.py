@@ -0,0 +1,272 @@
+"""Learned routing model trained offline from logged usage outcomes."""
+
+import json
+import math
+import os
+import random
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .trigger_matcher import WORD_PATTERN
+
+MAGIC = b"CDCRTR1\n"
+
+# Hashed feature space; 2**14 float32 weights is 64 KB per model
+DEFAULT_DIMS = 1 << 14
+
+# Context flags recorded with each usage entry and used as features;
+# the thresholds are the ones ModelRouter scores on
+CONTEXT_FLAGS = {
+    "retry_count": lambda value: value > 1,
+    "errors_count": lambda value: value > 2,
+    "production": bool,
+    "file_count": lambda value: value > 10,
+    "line_count": lambda value: value > 1000,
+}
+
+
+def routing_context(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The parts of a routing context worth logging for training."""
+    context = context or {}
+    return {name: context[name] for name in CONTEXT_FLAGS if context.get(name)}
+
+
+def features(task_type: str, description: str, context: Optional[Dict[str, Any]] = None,
+             agent: Optional[str] = None) -> List[str]:
+    """
+    Feature names for one task.
+
+    Task type, agent, each distinct description word and adjacent word
+    pair, and the context flags that are set.
+    """
+    names = ["bias", f"task={task_type}"]
+    if agent:
+        names.append(f"agent={agent}")
+    words = WORD_PATTERN.findall((description or "").lower())
+    names.extend(f"word={word}" for word in dict.fromkeys(words))
+    names.extend(f"pair={a} {b}" for a, b in dict.fromkeys(zip(words, words[1:])))
+    context = context or {}
+    for name, is_set in CONTEXT_FLAGS.items():
+        if is_set(context.get(name, 0) or 0):
+            names.append(f"ctx={name}")
+    return names
+
+
+def hash_features(names: Iterable[str], dims: int) -> List[int]:
+    """Map feature names to weight indices (crc32, stable across runs)."""
+    mask = dims - 1
+    return [zlib.crc32(name.encode("utf-8")) & mask for name in names]
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+def example_from_entry(entry: Dict) -> Optional[Tuple[str, List[str], bool, float]]:
+    """(model, feature names, success, cost_usd) from a usage entry, or None."""
+    model = entry.get("model")
+    # Response cache hits and cancelled attempts say nothing about how
+    # the model would do
+    if not model or "success" not in entry or entry.get("cache_hit"):
+        return None
+    if (entry.get("attempt") or {}).get("outcome") == "cancelled":
+        return None
+    names = features(entry.get("task_type", ""), entry.get("description", ""),
+                     entry.get("context"), entry.get("agent"))
+    return model, names, bool(entry["success"]), float(entry.get("cost_usd", 0.0) or 0.0)
+
+
+class LearnedRouter:
+    """
+    Per-model logistic regression on hashed task features.
+
+    Each model (Opus, Sonnet) gets its own success classifier. choose()
+    picks the cheaper model unless its predicted success rate falls more
+    than max_success_drop below the more expensive one's. Task types with
+    fewer than min_examples training rows for either model get no verdict,
+    leaving the decision to the rule-based scoring.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, Sequence[float]],
+        dims: int = DEFAULT_DIMS,
+        model_costs: Optional[Dict[str, float]] = None,
+        task_counts: Optional[Dict[str, Dict[str, int]]] = None,
+        max_success_drop: float = 0.05,
+        min_examples: int = 20,
+        meta: Optional[Dict] = None
+    ):
+        self.weights = weights
+        self.dims = dims
+        self.model_costs = model_costs or {}
+        self.task_counts = task_counts or {}
+        self.max_success_drop = max_success_drop
+        self.min_examples = min_examples
+        self.meta = meta or {}
+
+    @classmethod
+    def train(
+        cls,
+        entries: Iterable[Dict],
+        dims: int = DEFAULT_DIMS,
+        epochs: int = 5,
+        learning_rate: float = 0.1,
+        l2: float = 1e-6,
+        seed: int = 0,
+        **options
+    ) -> "LearnedRouter":
+        """
+        Fit one classifier per model with SGD on logged usage entries.
+
+        Args:
+            entries: Usage entries (see UsageTracker.iter_usage)
+            dims: Hashed feature space size, a power of two
+            epochs: Passes over the examples
+            learning_rate: Initial SGD step, decayed per epoch
+            l2: L2 penalty applied to the weights touched by each step
+            **options: max_success_drop and min_examples for the router
+        """
+        by_model: Dict[str, List[Tuple[List[int], bool]]] = {}
+        costs: Dict[str, List[float]] = {}
+        task_counts: Dict[str, Dict[str, int]] = {}
+        for entry in entries:
+            example = example_from_entry(entry)
+            if example is None:
+                continue
+            model, names, success, cost = example
+            by_model.setdefault(model, []).append((hash_features(names, dims), success))
+            totals = costs.setdefault(model, [0.0, 0])
+            totals[0] += cost
+            totals[1] += 1
+            counts = task_counts.setdefault(entry.get("task_type", ""), {})
+            counts[model] = counts.get(model, 0) + 1
+
+        rng = random.Random(seed)
+        weights = {}
+        for model, examples in by_model.items():
+            w = array("f", bytes(4 * dims))
+            order = list(range(len(examples)))
+            for epoch in range(epochs):
+                rng.shuffle(order)
+                rate = learning_rate / (1 + epoch)
+                for i in order:
+                    indices, success = examples[i]
+                    gradient = _sigmoid(sum(w[j] for j in indices)) - success
+                    for j in indices:
+                        w[j] -= rate * (gradient + l2 * w[j])
+            weights[model] = w
+
+        model_costs = {model: total / count for model, (total, count) in costs.items() if count}
+        meta = {
+            "trained_at": datetime.utcnow().isoformat(),
+            "examples": {model: len(examples) for model, examples in by_model.items()},
+        }
+        return cls(weights, dims, model_costs, task_counts, meta=meta, **options)
+
+    def predict(self, model: str, task_type: str, description: str,
+                context: Optional[Dict[str, Any]] = None, agent: Optional[str] = None) -> Optional[float]:
+        """Predicted success probability of model on the task, None if untrained."""
+        w = self.weights.get(model)
+        if w is None:
+            return None
+        indices = hash_features(features(task_type, description, context, agent), self.dims)
+        return _sigmoid(sum(w[j] for j in indices))
+
+    def choose(self, task_type: str, description: str, context: Optional[Dict[str, Any]] = None,
+               agent: Optional[str] = None) -> Optional[str]:
+        """
+        Model to route the task to, or None to defer to the rules.
+
+        Returns:
+            The cheapest model whose predicted success is within
+            max_success_drop of the best prediction
+        """
+        counts = self.task_counts.get(task_type, {})
+        candidates = [model for model in self.weights if counts.get(model, 0) >= self.min_examples]
+        if len(candidates) < 2:
+            return None
+
+        indices = hash_features(features(task_type, description, context, agent), self.dims)
+        predictions = {
+            model: _sigmoid(sum(self.weights[model][j] for j in indices))
+            for model in candidates
+        }
+        best = max(predictions.values())
+        good_enough = [model for model in candidates if predictions[model] >= best - self.max_success_drop]
+        return min(good_enough, key=lambda model: self.model_costs.get(model, 0.0))
+
+    def save(self, path: str):
+        """
+        Write the model to a compact binary file, replaced atomically.
+
+        Layout: MAGIC, a 4-byte little-endian header length, a JSON header,
+        then each model's weights as little-endian float32.
+        """
+        models = sorted(self.weights)
+        header = json.dumps({
+            "dims": self.dims,
+            "models": models,
+            "model_costs": self.model_costs,
+            "task_counts": self.task_counts,
+            "max_success_drop": self.max_success_drop,
+            "min_examples": self.min_examples,
+            "meta": self.meta,
+        }).encode("utf-8")
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for model in models:
+                w = array("f", self.weights[model])
+                if sys.byteorder != "little":
+                    w.byteswap()
+                f.write(w.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LearnedRouter":
+        """Read a model written by save()."""
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{path}: not a routing model file")
+        (length,) = struct.unpack_from("<I", data, len(MAGIC))
+        offset = len(MAGIC) + 4 + length
+        header = json.loads(data[len(MAGIC) + 4:offset])
+
+        dims = header["dims"]
+        weights = {}
+        for model in header["models"]:
+            w = array("f")
+            w.frombytes(data[offset:offset + 4 * dims])
+            if sys.byteorder != "little":
+                w.byteswap()
+            weights[model] = w
+            offset += 4 * dims
+        return cls(
+            weights,
+            dims,
+            header.get("model_costs"),
+            header.get("task_counts"),
+            header.get("max_success_drop", 0.05),
+            header.get("min_examples", 20),
+            header.get("meta"),
+        )
+
+
+def load_learned_router(path: str) -> Optional[LearnedRouter]:
+    """Load a routing model if the file exists and is readable, else None."""
+    try:
+        return LearnedRouter.load(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
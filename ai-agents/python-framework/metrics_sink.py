@@ -0,0 +1,183 @@
+"""Buffered, batched writer for usage metrics and routing decisions."""
+
+import atexit
+import os
+import signal
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from .partitioned_log import PartitionedLog
+
+
+class MetricsSink:
+    """
+    In-process buffer that writes log entries in batches.
+
+    Entries go into a bounded ring buffer and a background thread writes
+    them out when batch_size entries are waiting or every flush_interval
+    seconds, with one write per partition file. When the buffer is full the
+    oldest entry is dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, max_buffer: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=max_buffer)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        # Entries belong to the process that buffered them, not forked children
+        self._pid = os.getpid()
+        self.counters = {"written": 0, "dropped": 0, "failed": 0, "flushes": 0}
+        self.last_error = None
+
+    def write(self, log: PartitionedLog, entry: Dict):
+        """Queue an entry for log; never blocks on I/O and never raises."""
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.counters["dropped"] += 1
+            self._buffer.append((log, entry))
+            if self._thread is None and not self._closed:
+                self._start()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-sink", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._buffer) < self.batch_size and not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self, blocking: bool = True) -> int:
+        """
+        Write every buffered entry now.
+
+        Args:
+            blocking: Wait for a flush already in progress; with False,
+                skip the flush instead (for signal handlers, which may
+                have interrupted it)
+
+        Returns:
+            Number of entries written
+        """
+        if os.getpid() != self._pid:
+            return 0  # A forked child must not write the parent's entries
+        if not self._flush_lock.acquire(blocking):
+            return 0
+        try:
+            with self._cond:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+
+            # Group by log so each partition file gets a single write
+            by_log = {}
+            for log, entry in batch:
+                by_log.setdefault(log.log_path, (log, []))[1].append(entry)
+
+            written = 0
+            for log, entries in by_log.values():
+                try:
+                    log.append_many(entries)
+                    written += len(entries)
+                except (OSError, TypeError, ValueError, KeyError) as e:
+                    self.last_error = f"{log.log_path}: {e}"
+                    with self._cond:
+                        self.counters["failed"] += len(entries)
+
+            with self._cond:
+                self.counters["written"] += written
+                self.counters["flushes"] += 1
+            return written
+        finally:
+            self._flush_lock.release()
+
+    def close(self):
+        """Flush remaining entries and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self.flush()
+
+    def abandon(self):
+        """
+        Drop the entries and stop writing, in a forked child. Locks are
+        replaced since a parent thread may have held them at fork time.
+        """
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._buffer.clear()
+        self._thread = None
+        self._closed = True
+
+    def stats(self) -> Dict:
+        """Counters plus the number of entries still buffered."""
+        with self._cond:
+            return dict(self.counters, buffered=len(self._buffer), last_error=self.last_error)
+
+
+_sink: Optional[MetricsSink] = None
+_sink_lock = threading.Lock()
+
+
+def _install_signal_flush(sink: MetricsSink):
+    """Flush before the default SIGTERM/SIGHUP handling kills the process."""
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    for signum in (signal.SIGTERM, getattr(signal, 'SIGHUP', None)):
+        if signum is None:
+            continue
+        previous = signal.getsignal(signum)
+        if previous not in (signal.SIG_DFL, None):
+            continue  # Leave handlers installed by the application alone
+
+        def handler(received, frame, previous=previous):
+            # The main thread may be mid-flush; skip rather than deadlock
+            sink.flush(blocking=False)
+            signal.signal(received, previous)
+            os.kill(os.getpid(), received)
+
+        signal.signal(signum, handler)
+
+
+def _reset_after_fork():
+    # The flush thread does not survive fork; the child starts its own sink,
+    # and the parent's (still referenced by atexit) writes nothing
+    global _sink, _sink_lock
+    _sink_lock = threading.Lock()
+    if _sink is not None:
+        _sink.abandon()
+    _sink = None
+
+
+def get_sink() -> MetricsSink:
+    """Return the process-wide sink shared by ModelRouter and UsageTracker."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = MetricsSink(
+                max_buffer=int(os.getenv('CDC_METRICS_BUFFER', 10000)),
+                batch_size=int(os.getenv('CDC_METRICS_BATCH', 500)),
+                flush_interval=float(os.getenv('CDC_METRICS_FLUSH_SECONDS', 1.0)),
+            )
+            atexit.register(_sink.close)
+            _install_signal_flush(_sink)
+        return _sink
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
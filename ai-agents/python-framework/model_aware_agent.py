@@ -1,54 +1,564 @@
 """Base class for model-aware agents."""
 
+from .cost_ledger import default_project, extract_usage
 from .model_router import ModelRouter, ModelType
+from .request_scheduler import (
+    DEFAULT_REQUEST_TOKENS, PRIORITY_NORMAL, get_scheduler, is_rate_limit_error, retry_after_seconds
+)
+from .response_cache import MISS, ResponseCache
+from .retry_policy import LatencyWindow, RetryPolicy
+from .routing_config import load_routing_config
+from .streaming import StreamReader, StreamRelay, is_stream
 from .usage_tracker import UsageTracker
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import functools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import inspect
 import time
+import uuid
+
+# In-flight requests per model family for the async path when neither the
+# constructor nor model_routing.yaml (concurrency section) sets a limit
+DEFAULT_CONCURRENCY = {"opus": 8, "sonnet": 32}
 
 
 class ModelAwareAgent:
     """Base agent class with intelligent model selection."""
 
-    def __init__(self, agent_name: str, default_model: str = "auto"):
+    def __init__(
+        self,
+        agent_name: str,
+        default_model: str = "auto",
+        max_concurrency: Optional[Dict[str, int]] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        """
+        Args:
+            agent_name: Name recorded with usage and checked against budgets
+            default_model: Model id to always use, or "auto" to route
+            max_concurrency: Requests in flight per model family ("opus",
+                "sonnet") on the async path
+            retry_policy: Policy for every task type, instead of the
+                retry_policy section of model_routing.yaml
+        """
         self.agent_name = agent_name
         self.default_model = default_model
-        self.router = ModelRouter()
         self.tracker = UsageTracker()
+        # Router and tracker share the process ledger so budgets see every request
+        self.router = ModelRouter(ledger=self.tracker.ledger)
+        self.project = default_project()
+        # Rate limits are per account, so every agent shares one scheduler
+        self.scheduler = get_scheduler()
+        limits = dict(DEFAULT_CONCURRENCY)
+        limits.update(load_routing_config().get("concurrency", {}) or {})
+        limits.update(max_concurrency or {})
+        self.max_concurrency = limits
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._semaphore_loop = None
+        self._executor = None
+        # Opt-in per task type (response_cache.ttl_seconds) and per call
+        self.response_cache = ResponseCache.from_config()
+        self.retry_policy = retry_policy
+        self._policies: Dict[str, RetryPolicy] = {}
+        # Successful attempt durations, for hedging at the p95 latency
+        self.latency = LatencyWindow()
 
     def select_model_for_task(self, task_type: str, description: str, **context) -> str:
         """Select appropriate model for task."""
         if self.default_model != "auto":
             return self.default_model
 
+        context.setdefault("agent", self.agent_name)
+        context.setdefault("project", self.project)
         return self.router.select_model(task_type, description, context)
 
     def execute_with_model(self, task_type: str, description: str, task_fn, **context):
-        """Execute task with appropriate model and track usage."""
+        """
+        Execute task with appropriate model and track usage.
+
+        Pass cache_inputs (the prompt or the task's inputs) to reuse an
+        earlier response for the same model, task type and inputs, if the
+        task type has a response_cache TTL. Hits are logged as zero-token
+        usage.
+
+        Failures are retried, escalated and optionally hedged according to
+        the task type's RetryPolicy; every attempt is logged on its own.
+        Returns None if all attempts fail.
+
+        task_fn may return an iterator of chunks (e.g. an Anthropic
+        stream) instead of a response. It is read as it arrives, each chunk
+        is passed to the on_chunk context callback, and the task returns
+        {"text": ..., "usage": ...}. Time to first token, tokens per second
+        and output tokens are logged with the attempt, and a streaming
+        task is only hedged while no chunk has arrived. Cache hits return
+        the stored response without calling on_chunk.
+        """
         model = self.select_model_for_task(task_type, description, **context)
+        cached = self._cached_response(model, task_type, context)
+        if cached is not MISS:
+            self._track_usage(model, task_type, description, True, 0.0, cached, context, cache_hit=True)
+            return cached
+
+        result, success = self._run_policy(task_type, description, task_fn, model, context)
+        if success:
+            self._store_response(model, task_type, context, result)
+        return result
+
+    def retry_policy_for(self, task_type: str) -> RetryPolicy:
+        """The constructor's policy, or the configured one for the task type."""
+        if self.retry_policy is not None:
+            return self.retry_policy
+        policy = self._policies.get(task_type)
+        if policy is None:
+            policy = self._policies[task_type] = RetryPolicy.from_config(task_type)
+        return policy
 
-        start_time = time.time()
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Sized to the combined concurrency limits so neither attempts nor
+        # plain task functions are capped by the default executor
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=sum(self.max_concurrency.values()),
+                thread_name_prefix=f"{self.agent_name}-task")
+        return self._executor
+
+    def _attempt_info(self, request_id: str, number: int, hedge: bool, started: float,
+                      outcome: str) -> Dict[str, Any]:
+        """
+        Attempt fields for the usage log. request_elapsed is the time from
+        the start of the task to the end of this attempt, so for the first
+        successful attempt it is the task's end-to-end latency.
+        """
+        return {
+            "request": request_id,
+            "number": number,
+            "hedge": hedge,
+            "outcome": outcome,
+            "request_elapsed": round(time.monotonic() - started, 6),
+        }
+
+    def _run_attempt(self, task_type: str, description: str, task_fn, model: str,
+                     context: Dict[str, Any], request_id: str, number: int, hedge: bool,
+                     started: float, relay: StreamRelay) -> Any:
+        """
+        One attempt, run inline or on the executor; logs itself when it ends.
+
+        An attempt that succeeds after the policy abandoned it (timeout, or
+        the task already finished) is logged with outcome "late".
+        """
+        durations: List[float] = []
+        reader = StreamReader(relay, number)
+        result = None
+        outcome = "error"
         try:
-            # In real implementation, this would set up the model
-            result = task_fn(model=model)
-            success = True
-        except Exception as e:
-            result = None
-            success = False
-
-            # Consider retrying with Opus if Sonnet failed
-            if "sonnet" in model and context.get("allow_upgrade", True):
-                model = self.router.ModelType.OPUS.value
-                result = task_fn(model=model)
-                success = True
+            result = self._call_scheduled(task_fn, model, context, durations, reader)
+            outcome = "late" if number in relay.abandoned else "ok"
+            return result
+        finally:
+            self._finish_attempt(task_type, description, model, context, request_id, number, hedge,
+                                 started, outcome, durations, reader, result)
+
+    def _finish_attempt(self, task_type: str, description: str, model: str, context: Dict[str, Any],
+                        request_id: str, number: int, hedge: bool, started: float, outcome: str,
+                        durations: List[float], reader: StreamReader, result: Any):
+        """
+        Log an attempt. Streamed attempts feed their time to first token
+        to the hedging latency window, others their duration.
+        """
+        duration = sum(durations)
+        stream = reader.metrics()
+        if outcome == "ok":
+            self.latency.add(task_type, model, stream["ttft_seconds"] if stream else duration)
+        else:
+            reader.relay.release(number)
+        self._track_usage(model, task_type, description, outcome == "ok", duration, result, context,
+                          attempt=self._attempt_info(request_id, number, hedge, started, outcome),
+                          stream=stream)
+
+    def _run_policy(self, task_type: str, description: str, task_fn, model: str,
+                    context: Dict[str, Any]) -> Tuple[Any, bool]:
+        """
+        Run attempts until one succeeds or the policy gives up.
 
-        duration = time.time() - start_time
+        A round runs on the calling thread, keeping its thread-locals,
+        unless it can time out or hedge; then attempts run on the executor.
+        Attempts that time out cannot be interrupted; they are abandoned,
+        and log themselves when they finish.
 
-        # Track usage (tokens would come from actual API response)
+        Returns:
+            (result, success)
+        """
+        policy = self.retry_policy_for(task_type)
+        allow_upgrade = context.get("allow_upgrade", True)
+        request_id = uuid.uuid4().hex[:12]
+        started = time.monotonic()
+        deadline = started + policy.total_timeout if policy.total_timeout else None
+        attempts = 0
+        error = None
+        relay = StreamRelay(context.get("on_chunk"))
+        running: Dict[Any, Tuple[int, str]] = {}
+
+        def start(attempt_model, hedge=False):
+            nonlocal attempts
+            attempts += 1
+            future = self._get_executor().submit(self._run_attempt, task_type, description, task_fn, attempt_model,
+                                     context, request_id, attempts, hedge, started, relay)
+            running[future] = (attempts, attempt_model)
+
+        def abandon():
+            for future, (number, _) in running.items():
+                relay.abandoned.add(number)
+                future.cancel()
+            running.clear()
+
+        while attempts < policy.max_attempts:
+            if attempts:
+                model = policy.retry_model(model, error, allow_upgrade)
+                if model is None:
+                    break
+                delay = policy.backoff(attempts)
+                if deadline is not None:
+                    delay = min(delay, max(0.0, deadline - time.monotonic()))
+                time.sleep(delay)
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+            round_started = time.monotonic()
+            hedge_after = policy.hedge_delay(self.latency, task_type, model)
+            if not policy.needs_threads(hedge_after):
+                attempts += 1
+                try:
+                    return self._run_attempt(task_type, description, task_fn, model, context,
+                                             request_id, attempts, False, started, relay), True
+                except Exception as e:
+                    error = e
+                    continue
+            start(model)
+            while running:
+                limits = self._round_limits(policy, round_started, deadline, hedge_after, attempts)
+                done, _ = wait(list(running), timeout=min(limits) if limits else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    abandon()
+                    return result, True
+                if done:
+                    continue
+                if self._hedge_due(policy, round_started, hedge_after, attempts):
+                    hedge_after = None
+                    # A stream that has started is slow to finish, not slow to answer
+                    if not relay.started:
+                        start(policy.next_model(model, None, allow_upgrade), hedge=True)
+                    continue
+                # Round or task timed out; leave the attempts to finish on their own
+                abandon()
+                error = TimeoutError(f"{task_type} attempt on {model} timed out")
+        return None, False
+
+    @staticmethod
+    def _round_limits(policy: RetryPolicy, round_started: float, deadline: Optional[float],
+                      hedge_after: Optional[float], attempts: int) -> List[float]:
+        """Seconds until the next timeout or hedge, whichever applies."""
+        now = time.monotonic()
+        limits = []
+        if policy.attempt_timeout:
+            limits.append(round_started + policy.attempt_timeout - now)
+        if deadline is not None:
+            limits.append(deadline - now)
+        if hedge_after is not None and attempts < policy.max_attempts:
+            limits.append(round_started + hedge_after - now)
+        return [max(0.0, limit) for limit in limits]
+
+    @staticmethod
+    def _hedge_due(policy: RetryPolicy, round_started: float, hedge_after: Optional[float],
+                   attempts: int) -> bool:
+        return (hedge_after is not None and attempts < policy.max_attempts
+                and time.monotonic() >= round_started + hedge_after)
+
+    def _cached_response(self, model: str, task_type: str, context: Dict[str, Any]) -> Any:
+        """Cached response for the call, or MISS if caching does not apply."""
+        inputs = context.get("cache_inputs")
+        if inputs is None or not self.response_cache.enabled_for(task_type):
+            return MISS
+        return self.response_cache.get(model, task_type, inputs)
+
+    def _store_response(self, routed_model: str, task_type: str, context: Dict[str, Any], result: Any):
+        """
+        Cache a successful response under the routed model, so a re-run
+        hits even if this run fell back to another model.
+        """
+        inputs = context.get("cache_inputs")
+        if inputs is not None and result is not None and self.response_cache.enabled_for(task_type):
+            self.response_cache.put(routed_model, task_type, inputs, result)
+
+    def _track_usage(self, model: str, task_type: str, description: str, success: bool,
+                     duration: float, result: Any, context: Dict[str, Any], cache_hit: bool = False,
+                     attempt: Optional[Dict[str, Any]] = None, stream: Optional[Dict[str, Any]] = None):
+        """Track tokens and cost from the API response's usage block."""
         self.tracker.log_usage(
             model=model,
             task_type=task_type,
-            tokens_used=0,  # Would get from API
+            tokens_used=0,  # Summed from usage
             success=success,
-            duration_seconds=duration
+            duration_seconds=duration,
+            # A cached response's usage block was already paid for
+            usage=None if cache_hit else extract_usage(result),
+            agent=self.agent_name,
+            project=context.get("project", self.project),
+            description=description,
+            context=context,
+            cache_hit=cache_hit,
+            attempt=attempt,
+            stream=stream
         )
 
-        return result
\ No newline at end of file
+    def _call_scheduled(self, task_fn, model: str, context: Dict[str, Any], durations: List[float],
+                        reader: Optional[StreamReader] = None) -> Any:
+        """
+        Call task_fn once the shared scheduler admits it.
+
+        Requests wait for the model's request and token budgets (shared
+        with other agent processes through the shared_limiter database) in
+        priority order (context "priority", lower first; "estimated_tokens"
+        sizes the request). Rate limit errors pause the model's queue for
+        the provider's retry-after, or with jittered exponential backoff,
+        and the call is retried on the same model, unless a streamed
+        response had already started. A streamed response is read through
+        reader. Each call's duration, without scheduler waits, is appended
+        to durations.
+        """
+        reader = reader or StreamReader()
+        scheduler = self.scheduler.for_model(model)
+        estimate = context.get("estimated_tokens", DEFAULT_REQUEST_TOKENS)
+        priority = context.get("priority", PRIORITY_NORMAL)
+        for attempt in range(self.scheduler.max_retries + 1):
+            scheduler.acquire(estimate, priority, self.agent_name)
+            start_time = time.perf_counter()
+            try:
+                result = task_fn(model=model)
+                if hasattr(result, "__anext__"):
+                    result = self._read_async_stream(reader, result, start_time)
+                elif is_stream(result):
+                    result = reader.read(result, start_time)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.scheduler.max_retries or reader.chunks:
+                    raise
+                scheduler.rate_limited(retry_after_seconds(e), self.agent_name)
+                continue
+            finally:
+                durations.append(time.perf_counter() - start_time)
+            scheduler.succeeded()
+            scheduler.settle(estimate, sum(extract_usage(result).values()), self.agent_name)
+            return result
+
+    def _read_async_stream(self, reader: StreamReader, stream, started: float) -> Any:
+        """
+        Read an async stream from sync code on a private event loop. If
+        the calling thread already runs a loop (a notebook, an async app
+        calling execute_with_model), asyncio.run cannot start one there,
+        so the private loop runs on an executor thread.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(reader.read_async(stream, started))
+        return self._get_executor().submit(asyncio.run, reader.read_async(stream, started)).result()
+
+    async def _call_scheduled_async(self, task_fn, model: str, context: Dict[str, Any],
+                                    durations: List[float], reader: Optional[StreamReader] = None) -> Any:
+        """_call_scheduled for the async path; scheduler waits are not timed."""
+        reader = reader or StreamReader()
+        scheduler = self.scheduler.for_model(model)
+        estimate = context.get("estimated_tokens", DEFAULT_REQUEST_TOKENS)
+        priority = context.get("priority", PRIORITY_NORMAL)
+        for attempt in range(self.scheduler.max_retries + 1):
+            await scheduler.acquire_async(estimate, priority, self.agent_name)
+            try:
+                result = await self._call(task_fn, model, durations, reader)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.scheduler.max_retries or reader.chunks:
+                    raise
+                scheduler.rate_limited(retry_after_seconds(e), self.agent_name)
+                continue
+            scheduler.succeeded()
+            scheduler.settle(estimate, sum(extract_usage(result).values()), self.agent_name)
+            return result
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        """Concurrency limit for a model family, created on the running loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._semaphore_loop:
+            self._semaphores = {}
+            self._semaphore_loop = loop
+        family = "opus" if "opus" in model.lower() else "sonnet"
+        semaphore = self._semaphores.get(family)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, int(self.max_concurrency.get(family, 1))))
+            self._semaphores[family] = semaphore
+        return semaphore
+
+    async def _call(self, task_fn, model: str, durations: List[float],
+                    reader: Optional[StreamReader] = None) -> Any:
+        """
+        Run task_fn under its model's limit.
+
+        Plain functions run on a thread pool sized to the combined limits,
+        so the default executor's worker count does not cap concurrency.
+        A returned stream is read, while holding the slot, through reader.
+
+        The call's duration, excluding the wait for a slot, is appended to
+        durations even if it raises.
+        """
+        async with self._semaphore(model):
+            start_time = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(task_fn):
+                    result = await task_fn(model=model)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(self._get_executor(),
+                                                        functools.partial(task_fn, model=model))
+                    if inspect.isawaitable(result):
+                        result = await result
+                if is_stream(result):
+                    result = await (reader or StreamReader()).read_async(result, start_time, self._get_executor())
+                return result
+            finally:
+                durations.append(time.perf_counter() - start_time)
+
+    async def execute_with_model_async(self, task_type: str, description: str, task_fn, **context):
+        """
+        Async execute_with_model.
+
+        task_fn may be a coroutine function or a plain function (run in a
+        thread). At most max_concurrency[family] calls per model
+        family run at once; the logged duration covers the calls
+        themselves, not the time spent waiting for a slot. cache_inputs,
+        the retry policy and streaming work as in execute_with_model;
+        attempts that time out or lose a hedge are cancelled. task_fn may
+        also return an async iterator, and on_chunk may be a coroutine
+        function.
+        """
+        model = self.select_model_for_task(task_type, description, **context)
+        cached = self._cached_response(model, task_type, context)
+        if cached is not MISS:
+            self._track_usage(model, task_type, description, True, 0.0, cached, context, cache_hit=True)
+            return cached
+
+        result, success = await self._run_policy_async(task_type, description, task_fn, model, context)
+        if success:
+            self._store_response(model, task_type, context, result)
+        return result
+
+    async def _run_attempt_async(self, task_type: str, description: str, task_fn, model: str,
+                                 context: Dict[str, Any], request_id: str, number: int, hedge: bool,
+                                 started: float, relay: StreamRelay) -> Any:
+        """Async _run_attempt; a cancelled attempt is logged as such."""
+        durations: List[float] = []
+        reader = StreamReader(relay, number)
+        result = None
+        outcome = "error"
+        try:
+            result = await self._call_scheduled_async(task_fn, model, context, durations, reader)
+            outcome = "ok"
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            self._finish_attempt(task_type, description, model, context, request_id, number, hedge,
+                                 started, outcome, durations, reader, result)
+
+    async def _run_policy_async(self, task_type: str, description: str, task_fn, model: str,
+                                context: Dict[str, Any]) -> Tuple[Any, bool]:
+        """_run_policy on the event loop; unfinished attempts are cancelled."""
+        policy = self.retry_policy_for(task_type)
+        allow_upgrade = context.get("allow_upgrade", True)
+        request_id = uuid.uuid4().hex[:12]
+        started = time.monotonic()
+        deadline = started + policy.total_timeout if policy.total_timeout else None
+        attempts = 0
+        error = None
+        relay = StreamRelay(context.get("on_chunk"))
+        running: Dict[asyncio.Task, str] = {}
+
+        def start(attempt_model, hedge=False):
+            nonlocal attempts
+            attempts += 1
+            task = asyncio.ensure_future(self._run_attempt_async(
+                task_type, description, task_fn, attempt_model, context, request_id, attempts, hedge, started,
+                relay))
+            running[task] = attempt_model
+
+        async def cancel_running():
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            running.clear()
+
+        try:
+            while attempts < policy.max_attempts:
+                if attempts:
+                    model = policy.retry_model(model, error, allow_upgrade)
+                    if model is None:
+                        break
+                    delay = policy.backoff(attempts)
+                    if deadline is not None:
+                        delay = min(delay, max(0.0, deadline - time.monotonic()))
+                    await asyncio.sleep(delay)
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+
+                round_started = time.monotonic()
+                start(model)
+                hedge_after = policy.hedge_delay(self.latency, task_type, model)
+                while running:
+                    limits = self._round_limits(policy, round_started, deadline, hedge_after, attempts)
+                    done, _ = await asyncio.wait(list(running), timeout=min(limits) if limits else None,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        running.pop(task)
+                        if task.exception() is None:
+                            await cancel_running()
+                            return task.result(), True
+                        error = task.exception()
+                    if done:
+                        continue
+                    if self._hedge_due(policy, round_started, hedge_after, attempts):
+                        hedge_after = None
+                        if not relay.started:
+                            start(policy.next_model(model, None, allow_upgrade), hedge=True)
+                        continue
+                    await cancel_running()
+                    error = TimeoutError(f"{task_type} attempt on {model} timed out")
+            return None, False
+        finally:
+            # The caller was cancelled; do not leave attempts running
+            if running:
+                await cancel_running()
+
+    async def gather_tasks(self, tasks: Iterable[Dict[str, Any]], return_exceptions: bool = False) -> List[Any]:
+        """
+        Run independent tasks concurrently, like asyncio.gather.
+
+        Args:
+            tasks: Dicts with task_type, description and task_fn; any other
+                keys are passed as context
+            return_exceptions: Return exceptions in place of results
+                instead of raising the first one
+
+        Returns:
+            Results in the order of tasks
+        """
+        coroutines = []
+        for task in tasks:
+            task = dict(task)
+            coroutines.append(self.execute_with_model_async(
+                task.pop("task_type"), task.pop("description"), task.pop("task_fn"), **task))
+        return await asyncio.gather(*coroutines, return_exceptions=return_exceptions)
@@ -4,11 +4,21 @@ Routes tasks to appropriate Claude model based on complexity and requirements.
 """
 
 from enum import Enum
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+import atexit
+import hashlib
 import json
 import os
+import threading
 from datetime import datetime
 
+from .learned_router import load_learned_router
+from .metrics_sink import get_sink
+from .partitioned_log import PartitionedLog
+from .routing_cache import DecisionCache
+from .routing_config import load_routing_config
+from .trigger_matcher import TriggerMatcher
+
 
 class ModelType(Enum):
     OPUS = "claude-opus-4-20250514"
@@ -26,7 +36,8 @@ class TaskComplexity(Enum):
 class ModelRouter:
     """Route tasks to appropriate Claude model based on complexity."""
 
-    # Keywords that trigger Opus usage
+    # Keywords that trigger Opus usage, matched as whole words. Used when
+    # model_routing.yaml has no opus_triggers section
     OPUS_TRIGGERS = [
         "architect", "orchestrate", "design", "strategy",
         "debug", "complex", "critical", "production",
@@ -56,9 +67,69 @@ class ModelRouter:
         "orchestration": TaskComplexity.CRITICAL,
     }
 
-    def __init__(self, default_threshold: int = 4):
+    # Cache hits are logged as one summary entry per (task_type, model)
+    # after this many hits, instead of one line per decision
+    CACHE_HIT_LOG_EVERY = 1000
+
+    def __init__(
+        self,
+        default_threshold: int = 4,
+        ledger=None,
+        cache_size: Optional[int] = None,
+        cache_ttl: Optional[float] = None
+    ):
+        """
+        Args:
+            default_threshold: Complexity score at which Opus is selected
+            ledger: Optional CostLedger whose budgets can downgrade or
+                refuse requests
+            cache_size: Decisions to memoize (default CDC_ROUTING_CACHE_SIZE,
+                0 disables the cache)
+            cache_ttl: Seconds a memoized decision stays valid (default
+                CDC_ROUTING_CACHE_TTL, 0 for no expiry)
+        """
         self.default_threshold = default_threshold
+        self.ledger = ledger
         self.usage_log_path = os.getenv('CDC_USAGE_LOG', './usage_metrics.jsonl')
+        self.decision_log = PartitionedLog(self.usage_log_path)
+        self.trigger_matcher = TriggerMatcher.from_config(load_routing_config(), self.OPUS_TRIGGERS)
+        # Trained by cdc-train-router; the static rules decide without it
+        self.learned_model_path = os.getenv('CDC_ROUTER_MODEL', self.usage_log_path + '.router')
+        self.learned = load_learned_router(self.learned_model_path)
+
+        if cache_size is None:
+            cache_size = int(os.getenv('CDC_ROUTING_CACHE_SIZE', 0))
+        if cache_ttl is None:
+            cache_ttl = float(os.getenv('CDC_ROUTING_CACHE_TTL', 0))
+        self.cache = DecisionCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self._cache_hits: Dict[Tuple[str, str], int] = {}
+        self._cache_hits_pending = 0
+        self._hits_lock = threading.Lock()
+        if self.cache is not None:
+            # Create the sink first so its exit flush runs after ours
+            get_sink()
+            atexit.register(self.flush_cache_hits)
+
+    def reload_config(self, default_threshold: Optional[int] = None):
+        """
+        Re-read the trigger config and learned model, optionally change the
+        threshold, and invalidate memoized decisions.
+
+        Call this whenever thresholds, model_routing.yaml or the learned
+        model change; cached decisions are otherwise reused until they
+        expire.
+        """
+        self.flush_cache_hits()
+        if default_threshold is not None:
+            self.default_threshold = default_threshold
+        self.trigger_matcher = TriggerMatcher.from_config(load_routing_config(), self.OPUS_TRIGGERS)
+        self.learned = load_learned_router(self.learned_model_path)
+        if self.cache is not None:
+            self.cache.clear()
+
+    def cache_stats(self) -> Dict:
+        """Decision cache counters, or an empty dict when caching is off."""
+        return self.cache.stats() if self.cache is not None else {}
 
     def select_model(
         self,
@@ -69,20 +140,80 @@ class ModelRouter:
         """
         Select appropriate model based on task complexity.
 
+        With the decision cache enabled, repeated tasks (same task type,
+        normalized description and score-relevant context) reuse the
+        memoized decision and are counted instead of logged one by one.
+
         Args:
             task_type: Type of task (e.g., 'code_generation', 'log_analysis')
             description: Description of the specific task
-            context: Additional context (errors, production flag, etc.)
+            context: Additional context (errors, production flag, agent,
+                project, etc.)
 
         Returns:
             Model identifier string
+
+        Raises:
+            BudgetExceededError: if the agent's or project's budget is spent
         """
-        # Check for explicit Opus triggers in description
-        description_lower = description.lower()
-        if any(trigger in description_lower for trigger in self.OPUS_TRIGGERS):
-            self._log_decision(task_type, "OPUS", "trigger_word", description)
-            return ModelType.OPUS.value
+        key = self._signature(task_type, description, context) if self.cache is not None else None
+        decision = self.cache.get(key) if key is not None else None
+        cached = decision is not None
+        if not cached:
+            decision = self.decide(task_type, description, context)
+            if key is not None:
+                self.cache.put(key, decision)
+        model, reason, score, base_score, triggers = decision
+
+        # Budgets change with spend, so they are applied on every call
+        budgeted = self._apply_budget(model, context)
+        if budgeted != model:
+            reason = "budget_downgrade"
+        elif cached:
+            self._count_cache_hit(task_type, budgeted)
+            return budgeted
+        self._log_decision(task_type, budgeted, reason, description, score,
+                           base_score, list(triggers))
 
+        return budgeted
+
+    @staticmethod
+    def _signature(task_type: str, description: str, context: Optional[Dict[str, Any]]) -> Tuple:
+        """
+        Cache key covering everything the score depends on.
+
+        The description is lowercased with whitespace collapsed, matching
+        how triggers are matched, and stored as a digest. Context is reduced
+        to the flags that change the score, plus the agent, which the
+        learned model uses as a feature.
+        """
+        normalized = " ".join(description.lower().split())
+        digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+        context = context or {}
+        flags = (
+            context.get("retry_count", 0) > 1,
+            context.get("errors_count", 0) > 2,
+            bool(context.get("production", False)),
+            context.get("file_count", 0) > 10,
+            context.get("line_count", 0) > 1000,
+        )
+        return task_type, digest, flags, context.get("agent")
+
+    def decide(
+        self,
+        task_type: str,
+        description: str,
+        context: Optional[Dict[str, Any]]
+    ) -> Tuple[str, str, float, int, Tuple[str, ...]]:
+        """
+        Route a task without budgets, caching or logging.
+
+        The learned model, when loaded and trained on enough examples of
+        the task type, picks the model; otherwise the score does.
+
+        Returns:
+            (model, reason, score, base_score, matched triggers)
+        """
         # Get base complexity score
         complexity = self.TASK_COMPLEXITY.get(task_type, TaskComplexity.MODERATE)
         score = complexity.value
@@ -105,11 +236,57 @@ class ModelRouter:
             if context.get("line_count", 0) > 1000:
                 score += 1
 
+        # Trigger words in the description add their weights
+        base_score = score
+        triggers = self.trigger_matcher.match(description)
+        score += sum(weight for _, weight in triggers)
+
         # Select model based on final score
         model = ModelType.OPUS.value if score >= self.default_threshold else ModelType.SONNET.value
-        self._log_decision(task_type, model, "complexity_score", description, score)
+        verdict = None
+        if self.learned is not None:
+            verdict = self.learned.choose(task_type, description, context,
+                                          (context or {}).get("agent"))
+        if verdict is not None:
+            model = verdict
+            reason = "learned_model"
+        elif triggers and base_score < self.default_threshold <= score:
+            reason = "trigger_word"
+        else:
+            reason = "complexity_score"
+        return model, reason, score, base_score, tuple(trigger for trigger, _ in triggers)
+
+    def _count_cache_hit(self, task_type: str, model: str):
+        with self._hits_lock:
+            key = (task_type, model)
+            self._cache_hits[key] = self._cache_hits.get(key, 0) + 1
+            self._cache_hits_pending += 1
+            due = self._cache_hits_pending >= self.CACHE_HIT_LOG_EVERY
+        if due:
+            self.flush_cache_hits()
 
-        return model
+    def flush_cache_hits(self):
+        """Log accumulated cache hits as one count entry per (task_type, model)."""
+        with self._hits_lock:
+            hits = self._cache_hits
+            self._cache_hits = {}
+            self._cache_hits_pending = 0
+        timestamp = datetime.utcnow().isoformat()
+        for (task_type, model), count in hits.items():
+            get_sink().write(self.decision_log, {
+                "timestamp": timestamp,
+                "task_type": task_type,
+                "model": model,
+                "reason": "cache_hit",
+                "count": count
+            })
+
+    def _apply_budget(self, model: str, context: Optional[Dict[str, Any]]) -> str:
+        """Let the cost ledger downgrade (or refuse) the chosen model."""
+        if self.ledger is None or not self.ledger.has_budgets():
+            return model
+        context = context or {}
+        return self.ledger.check(model, context.get("agent"), context.get("project"))
 
     def _log_decision(
         self,
@@ -117,21 +294,27 @@ class ModelRouter:
         model: str,
         reason: str,
         description: str,
-        score: Optional[int] = None
+        score: Optional[float] = None,
+        base_score: Optional[int] = None,
+        triggers: Optional[List[str]] = None
     ):
-        """Log model selection decision for analysis."""
+        """
+        Log model selection decision for analysis.
+
+        base_score (task and context, before trigger weights) and the
+        matched triggers are kept so decisions can be replayed later.
+        """
         log_entry = {
             "timestamp": datetime.utcnow().isoformat(),
             "task_type": task_type,
             "model": model,
             "reason": reason,
             "description": description[:100],  # Truncate long descriptions
-            "score": score
+            "score": score,
+            "base_score": base_score,
+            "triggers": triggers or []
         }
 
-        try:
-            with open(self.usage_log_path, 'a') as f:
-                f.write(json.dumps(log_entry) + '\n')
-        except Exception as e:
-            # Don't fail if logging fails
-            pass
\ No newline at end of file
+        # Buffered; written in batches to the daily partitions shared with
+        # UsageTracker. Write failures are counted in get_sink().stats()
+        get_sink().write(self.decision_log, log_entry)
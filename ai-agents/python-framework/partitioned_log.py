@@ -0,0 +1,281 @@
+"""Daily-partitioned JSONL logs for usage metrics and routing decisions."""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def _line_timestamp(line: bytes) -> str:
+    """Timestamp of a raw log line, '' when it cannot be read."""
+    try:
+        return json.loads(line).get("timestamp", "")
+    except (ValueError, AttributeError):
+        return ""
+
+
+def bisect_timestamp(path: str, timestamp: str) -> int:
+    """
+    Find the first line at or after a timestamp in a time-ordered JSONL file.
+
+    Args:
+        path: Log file whose entries were appended in time order
+        timestamp: ISO timestamp to search for
+
+    Returns:
+        Byte offset of the first line whose timestamp is >= timestamp
+    """
+    with open(path, 'rb') as f:
+        lo, hi = 0, f.seek(0, os.SEEK_END)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            # First line starting at or after mid
+            if mid:
+                f.seek(mid - 1)
+                f.readline()
+            else:
+                f.seek(0)
+            line_start = f.tell()
+            line = f.readline()
+            if not line or _line_timestamp(line) >= timestamp:
+                hi = mid
+            else:
+                lo = line_start + len(line)
+
+        if lo == 0:
+            return 0
+        # First line starting at or after lo
+        f.seek(lo - 1)
+        f.readline()
+        return f.tell()
+
+
+class PartitionedLog:
+    """
+    JSONL log split into one file per UTC day.
+
+    For a log path of ./usage_metrics.jsonl, entries are appended to
+    ./usage_metrics.2025-01-31.jsonl according to their "timestamp" field,
+    and compaction merges old days into ./usage_metrics.2025-01.jsonl.gz.
+    A single ./usage_metrics.jsonl written before partitioning is still read,
+    using a binary search on timestamp to skip to the requested window.
+    """
+
+    def __init__(self, log_path: str):
+        self.log_path = Path(log_path)
+        self.directory = self.log_path.parent
+        self.stem = self.log_path.name[:-len('.jsonl')] if self.log_path.name.endswith('.jsonl') \
+            else self.log_path.name
+        escaped = re.escape(self.stem)
+        self._partition_re = re.compile(rf'^{escaped}\.(\d{{4}}-\d{{2}}-\d{{2}})\.jsonl$')
+        self._archive_re = re.compile(rf'^{escaped}\.(\d{{4}}-\d{{2}})\.jsonl\.gz$')
+
+    def partition_path(self, day: str) -> Path:
+        return self.directory / f"{self.stem}.{day}.jsonl"
+
+    def archive_path(self, month: str) -> Path:
+        return self.directory / f"{self.stem}.{month}.jsonl.gz"
+
+    def append(self, entry: Dict):
+        """Append an entry to the partition for its timestamp's day."""
+        self.append_many([entry])
+
+    def append_many(self, entries: List[Dict]):
+        """Append entries with one write per partition they fall into."""
+        by_day = {}
+        for entry in entries:
+            by_day.setdefault(entry["timestamp"][:10], []).append(json.dumps(entry) + '\n')
+
+        for day, lines in by_day.items():
+            data = ''.join(lines).encode('utf-8')
+            # One O_APPEND write keeps concurrent writers from interleaving lines
+            fd = os.open(str(self.partition_path(day)), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+
+    def _matching(self, pattern) -> List[Tuple[str, Path]]:
+        found = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return found
+        for name in names:
+            match = pattern.match(name)
+            if match:
+                found.append((match.group(1), self.directory / name))
+        return sorted(found)
+
+    def partitions(self) -> List[Tuple[str, Path]]:
+        """Daily partitions as (YYYY-MM-DD, path), oldest first."""
+        return self._matching(self._partition_re)
+
+    def archives(self) -> List[Tuple[str, Path]]:
+        """Monthly archives as (YYYY-MM, path), oldest first."""
+        return self._matching(self._archive_re)
+
+    def iter_entries(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        include_legacy: bool = True,
+        include_archives: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Yield entries with since <= timestamp < until, oldest first.
+
+        Only the archives and partitions overlapping the window are opened,
+        so the cost follows the size of the window rather than the history.
+        The pre-partitioning file and the archives can be left out when the
+        caller already has them in another form.
+        """
+        start = since.isoformat() if since else ""
+        end = until.isoformat() if until else "9999"
+
+        def in_window(lines):
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                timestamp = entry.get("timestamp", "") if isinstance(entry, dict) else ""
+                if start <= timestamp < end:
+                    yield entry
+
+        if include_legacy and self.log_path.exists():
+            with open(self.log_path, 'rb') as f:
+                if start:
+                    f.seek(bisect_timestamp(str(self.log_path), start))
+                for entry in in_window(f):
+                    yield entry
+
+        for month, path in self.archives() if include_archives else []:
+            if start[:7] <= month <= end[:7]:
+                with gzip.open(path, 'rb') as f:
+                    for entry in in_window(f):
+                        yield entry
+
+        for day, path in self.partitions():
+            if start[:10] <= day <= end[:10]:
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    continue  # Compacted while we were reading
+                with f:
+                    for entry in in_window(f):
+                        yield entry
+
+    @staticmethod
+    def _archive_days(path: Path) -> set:
+        days = set()
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                days.add(_line_timestamp(line)[:10])
+        return days
+
+    @staticmethod
+    def _line_key(line: bytes) -> bytes:
+        return hashlib.sha1(line.rstrip(b'\r\n')).digest()
+
+    def _unarchived_lines(self, archive: Path, paths: List[Path]) -> Dict[Path, List[bytes]]:
+        """
+        Lines of partitions whose day is already archived that the archive
+        does not hold yet, e.g. written after the day was compacted.
+        Identical lines are matched one for one.
+        """
+        lines = {}
+        for path in paths:
+            with open(path, 'rb') as f:
+                lines[path] = [line if line.endswith(b'\n') else line + b'\n' for line in f if line.strip()]
+        wanted = {self._line_key(line) for path_lines in lines.values() for line in path_lines}
+        archived = Counter()
+        with gzip.open(archive, 'rb') as f:
+            for line in f:
+                key = self._line_key(line)
+                if key in wanted:
+                    archived[key] += 1
+
+        missing = {}
+        for path, path_lines in lines.items():
+            missing[path] = []
+            for line in path_lines:
+                key = self._line_key(line)
+                if archived[key]:
+                    archived[key] -= 1
+                else:
+                    missing[path].append(line)
+        return missing
+
+    def compact(self, older_than_days: int = 7, retain_days: Optional[int] = None) -> Dict[str, int]:
+        """
+        Merge daily partitions into monthly gzip archives and apply retention.
+
+        Each archive is rewritten through a temporary file and only then are
+        its partitions removed. For days already present in an archive only
+        lines the archive lacks are added, so lines written after a day was
+        compacted are kept and an interrupted compaction can simply be run
+        again.
+
+        Args:
+            older_than_days: Only compact partitions at least this many days old
+            retain_days: Delete partitions and archives entirely older than this
+
+        Returns:
+            Counts of compacted partitions and deleted files
+        """
+        today = datetime.utcnow().date()
+        compact_before = (today - timedelta(days=older_than_days)).isoformat()
+        retain_from = (today - timedelta(days=retain_days)).isoformat() if retain_days is not None else ""
+        summary = {"compacted": 0, "deleted": 0}
+
+        by_month = {}
+        for day, path in self.partitions():
+            if day < retain_from:
+                path.unlink()
+                summary["deleted"] += 1
+            elif day < compact_before:
+                by_month.setdefault(day[:7], []).append((day, path))
+
+        for month, partitions in by_month.items():
+            archive = self.archive_path(month)
+            archived_days = self._archive_days(archive) if archive.exists() else set()
+            late = self._unarchived_lines(archive, [path for day, path in partitions
+                                                    if day in archived_days]) if archived_days else {}
+
+            tmp_path = archive.with_name(f"{archive.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as out:
+                if archive.exists():
+                    with open(archive, 'rb') as existing:
+                        # Concatenated gzip members form a valid gzip file
+                        while True:
+                            chunk = existing.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            out.write(chunk)
+                with gzip.GzipFile(fileobj=out, mode='wb') as member:
+                    for day, path in partitions:
+                        if path in late:
+                            member.writelines(late[path])
+                        else:
+                            with open(path, 'rb') as src:
+                                member.write(src.read())
+            os.replace(tmp_path, archive)
+
+            for day, path in partitions:
+                path.unlink()
+                summary["compacted"] += 1
+
+        if retain_from:
+            # An archive is dropped once its whole month is past retention
+            for month, path in self.archives():
+                if month < retain_from[:7]:
+                    path.unlink()
+                    summary["deleted"] += 1
+
+        return summary
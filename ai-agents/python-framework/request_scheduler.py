@@ -0,0 +1,329 @@
+"""Rate-limit-aware admission of model requests, shared per process."""
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .model_router import ModelType
+from .routing_config import load_routing_config
+from .shared_limiter import SharedRateLimiter
+
+# Requests and tokens per minute when model_routing.yaml has no rate_limits
+DEFAULT_RATE_LIMITS = {
+    "opus": {"requests_per_minute": 50, "tokens_per_minute": 40000},
+    "sonnet": {"requests_per_minute": 50, "tokens_per_minute": 80000},
+}
+
+# Token estimate for a request that does not pass estimated_tokens; the
+# bucket is corrected with the real usage once the response arrives
+DEFAULT_REQUEST_TOKENS = 2000
+
+# Lower numbers are admitted first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+
+def model_family(model: str) -> str:
+    """Config key ("opus" or "sonnet") for a model id or ModelType."""
+    if isinstance(model, ModelType):
+        model = model.value
+    return "opus" if "opus" in model.lower() else "sonnet"
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for HTTP 429 / rate limit errors from the Anthropic SDK or similar clients."""
+    if "RateLimit" in type(error).__name__:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    return status == 429
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The provider's retry-after hint, from the error or its HTTP response."""
+    value = getattr(error, "retry_after", None)
+    if value is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            value = headers.get("retry-after")
+        except AttributeError:
+            value = None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Continuously refilling bucket; may go into debt when usage is settled late."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount is available (0 if it is now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float):
+        """Add (or with a negative amount, remove) capacity, e.g. to settle an estimate."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class ModelScheduler:
+    """
+    Priority queue in front of a model's request and token buckets.
+
+    Requests are admitted in (priority, arrival) order once both buckets
+    have room and no retry-after or backoff pause is in effect, so a burst
+    of low-priority work cannot starve urgent requests.
+
+    With a SharedRateLimiter the buckets, pauses and backoff state live in
+    its database and are shared with other processes; the local buckets
+    are only used while the database is unavailable.
+    """
+
+    def __init__(self, family: str, requests_per_minute: float, tokens_per_minute: float,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0,
+                 shared: Optional[SharedRateLimiter] = None):
+        self.family = family
+        self.shared = shared
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.paused_until = 0.0
+        self.consecutive_limits = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self.counters = {
+            "admitted": 0, "rate_limited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0,
+        }
+
+    def _enqueue(self, priority: int) -> tuple:
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _try_admit(self, ticket: tuple, tokens: float, agent: Optional[str]) -> float:
+        """Admit ticket if it is next and capacity allows; else seconds to wait."""
+        now = time.monotonic()
+        if self._queue[0] != ticket:
+            return 0.05  # Woken by notify_all when the head is admitted
+        wait = self.paused_until - now
+        if wait > 0:
+            return wait
+
+        shared_wait = None
+        if self.shared is not None:
+            shared_wait = self.shared.try_take(self.family, tokens, self.requests.capacity,
+                                               self.tokens.capacity, agent)
+        if shared_wait is None:
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+        else:
+            wait = shared_wait
+        if wait > 0:
+            return wait
+        heapq.heappop(self._queue)
+        if shared_wait is None:
+            self.requests.take(1)
+            self.tokens.take(tokens)
+        self._cond.notify_all()
+        return 0.0
+
+    def _try_admit_locked(self, ticket: tuple, tokens: float, agent: Optional[str]) -> float:
+        with self._cond:
+            return self._try_admit(ticket, tokens, agent)
+
+    def _admitted(self, started: float):
+        waited = time.monotonic() - started
+        self.counters["admitted"] += 1
+        self.counters["wait_seconds"] += waited
+        self.counters["max_wait_seconds"] = max(self.counters["max_wait_seconds"], waited)
+
+    def acquire(self, tokens: float, priority: int = PRIORITY_NORMAL, agent: Optional[str] = None):
+        """Block until a request estimated at `tokens` may be sent."""
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_admit(ticket, tokens, agent)
+                    if wait == 0.0:
+                        break
+                    self._cond.wait(wait)
+            except BaseException:
+                self._cancel(ticket)
+                raise
+            self._admitted(started)
+
+    async def acquire_async(self, tokens: float, priority: int = PRIORITY_NORMAL,
+                            agent: Optional[str] = None):
+        """
+        acquire() for the event loop: waits with asyncio.sleep instead of
+        blocking. With a shared limiter the admission check, which can wait
+        on the database lock, runs on the loop's default executor.
+        """
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                if self.shared is not None:
+                    wait = await loop.run_in_executor(None, self._try_admit_locked, ticket, tokens, agent)
+                else:
+                    wait = self._try_admit_locked(ticket, tokens, agent)
+                if wait == 0.0:
+                    with self._cond:
+                        self._admitted(started)
+                    return
+                await asyncio.sleep(min(wait, 1.0))
+        except BaseException:
+            with self._cond:
+                self._cancel(ticket)
+            raise
+
+    def _cancel(self, ticket: tuple):
+        if ticket in self._queue:
+            self._queue.remove(ticket)
+            heapq.heapify(self._queue)
+            self._cond.notify_all()
+
+    def settle(self, estimated: float, actual: float, agent: Optional[str] = None):
+        """Correct the token bucket once a request's real usage is known."""
+        if not actual:
+            return
+        if self.shared is not None and self.shared.adjust(
+                self.family, estimated - actual, self.tokens.capacity, agent):
+            return
+        with self._cond:
+            self.tokens.adjust(estimated - actual)
+
+    def rate_limited(self, retry_after: Optional[float] = None, agent: Optional[str] = None) -> float:
+        """
+        Pause admissions after a rate limit response.
+
+        Uses the provider's retry-after when given, otherwise jittered
+        exponential backoff on consecutive rate limits. With a shared
+        limiter every process pauses.
+
+        Returns:
+            Seconds admissions are paused for
+        """
+        if self.shared is not None:
+            pause = self.shared.rate_limited(self.family, retry_after, self.backoff_base,
+                                             self.backoff_max, agent)
+            if pause is not None:
+                with self._cond:
+                    self.counters["rate_limited"] += 1
+                    self._cond.notify_all()
+                return pause
+        with self._cond:
+            self.consecutive_limits += 1
+            self.counters["rate_limited"] += 1
+            if retry_after is None:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (self.consecutive_limits - 1))
+                retry_after = delay * random.uniform(0.5, 1.0)
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+            return retry_after
+
+    def succeeded(self):
+        if self.shared is not None:
+            self.shared.succeeded(self.family)
+        with self._cond:
+            self.consecutive_limits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus queue depth, mean wait and remaining pause."""
+        paused_for = self.shared.paused_for(self.family) if self.shared is not None else 0.0
+        with self._cond:
+            admitted = self.counters["admitted"]
+            return dict(
+                self.counters,
+                queue_depth=len(self._queue),
+                mean_wait_seconds=self.counters["wait_seconds"] / admitted if admitted else 0.0,
+                paused_for=max(paused_for, self.paused_until - time.monotonic()),
+            )
+
+
+class RequestScheduler:
+    """
+    One ModelScheduler per model family, configured from model_routing.yaml.
+
+    Pass a SharedRateLimiter to coordinate admission with other agent
+    processes on the machine.
+    """
+
+    def __init__(self, rate_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0, max_retries: int = 5,
+                 shared: Optional[SharedRateLimiter] = None):
+        self.max_retries = max_retries
+        self.shared = shared
+        limits = {family: dict(values) for family, values in DEFAULT_RATE_LIMITS.items()}
+        for family, values in (rate_limits or {}).items():
+            limits.setdefault(family, {}).update(values or {})
+        self.schedulers = {
+            family: ModelScheduler(family, values.get("requests_per_minute", 50),
+                                   values.get("tokens_per_minute", 40000), backoff_base, backoff_max,
+                                   shared)
+            for family, values in limits.items()
+        }
+
+    @classmethod
+    def from_config(cls, path: Optional[str] = None) -> "RequestScheduler":
+        config = load_routing_config(path)
+        backoff = config.get("backoff", {}) or {}
+        shared = None
+        if config.get("shared_rate_limits", True) and os.getenv('CDC_SHARED_RATE_LIMITS', '1') != '0':
+            shared = SharedRateLimiter()
+        return cls(
+            config.get("rate_limits"),
+            backoff_base=float(backoff.get("base_seconds", 1.0)),
+            backoff_max=float(backoff.get("max_seconds", 60.0)),
+            max_retries=int(backoff.get("max_retries", 5)),
+            shared=shared,
+        )
+
+    def for_model(self, model: str) -> ModelScheduler:
+        return self.schedulers[model_family(model)]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {family: scheduler.stats() for family, scheduler in self.schedulers.items()}
+
+    def shared_usage(self, minutes: int = 60) -> Optional[List[Dict[str, Any]]]:
+        """Usage of every process sharing the limiter, None without one."""
+        return self.shared.usage(minutes) if self.shared is not None else None
+
+
+_scheduler: Optional[RequestScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """Return the process-wide scheduler shared by every ModelAwareAgent."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler.from_config()
+        return _scheduler
@@ -0,0 +1,166 @@
+"""Content-addressed on-disk cache of responses to deterministic agent tasks."""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .routing_config import load_routing_config
+
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+# Returned by get() on a miss, since None is a valid cached response
+MISS = object()
+
+
+def get_cache_dir() -> Path:
+    """CDC_RESPONSE_CACHE_DIR, or ~/.cache/cdc-devtools/responses."""
+    default = Path.home() / '.cache' / 'cdc-devtools' / 'responses'
+    return Path(os.getenv('CDC_RESPONSE_CACHE_DIR', str(default))).expanduser()
+
+
+def inputs_digest(inputs: Any) -> str:
+    """SHA-256 of a prompt (str/bytes) or JSON-serializable inputs."""
+    if isinstance(inputs, bytes):
+        data = inputs
+    elif isinstance(inputs, str):
+        data = inputs.encode('utf-8')
+    else:
+        data = json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResponseCache:
+    """
+    Responses stored under the SHA-256 of (model, task_type, inputs digest).
+
+    Only task types with a TTL are cached. Each file holds the pickled
+    response and the time it was stored; a hit past the task type's TTL is
+    deleted and treated as a miss. A hit refreshes the file's mtime, and
+    once the cache grows past max_bytes the least recently used files are
+    deleted first.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 cache_dir: Optional[str] = None):
+        self.ttls = dict(ttls or {})
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else get_cache_dir()
+        self._total_bytes = None  # Measured on the first store
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "stored": 0, "evicted": 0}
+
+    @classmethod
+    def from_config(cls, path: Optional[str] = None) -> "ResponseCache":
+        """Create a cache from the response_cache section of model_routing.yaml."""
+        config = load_routing_config(path).get("response_cache", {}) or {}
+        return cls(
+            ttls=config.get("ttl_seconds"),
+            max_bytes=int(os.getenv('CDC_RESPONSE_CACHE_MAX_BYTES', config.get("max_bytes", DEFAULT_MAX_BYTES))),
+        )
+
+    def enabled_for(self, task_type: str) -> bool:
+        return bool(self.ttls.get(task_type))
+
+    def path_for(self, model: str, task_type: str, inputs: Any) -> Path:
+        key = f"{model}\0{task_type}\0{inputs_digest(inputs)}"
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.pickle"
+
+    def get(self, model: str, task_type: str, inputs: Any) -> Any:
+        """
+        Look up a response.
+
+        Returns:
+            The cached response, or MISS
+        """
+        path = self.path_for(model, task_type, inputs)
+        try:
+            with open(path, 'rb') as f:
+                stored_at, response = pickle.load(f)
+        except FileNotFoundError:
+            self._count("misses")
+            return MISS
+        except (OSError, pickle.PickleError, EOFError, ValueError, TypeError, AttributeError):
+            self._remove(path)
+            self._count("misses")
+            return MISS
+
+        if time.time() - stored_at > self.ttls.get(task_type, 0):
+            self._remove(path)
+            self._count("expired")
+            self._count("misses")
+            return MISS
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count("hits")
+        return response
+
+    def put(self, model: str, task_type: str, inputs: Any, response: Any) -> bool:
+        """Store a response; False if it cannot be pickled or written."""
+        path = self.path_for(model, task_type, inputs)
+        try:
+            data = pickle.dumps((time.time(), response), protocol=pickle.HIGHEST_PROTOCOL)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            return False
+
+        self._count("stored")
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan()[1]
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=path)
+        return True
+
+    def _scan(self):
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*/*.pickle'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    def _evict(self, keep: Optional[Path] = None):
+        """Delete least recently used files until the cache fits in max_bytes."""
+        entries, total = self._scan()
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                total -= size
+                self.counters["evicted"] += 1
+        self._total_bytes = total
+
+    @staticmethod
+    def _remove(path: Path) -> bool:
+        try:
+            path.unlink()
+            return True
+        except OSError:
+            return False
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counters, total_bytes=self._total_bytes, cache_dir=str(self.cache_dir))
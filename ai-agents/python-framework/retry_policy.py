@@ -0,0 +1,155 @@
+"""Retry, escalation and hedging policy for model-aware agents."""
+
+import random
+import threading
+from collections import deque
+from typing import Dict, Optional, Sequence, Tuple
+
+from .model_router import ModelType
+from .request_scheduler import is_rate_limit_error, model_family
+from .routing_config import load_routing_config
+
+FAMILY_MODELS = {"sonnet": ModelType.SONNET.value, "opus": ModelType.OPUS.value}
+
+
+class LatencyWindow:
+    """
+    Recent successful attempt latencies per (task_type, model): the
+    duration, or the time to first token for streamed responses.
+    """
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self._samples: Dict[Tuple[str, str], deque] = {}
+        self._lock = threading.Lock()
+
+    def add(self, task_type: str, model: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get((task_type, model))
+            if samples is None:
+                samples = self._samples[(task_type, model)] = deque(maxlen=self.size)
+            samples.append(seconds)
+
+    def percentile(self, task_type: str, model: str, percent: float, min_samples: int = 20) -> Optional[float]:
+        """Nearest-rank percentile, or None with fewer than min_samples."""
+        with self._lock:
+            samples = sorted(self._samples.get((task_type, model), ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        rank = max(0, min(len(samples) - 1, int(round(percent / 100.0 * len(samples))) - 1))
+        return samples[rank]
+
+
+class RetryPolicy:
+    """
+    How execute_with_model retries, escalates and hedges a task.
+
+    A task gets at most max_attempts attempts, hedges included. After a
+    failure the next attempt moves one step up the escalation order
+    (Sonnet -> Opus) unless the error was a rate limit or the caller set
+    allow_upgrade=False. When there is no model to move to (Opus failed,
+    a rate limit the scheduler already retried, or no upgrade allowed) the
+    task gives up, unless retry_same_model is set. Retries wait a jittered
+    exponential backoff. attempt_timeout bounds each
+    round (an attempt and its hedge), total_timeout the whole task.
+
+    With hedge enabled, a second attempt on the next model starts when the
+    first has run longer than hedge_after seconds, or, without a fixed
+    value, than the hedge_percentile latency of recent successful attempts
+    on that model and task type. The first success wins. Streamed attempts
+    are compared on time to first token and not hedged once chunks arrive.
+
+    Subclass and override next_model, should_retry or hedge_delay for other
+    strategies, and pass the instance as ModelAwareAgent(retry_policy=...).
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 2,
+        escalation: Sequence[str] = ("sonnet", "opus"),
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        attempt_timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+        hedge: bool = False,
+        hedge_after: Optional[float] = None,
+        hedge_percentile: float = 95,
+        hedge_min_samples: int = 20,
+        retry_same_model: bool = False
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.escalation = list(escalation)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.attempt_timeout = attempt_timeout
+        self.total_timeout = total_timeout
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.retry_same_model = retry_same_model
+
+    @classmethod
+    def from_config(cls, task_type: Optional[str] = None, path: Optional[str] = None) -> "RetryPolicy":
+        """
+        Policy from the retry_policy section of model_routing.yaml, with
+        the task type's entry under task_types applied on top.
+        """
+        section = dict(load_routing_config(path).get("retry_policy", {}) or {})
+        overrides = (section.pop("task_types", {}) or {}).get(task_type, {}) if task_type else {}
+        settings = dict(section, **(overrides or {}))
+        return cls(
+            max_attempts=int(settings.get("max_attempts", 2)),
+            escalation=settings.get("escalation", ("sonnet", "opus")),
+            backoff_base=float(settings.get("backoff_base_seconds", 0.5)),
+            backoff_max=float(settings.get("backoff_max_seconds", 10.0)),
+            attempt_timeout=settings.get("attempt_timeout_seconds"),
+            total_timeout=settings.get("total_timeout_seconds"),
+            hedge=bool(settings.get("hedge", False)),
+            hedge_after=settings.get("hedge_after_seconds"),
+            hedge_percentile=float(settings.get("hedge_percentile", 95)),
+            hedge_min_samples=int(settings.get("hedge_min_samples", 20)),
+            retry_same_model=bool(settings.get("retry_same_model", False)),
+        )
+
+    def should_retry(self, error: Optional[BaseException]) -> bool:
+        """Whether a failed attempt is worth another one."""
+        return True
+
+    def retry_model(self, model: str, error: Optional[BaseException], allow_upgrade: bool = True) -> Optional[str]:
+        """Model for the retry after an attempt on `model` failed, None to give up."""
+        if not self.should_retry(error):
+            return None
+        next_model = self.next_model(model, error, allow_upgrade)
+        if next_model == model and not self.retry_same_model:
+            return None
+        return next_model
+
+    def needs_threads(self, hedge_after: Optional[float]) -> bool:
+        """Whether a round must run on threads: it can time out or hedge."""
+        return bool(self.attempt_timeout or self.total_timeout or hedge_after is not None)
+
+    def next_model(self, model: str, error: Optional[BaseException], allow_upgrade: bool = True) -> str:
+        """Model for the attempt after one on `model` failed with error (None for hedges)."""
+        if not allow_upgrade or (error is not None and is_rate_limit_error(error)):
+            return model
+        family = model_family(model)
+        if family not in self.escalation:
+            return model
+        position = self.escalation.index(family)
+        if position + 1 >= len(self.escalation):
+            return model
+        return FAMILY_MODELS.get(self.escalation[position + 1], model)
+
+    def backoff(self, retry: int) -> float:
+        """Jittered delay before retry number `retry` (1 for the first)."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (retry - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def hedge_delay(self, latency: LatencyWindow, task_type: str, model: str) -> Optional[float]:
+        """Seconds after which to hedge an attempt on model, None for no hedge."""
+        if not self.hedge:
+            return None
+        if self.hedge_after is not None:
+            return float(self.hedge_after)
+        return latency.percentile(task_type, model, self.hedge_percentile, self.hedge_min_samples)
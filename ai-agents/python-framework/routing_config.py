@@ -0,0 +1,50 @@
+"""Load config/model_routing.yaml for the model router and cost ledger."""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None  # PyYAML is optional, built-in defaults are used without it
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / 'config' / 'model_routing.yaml'
+
+_cache: Dict[str, Any] = {}
+
+
+def get_config_path() -> Path:
+    """Return the routing config, CDC_ROUTING_CONFIG overriding the bundled one."""
+    return Path(os.getenv('CDC_ROUTING_CONFIG', str(DEFAULT_CONFIG_PATH))).expanduser()
+
+
+def load_routing_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Return the model_routing section of the routing config.
+
+    The parsed file is cached per path and modification time. A missing
+    file, missing PyYAML or a parse error all yield an empty dict so callers
+    fall back to their defaults.
+    """
+    path = Path(path) if path else get_config_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return {}
+    if yaml is None:
+        return {}
+
+    key = str(path)
+    cached = _cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f) or {}
+        config = data.get('model_routing', {}) or {}
+    except (OSError, yaml.YAMLError, AttributeError):
+        config = {}
+    _cache[key] = (mtime, config)
+    return config
@@ -0,0 +1,245 @@
+"""Replay logged routing decisions under alternative router settings."""
+
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy is optional, the replay falls back to pure Python
+
+from .learned_router import LearnedRouter
+from .model_router import ModelType
+from .request_scheduler import model_family
+from .trigger_matcher import TriggerMatcher
+
+FAMILY_MODELS = {"opus": ModelType.OPUS.value, "sonnet": ModelType.SONNET.value}
+
+# Decisions the score did not make keep their logged model in every scenario
+FIXED_REASONS = ("learned_model", "budget_downgrade")
+
+
+class Scenario:
+    """
+    Router settings to replay: an Opus threshold and trigger weight
+    changes. A weight of 0 removes a trigger; a trigger that was never
+    logged is matched against the logged (truncated) descriptions.
+    """
+
+    def __init__(self, name: str, threshold: float, weights: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.threshold = threshold
+        self.weights = dict(weights or {})
+
+
+def request_outcomes(entries: Iterable[Dict]) -> List[Dict]:
+    """
+    Group usage entries into requests, oldest first.
+
+    Attempts sharing a request id are one request: the first attempt
+    gives its model, time and description, costs add up, and it succeeded
+    if any attempt did.
+    """
+    requests: List[Dict] = []
+    by_id: Dict[str, Dict] = {}
+    for entry in entries:
+        if not entry.get("model"):
+            continue
+        attempt = entry.get("attempt") or {}
+        request = by_id.get(attempt.get("request")) if attempt else None
+        if request is None:
+            request = {
+                "timestamp": entry.get("timestamp", ""),
+                "model": entry["model"],
+                "task_type": entry.get("task_type", ""),
+                "description": entry.get("description", ""),
+                "context": entry.get("context"),
+                "agent": entry.get("agent"),
+                "cache_hit": bool(entry.get("cache_hit")),
+                "cost": 0.0,
+                "success": False,
+            }
+            requests.append(request)
+            if attempt:
+                by_id[attempt["request"]] = request
+        request["cost"] += float(entry.get("cost_usd", 0.0) or 0.0)
+        request["success"] |= bool(entry["success"])
+    requests.sort(key=lambda request: request["timestamp"])
+    return requests
+
+
+def join_outcomes(decisions: List[Dict], requests: List[Dict]) -> List[Optional[Dict]]:
+    """
+    Pair each decision with the request it routed.
+
+    Decisions and requests share no id, so each request takes the oldest
+    unpaired decision logged before it with the same task type and
+    description. Returns one request (or None) per decision.
+    """
+    pending: Dict[Tuple[str, str], deque] = {}
+    for index, decision in enumerate(decisions):
+        key = (decision.get("task_type", ""), decision.get("description", ""))
+        pending.setdefault(key, deque()).append(index)
+
+    outcomes: List[Optional[Dict]] = [None] * len(decisions)
+    for request in requests:
+        queue = pending.get((request["task_type"], request["description"][:100]))
+        if queue and decisions[queue[0]]["timestamp"] <= request["timestamp"]:
+            outcomes[queue.popleft()] = request
+    return outcomes
+
+
+class RoutingReplay:
+    """
+    Logged decisions as columns, with what each would have cost and how
+    likely it was to succeed on either model.
+
+    A decision routed to the model a scenario picks counts its logged
+    request's cost and outcome. Otherwise cost is the mean request cost of
+    that model on the task type (or overall), and success comes from the
+    learned routing model when one is loaded, else the model's success
+    rate on the task type. Scores are rebuilt from the logged base_score
+    and matched triggers, so evaluating a scenario is a few array
+    operations over all decisions; numpy is used when installed.
+    """
+
+    def __init__(self, decisions: List[Dict], requests: List[Dict], weights: Dict[str, float],
+                 learned: Optional[LearnedRouter] = None, min_examples: int = 20):
+        """
+        Args:
+            decisions: Logged decisions with base_score, oldest first
+            requests: request_outcomes() over the same period
+            weights: Trigger weights of the current configuration
+            learned: Learned routing model for counterfactual success
+            min_examples: Requests a (model, task type) rate needs before
+                it is used instead of the model's overall rate
+        """
+        self.weights = dict(weights)
+        self.descriptions = [decision.get("description", "") for decision in decisions]
+        self.trigger_rows: Dict[str, List[int]] = {}
+        outcomes = join_outcomes(decisions, requests)
+        self.joined = sum(outcome is not None for outcome in outcomes)
+        costs, rates = self._estimates(requests, min_examples)
+
+        base, triggers, fixed, logged_opus = [], [], [], []
+        cost = {"opus": [], "sonnet": []}
+        success = {"opus": [], "sonnet": []}
+        for index, (decision, outcome) in enumerate(zip(decisions, outcomes)):
+            base.append(float(decision["base_score"]))
+            score = 0.0
+            for trigger in decision.get("triggers") or ():
+                self.trigger_rows.setdefault(trigger, []).append(index)
+                score += self.weights.get(trigger, 0.0)
+            triggers.append(score)
+            logged_opus.append(model_family(decision["model"]) == "opus")
+            fixed.append(decision.get("reason") in FIXED_REASONS)
+
+            task_type = decision.get("task_type", "")
+            for family in ("opus", "sonnet"):
+                if outcome is not None and model_family(outcome["model"]) == family:
+                    cost[family].append(outcome["cost"])
+                    success[family].append(float(outcome["success"]))
+                    continue
+                cost[family].append(costs.get((family, task_type), costs.get((family, None), 0.0)))
+                predicted = None
+                if learned is not None:
+                    context = outcome.get("context") if outcome else None
+                    agent = outcome.get("agent") if outcome else None
+                    predicted = learned.predict(FAMILY_MODELS[family], task_type,
+                                                decision.get("description", ""), context, agent)
+                if predicted is None:
+                    predicted = rates.get((family, task_type), rates.get((family, None), 0.0))
+                success[family].append(predicted)
+
+        self.columns = {
+            "base": base, "triggers": triggers, "fixed": fixed, "logged_opus": logged_opus, "cost_opus": cost["opus"], "cost_sonnet": cost["sonnet"],
+            "success_opus": success["opus"], "success_sonnet": success["sonnet"],
+        }
+        if np is not None:
+            self.columns = {name: np.asarray(values, dtype=bool if name in ("fixed", "logged_opus")
+                                             else float) for name, values in self.columns.items()}
+
+    def __len__(self):
+        return len(self.descriptions)
+
+    @staticmethod
+    def _estimates(requests: List[Dict], min_examples: int) -> Tuple[Dict, Dict]:
+        """Mean cost and success rate per (family, task_type) and per family (task_type None)."""
+        totals: Dict[Tuple[str, Optional[str]], List[float]] = {}
+        for request in requests:
+            if request["cache_hit"]:
+                continue  # Free responses say nothing about the model's cost
+            family = model_family(request["model"])
+            for key in ((family, request["task_type"]), (family, None)):
+                total = totals.setdefault(key, [0.0, 0.0, 0])
+                total[0] += request["cost"]
+                total[1] += request["success"]
+                total[2] += 1
+        costs = {key: cost / count for key, (cost, _, count) in totals.items()}
+        rates = {key: successes / count for key, (_, successes, count) in totals.items()
+                 if key[1] is None or count >= min_examples}
+        return costs, rates
+
+    def rows_for(self, trigger: str) -> List[int]:
+        """Decisions whose description matches a trigger, matching unlogged ones once."""
+        rows = self.trigger_rows.get(trigger)
+        if rows is None:
+            matcher = TriggerMatcher({trigger: 1})
+            rows = [index for index, description in enumerate(self.descriptions) if matcher.match(description)]
+            self.trigger_rows[trigger] = rows
+        return rows
+
+    def evaluate(self, scenario: Scenario) -> Dict[str, Any]:
+        """
+        Replay every decision under a scenario.
+
+        Returns:
+            Dict with requests, opus_share, changed (share routed
+            differently than logged), cost and success_rate
+        """
+        changes = [(self.rows_for(trigger), weight - self.weights.get(trigger, 0.0))
+                   for trigger, weight in scenario.weights.items()]
+        c = self.columns
+        if np is not None:
+            score = c["base"] + c["triggers"]
+            for rows, delta in changes:
+                if rows and delta:
+                    score[rows] += delta
+            return self._summarize(np.where(c["fixed"], c["logged_opus"], score >= scenario.threshold))
+
+        score = [base + triggers for base, triggers in zip(c["base"], c["triggers"])]
+        for rows, delta in changes:
+            for row in rows:
+                score[row] += delta
+        return self._summarize([logged if fixed else value >= scenario.threshold
+                                for value, fixed, logged in zip(score, c["fixed"], c["logged_opus"])])
+
+    def logged(self) -> Dict[str, Any]:
+        """The decisions as they were made, in the same form as evaluate()."""
+        return self._summarize(self.columns["logged_opus"])
+
+    def _summarize(self, opus) -> Dict[str, Any]:
+        """Totals for a per-decision Opus mask."""
+        c = self.columns
+        count = len(self) or 1
+        if np is not None:
+            return {
+                "requests": len(self),
+                "opus_share": float(opus.sum()) / count,
+                "changed": float((opus != c["logged_opus"]).sum()) / count,
+                "cost": float(np.where(opus, c["cost_opus"], c["cost_sonnet"]).sum()),
+                "success_rate": float(np.where(opus, c["success_opus"], c["success_sonnet"]).sum()) / count,
+            }
+        result = {"opus": 0, "changed": 0, "cost": 0.0, "successes": 0.0}
+        for i, is_opus in enumerate(opus):
+            result["opus"] += is_opus
+            result["changed"] += is_opus != c["logged_opus"][i]
+            result["cost"] += c["cost_opus"][i] if is_opus else c["cost_sonnet"][i]
+            result["successes"] += c["success_opus"][i] if is_opus else c["success_sonnet"][i]
+        return {
+            "requests": len(self),
+            "opus_share": result["opus"] / count,
+            "changed": result["changed"] / count,
+            "cost": result["cost"],
+            "success_rate": result["successes"] / count,
+        }
@@ -0,0 +1,245 @@
+"""Rate limit buckets and usage counters shared by every agent process on the machine."""
+
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    family TEXT PRIMARY KEY,
+    requests REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0,
+    consecutive_limits INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS usage (
+    minute INTEGER NOT NULL,
+    family TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    rate_limited INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (minute, family, agent)
+);
+"""
+
+# Per-minute usage rows are kept this long
+USAGE_RETENTION_MINUTES = 7 * 24 * 60
+
+
+def default_db_path() -> Path:
+    """
+    CDC_RATE_LIMIT_DB, or ~/.cache/cdc-devtools/rate_limits.sqlite.
+
+    Rate limits belong to the account, not the project, so agents started
+    from any directory share one per-user database by default.
+    """
+    default = Path.home() / '.cache' / 'cdc-devtools' / 'rate_limits.sqlite'
+    return Path(os.getenv('CDC_RATE_LIMIT_DB', str(default))).expanduser()
+
+
+class SharedRateLimiter:
+    """
+    Token buckets, pauses and usage counters in a SQLite database.
+
+    Every agent process pointing at the same file draws from the same
+    request and token buckets, so panes running side by side stay under the
+    account's limits together. Each operation is a short BEGIN IMMEDIATE
+    transaction, which SQLite serializes across processes with its file
+    lock. Methods return None when the database cannot be used, and the
+    caller falls back to its in-process buckets.
+
+    succeeded() only writes when the last bucket read saw consecutive rate
+    limits, and try_take drops usage rows past the retention window once
+    per minute.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else default_db_path()
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.last_error = None
+        # consecutive_limits per family as last read, to skip no-op resets
+        self._consecutive: Dict[str, int] = {}
+        self._pruned_minute = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are not shared with forked children
+        if self._conn is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                conn.executescript(SCHEMA)
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _transaction(self, operation):
+        """Run operation(conn, now) in one write transaction; None on error."""
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    result = operation(conn, time.time())
+                    conn.execute('COMMIT')
+                    return result
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+            except (OSError, sqlite3.Error) as e:
+                self.last_error = f"{self.path}: {e}"
+                return None
+
+    @staticmethod
+    def _bucket(conn, family: str, now: float, requests_per_minute: float, tokens_per_minute: float):
+        """Load a bucket row refilled up to now, creating it full if missing."""
+        row = conn.execute(
+            'SELECT requests, tokens, updated, paused_until, consecutive_limits FROM buckets WHERE family = ?',
+            (family,)).fetchone()
+        if row is None:
+            conn.execute('INSERT INTO buckets (family, requests, tokens, updated) VALUES (?, ?, ?, ?)',
+                         (family, requests_per_minute, tokens_per_minute, now))
+            return [requests_per_minute, tokens_per_minute, 0.0, 0]
+        requests, tokens, updated, paused_until, consecutive = row
+        elapsed = max(0.0, now - updated)
+        requests = min(requests_per_minute, requests + elapsed * requests_per_minute / 60.0)
+        tokens = min(tokens_per_minute, tokens + elapsed * tokens_per_minute / 60.0)
+        return [requests, tokens, paused_until, consecutive]
+
+    @staticmethod
+    def _count(conn, family: str, agent: Optional[str], now: float, **deltas):
+        minute = int(now // 60)
+        columns = ', '.join(deltas)
+        placeholders = ', '.join('?' for _ in deltas)
+        updates = ', '.join(f'{name} = {name} + excluded.{name}' for name in deltas)
+        conn.execute(
+            f'INSERT INTO usage (minute, family, agent, {columns}) VALUES (?, ?, ?, {placeholders}) '
+            f'ON CONFLICT (minute, family, agent) DO UPDATE SET {updates}',
+            (minute, family, agent or '', *deltas.values()))
+
+    def try_take(self, family: str, tokens: float, requests_per_minute: float,
+                 tokens_per_minute: float, agent: Optional[str] = None) -> Optional[float]:
+        """
+        Take one request and `tokens` from the shared buckets if available.
+
+        Returns:
+            0.0 when taken, otherwise seconds until it could be (None if
+            the database is unavailable)
+        """
+        tokens = min(tokens, tokens_per_minute)
+
+        def operation(conn, now):
+            requests, level, paused_until, consecutive = self._bucket(
+                conn, family, now, requests_per_minute, tokens_per_minute)
+            wait = max(paused_until - now,
+                       (1 - requests) * 60.0 / requests_per_minute if requests < 1 else 0.0,
+                       (tokens - level) * 60.0 / tokens_per_minute if level < tokens else 0.0)
+            if wait <= 0:
+                requests -= 1
+                level -= tokens
+                self._count(conn, family, agent, now, requests=1, tokens=int(tokens))
+            conn.execute('UPDATE buckets SET requests = ?, tokens = ?, updated = ? WHERE family = ?',
+                         (requests, level, now, family))
+            self._consecutive[family] = consecutive
+            minute = int(now // 60)
+            if minute != self._pruned_minute:
+                self._prune(conn, minute)
+            return max(0.0, wait)
+
+        return self._transaction(operation)
+
+    def adjust(self, family: str, amount: float, tokens_per_minute: float,
+               agent: Optional[str] = None) -> Optional[bool]:
+        """Return (or with a negative amount, charge) tokens once real usage is known."""
+        def operation(conn, now):
+            conn.execute('UPDATE buckets SET tokens = MIN(?, tokens + ?) WHERE family = ?',
+                         (tokens_per_minute, amount, family))
+            self._count(conn, family, agent, now, tokens=int(-amount))
+            return True
+
+        return self._transaction(operation)
+
+    def rate_limited(self, family: str, retry_after: Optional[float], backoff_base: float,
+                     backoff_max: float, agent: Optional[str] = None) -> Optional[float]:
+        """
+        Pause the family for every process after a rate limit response.
+
+        Without a retry-after hint the pause is jittered exponential
+        backoff on the consecutive rate limits seen by all processes.
+        """
+        def operation(conn, now):
+            row = conn.execute('SELECT paused_until, consecutive_limits FROM buckets WHERE family = ?',
+                               (family,)).fetchone()
+            paused_until, consecutive = row if row else (0.0, 0)
+            consecutive += 1
+            pause = retry_after
+            if pause is None:
+                pause = min(backoff_max, backoff_base * 2 ** (consecutive - 1)) * random.uniform(0.5, 1.0)
+            conn.execute('UPDATE buckets SET paused_until = ?, consecutive_limits = ? WHERE family = ?',
+                         (max(paused_until, now + pause), consecutive, family))
+            self._consecutive[family] = consecutive
+            self._count(conn, family, agent, now, rate_limited=1)
+            return pause
+
+        return self._transaction(operation)
+
+    def succeeded(self, family: str) -> Optional[bool]:
+        """Reset the consecutive rate limit count, if the last read saw any."""
+        if not self._consecutive.get(family):
+            return True
+
+        def operation(conn, now):
+            conn.execute('UPDATE buckets SET consecutive_limits = 0 WHERE family = ? AND consecutive_limits > 0',
+                         (family,))
+            self._consecutive[family] = 0
+            return True
+
+        return self._transaction(operation)
+
+    def _prune(self, conn, minute: int):
+        conn.execute('DELETE FROM usage WHERE minute < ?', (minute - USAGE_RETENTION_MINUTES,))
+        self._pruned_minute = minute
+
+    def paused_for(self, family: str) -> float:
+        """Seconds the family stays paused across processes (0 if unknown)."""
+        def operation(conn, now):
+            row = conn.execute('SELECT paused_until FROM buckets WHERE family = ?', (family,)).fetchone()
+            return max(0.0, row[0] - now) if row else 0.0
+
+        return self._transaction(operation) or 0.0
+
+    def usage(self, minutes: int = 60) -> Optional[List[Dict]]:
+        """
+        Aggregate usage of every process over the last `minutes` minutes.
+
+        Returns:
+            One dict per (family, agent) with requests, tokens and
+            rate_limited totals, and drops rows past the retention window
+        """
+        def operation(conn, now):
+            current = int(now // 60)
+            self._prune(conn, current)
+            rows = conn.execute(
+                'SELECT family, agent, SUM(requests), SUM(tokens), SUM(rate_limited) FROM usage '
+                'WHERE minute > ? GROUP BY family, agent ORDER BY family, agent',
+                (current - minutes,)).fetchall()
+            return [
+                {"family": family, "agent": agent, "requests": requests,
+                 "tokens": tokens, "rate_limited": rate_limited}
+                for family, agent, requests, tokens, rate_limited in rows
+            ]
+
+        return self._transaction(operation)
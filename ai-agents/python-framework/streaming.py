@@ -0,0 +1,199 @@
+"""Incremental consumption of streamed model responses."""
+
+import asyncio
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .cost_ledger import extract_usage
+
+_END = object()
+
+
+def is_stream(result: Any) -> bool:
+    """Whether task_fn returned an iterator or async iterator of chunks."""
+    return hasattr(result, "__next__") or hasattr(result, "__anext__")
+
+
+def _field(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def chunk_text(chunk: Any) -> str:
+    """
+    Text carried by a chunk: plain strings, Anthropic content_block_delta
+    events (delta.text) and dicts or objects with a text field.
+    """
+    if isinstance(chunk, str):
+        return chunk
+    delta = _field(chunk, "delta")
+    text = _field(delta, "text") if delta is not None else _field(chunk, "text")
+    return text if isinstance(text, str) else ""
+
+
+def chunk_usage(chunk: Any) -> Optional[Dict[str, int]]:
+    """
+    Token counts reported by a chunk, if any: Anthropic message_start
+    (message.usage) and message_delta (usage) events, or a usage field.
+    """
+    if isinstance(chunk, str):
+        return None
+    message = _field(chunk, "message")
+    if message is not None and _field(message, "usage") is not None:
+        return extract_usage(message)
+    if _field(chunk, "usage") is not None:
+        return extract_usage(chunk)
+    return None
+
+
+class StreamRelay:
+    """
+    Forwards one task's chunks to the caller's on_chunk callback.
+
+    Attempts of the same task (retries, hedges) share a relay. The first
+    attempt to produce a chunk owns the callback; chunks from the others
+    are read but not forwarded. If the owner fails, the next attempt to
+    produce a chunk takes over and the callback sees the response restart.
+    Attempts the policy gave up on are listed in abandoned and stop reading.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Any], Any]] = None):
+        self.callback = callback
+        self.owner = None
+        self.abandoned = set()
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        """Whether some attempt has produced a chunk."""
+        return self.owner is not None
+
+    def claim(self, attempt: int) -> bool:
+        """Whether attempt's chunks go to the callback, claiming it if free."""
+        with self._lock:
+            if self.owner is None:
+                self.owner = attempt
+            return self.owner == attempt
+
+    def release(self, attempt: int):
+        with self._lock:
+            if self.owner == attempt:
+                self.owner = None
+
+
+class StreamReader:
+    """
+    Reads one attempt's stream, forwarding chunks through a relay and
+    timing it.
+
+    The result is a dict with the concatenated text and the usage the
+    stream reported, so cost tracking and the response cache handle it
+    like any other response. Time to first token is measured to the first
+    chunk carrying text (or the first chunk, for streams without text);
+    tokens per second is output tokens over the time after it, and is None
+    when the stream reports no output tokens.
+    """
+
+    def __init__(self, relay: Optional[StreamRelay] = None, attempt: int = 1):
+        self.relay = relay or StreamRelay()
+        self.attempt = attempt
+        self.reset()
+
+    def reset(self):
+        self.chunks = 0
+        self.text: List[str] = []
+        self.usage: Dict[str, int] = {}
+        self.started = None
+        self.first_chunk = None
+        self.first_token = None
+        self.finished = None
+
+    def _add(self, chunk: Any) -> bool:
+        """Record a chunk; True if it should be forwarded."""
+        now = time.perf_counter()
+        self.chunks += 1
+        if self.first_chunk is None:
+            self.first_chunk = now
+        text = chunk_text(chunk)
+        if text:
+            self.text.append(text)
+            if self.first_token is None:
+                self.first_token = now
+        usage = chunk_usage(chunk)
+        if usage:
+            # Anthropic reports cumulative counts, so keep the largest
+            for name, value in usage.items():
+                self.usage[name] = max(self.usage.get(name, 0), value)
+        return self.relay.claim(self.attempt) and self.relay.callback is not None
+
+    def _stopped(self, stream: Any) -> bool:
+        if self.attempt not in self.relay.abandoned:
+            return False
+        close = getattr(stream, "close", None)
+        if callable(close):
+            close()
+        return True
+
+    def _result(self) -> Dict[str, Any]:
+        self.finished = time.perf_counter()
+        return {"text": "".join(self.text), "usage": dict(self.usage)}
+
+    def read(self, stream: Any, started: float) -> Dict[str, Any]:
+        """Consume a sync iterator; started is the perf_counter of the call."""
+        self.reset()
+        self.started = started
+        for chunk in stream:
+            if self._add(chunk):
+                self.relay.callback(chunk)
+            if self._stopped(stream):
+                break
+        return self._result()
+
+    async def read_async(self, stream: Any, started: float, executor=None) -> Dict[str, Any]:
+        """
+        Consume an async iterator, or a sync one chunk by chunk on the
+        executor so a blocking stream does not stall the event loop. An
+        async on_chunk callback is awaited.
+        """
+        self.reset()
+        self.started = started
+        loop = asyncio.get_running_loop()
+        chunks = stream if hasattr(stream, "__anext__") else None
+        while True:
+            if chunks is not None:
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+            else:
+                chunk = await loop.run_in_executor(executor, next, stream, _END)
+                if chunk is _END:
+                    break
+            if self._add(chunk):
+                forwarded = self.relay.callback(chunk)
+                if inspect.isawaitable(forwarded):
+                    await forwarded
+            if self.attempt in self.relay.abandoned:
+                close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+                if callable(close):
+                    closed = close()
+                    if inspect.isawaitable(closed):
+                        await closed
+                break
+        return self._result()
+
+    def metrics(self) -> Optional[Dict[str, Any]]:
+        """Streaming fields for the usage log, or None if nothing was read."""
+        if self.started is None or self.first_chunk is None:
+            return None
+        first = self.first_token if self.first_token is not None else self.first_chunk
+        end = self.finished if self.finished is not None else time.perf_counter()
+        output_tokens = self.usage.get("output_tokens", 0)
+        generating = end - first if self.first_token is not None else 0.0
+        return {
+            "ttft_seconds": round(first - self.started, 6),
+            "tokens_per_second": round(output_tokens / generating, 2) if output_tokens and generating > 0 else None,
+            "output_tokens": output_tokens,
+            "chunks": self.chunks,
+        }
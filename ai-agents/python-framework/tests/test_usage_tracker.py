@@ -0,0 +1,48 @@
+"""Rollups stay correct when a compacted day receives late lines."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import ai_agents module
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '../../..'))
+
+from ai_agents.base_agents.usage_tracker import UsageTracker
+
+
+class LateLinesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.tracker = UsageTracker(os.path.join(self.directory.name, 'usage.jsonl'))
+        self.day = (datetime.utcnow() - timedelta(days=30)).date().isoformat()
+        self.written = 0
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, count):
+        with open(self.tracker.log.partition_path(self.day), 'a') as f:
+            for _ in range(count):
+                self.written += 1
+                f.write(json.dumps({"timestamp": f"{self.day}T00:00:{self.written:02d}", "model": "m",
+                                    "task_type": "t", "tokens_used": 10, "success": True}) + "\n")
+
+    def totals(self):
+        return self.tracker.refresh_rollups()[f"{self.day}|m|t"]
+
+    def test_compact_then_late_line(self):
+        self.write(5)
+        self.assertEqual(self.totals()[:3], [5, 50, 5])
+        self.tracker.compact(7)
+        self.write(1)
+        self.assertEqual(self.totals()[:3], [6, 60, 6])
+        self.tracker.compact(7)
+        self.assertEqual(self.totals()[:3], [6, 60, 6])
+        self.assertEqual(sum(1 for _ in self.tracker.iter_usage()), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
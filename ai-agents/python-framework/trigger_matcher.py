@@ -0,0 +1,109 @@
+"""Whole-word keyword matching for routing triggers."""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Words are runs of letters/digits, optionally joined by ' - or _
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:['_-][a-z0-9]+)*")
+
+# Default weight: enough on its own to reach the default Opus threshold
+DEFAULT_WEIGHT = 4
+
+# Built-in triggers (ModelRouter.OPUS_TRIGGERS) with the inflections that
+# substring matching used to catch
+DEFAULT_FORMS = {
+    "architect": ["architects", "architected", "architecting", "architecture", "architectural"],
+    "orchestrate": ["orchestrates", "orchestrated", "orchestrating", "orchestration"],
+    "design": ["designs", "designed", "designing"],
+    "strategy": ["strategies", "strategic"],
+    "debug": ["debugs", "debugged", "debugging"],
+    "complex": ["complexity"],
+    "critical": [],
+    "production": [],
+    "refactor": ["refactors", "refactored", "refactoring"],
+    "analyze system": ["analyze systems", "analyzing system", "analyzing systems"],
+    "review architecture": ["reviewing architecture"],
+}
+
+
+class TriggerMatcher:
+    """
+    Match trigger words and phrases against a description in one pass.
+
+    Triggers are compiled into a trie keyed by whole words, so "redesign"
+    does not match "design" and "debugger" does not match "debug" unless
+    listed as a form. The description is tokenized once and each position
+    walks at most as many trie levels as the longest trigger phrase, so the
+    cost depends on the description length, not on the number of triggers.
+    """
+
+    def __init__(self, triggers: Dict[str, float], forms: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Args:
+            triggers: Trigger word or phrase -> weight
+            forms: Trigger -> extra inflected forms matching with its weight
+        """
+        self.triggers = dict(triggers)
+        self._trie: Dict = {}
+        self.max_words = 0
+        forms = forms or {}
+        for trigger, weight in self.triggers.items():
+            for phrase in [trigger] + list(forms.get(trigger, [])):
+                self._add(phrase, trigger, weight)
+
+    def _add(self, phrase: str, trigger: str, weight: float):
+        words = WORD_PATTERN.findall(phrase.lower())
+        if not words:
+            return
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node[None] = (trigger, weight)
+        self.max_words = max(self.max_words, len(words))
+
+    @classmethod
+    def from_config(cls, config: Dict, default_triggers: Iterable[str] = ()) -> "TriggerMatcher":
+        """
+        Build from the opus_triggers section of model_routing.yaml.
+
+        Each entry is either `trigger: weight` or
+        `trigger: {weight: N, forms: [...]}`. Without the section the
+        built-in triggers and forms are used.
+        """
+        section = config.get("opus_triggers")
+        if not section:
+            triggers = {trigger: DEFAULT_WEIGHT for trigger in default_triggers}
+            return cls(triggers, {t: DEFAULT_FORMS.get(t, []) for t in triggers})
+
+        triggers = {}
+        forms = {}
+        for trigger, spec in section.items():
+            if isinstance(spec, dict):
+                triggers[trigger] = spec.get("weight", DEFAULT_WEIGHT)
+                forms[trigger] = spec.get("forms", [])
+            else:
+                triggers[trigger] = DEFAULT_WEIGHT if spec is None else spec
+        return cls(triggers, forms)
+
+    def match(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Return the distinct triggers found in text.
+
+        Returns:
+            (trigger, weight) pairs in order of first occurrence
+        """
+        words = WORD_PATTERN.findall(text.lower())
+        trie = self._trie
+        found = {}
+        for start, word in enumerate(words):
+            node = trie.get(word)
+            position = start + 1
+            while node is not None:
+                hit = node.get(None)
+                if hit is not None and hit[0] not in found:
+                    found[hit[0]] = hit[1]
+                if position >= len(words):
+                    break
+                node = node.get(words[position])
+                position += 1
+        return list(found.items())
@@ -0,0 +1,309 @@
+"""Columnar storage and vectorized reports for usage metrics."""
+
+import json
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy is optional, reports fall back to pure Python
+
+MAGIC = b"CDCCOL1\n"
+
+# Column name -> array typecode; model and task_type are dictionary codes
+COLUMNS = [
+    ("ts", "d"),
+    ("model", "H"),
+    ("task_type", "H"),
+    ("tokens_used", "q"),
+    ("success", "b"),
+    ("duration_seconds", "d"),
+]
+DICTIONARY_COLUMNS = ("model", "task_type")
+
+NUMPY_TYPES = {"d": "<f8", "H": "<u2", "q": "<i8", "b": "i1"}
+
+
+def _epoch(timestamp: str) -> float:
+    """UTC epoch seconds for a naive utcnow().isoformat() timestamp."""
+    return datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _day(epoch_seconds: float) -> str:
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).strftime('%Y-%m-%d')
+
+
+class ColumnTable:
+    """
+    Usage entries as typed columns.
+
+    Columns are numpy arrays when numpy is installed, array.array otherwise.
+    model and task_type hold integer codes into self.dictionaries.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence], dictionaries: Dict[str, List[str]]):
+        self.columns = columns
+        self.dictionaries = dictionaries
+
+    def __len__(self):
+        return len(self.columns["ts"])
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict]) -> "ColumnTable":
+        """Build a table from usage entries, skipping router decisions."""
+        arrays = {name: array(code) for name, code in COLUMNS}
+        dictionaries = {name: [] for name in DICTIONARY_COLUMNS}
+        codes = {name: {} for name in DICTIONARY_COLUMNS}
+
+        for entry in entries:
+            if "success" not in entry:
+                continue
+            try:
+                ts = _epoch(entry["timestamp"])
+            except (KeyError, ValueError):
+                continue
+            arrays["ts"].append(ts)
+            for name in DICTIONARY_COLUMNS:
+                value = str(entry.get(name) or "unknown")
+                code = codes[name].get(value)
+                if code is None:
+                    code = codes[name][value] = len(dictionaries[name])
+                    dictionaries[name].append(value)
+                arrays[name].append(code)
+            arrays["tokens_used"].append(int(entry.get("tokens_used") or 0))
+            arrays["success"].append(1 if entry["success"] else 0)
+            arrays["duration_seconds"].append(float(entry.get("duration_seconds") or 0.0))
+
+        if np is not None:
+            arrays = {name: np.frombuffer(arrays[name].tobytes(), dtype=NUMPY_TYPES[code]).copy()
+                      for name, code in COLUMNS}
+        return cls(arrays, dictionaries)
+
+    @classmethod
+    def concat(cls, tables: List["ColumnTable"]) -> "ColumnTable":
+        """Concatenate tables, re-coding dictionary columns to a shared dictionary."""
+        dictionaries = {name: [] for name in DICTIONARY_COLUMNS}
+        codes = {name: {} for name in DICTIONARY_COLUMNS}
+        parts = {name: [] for name, _ in COLUMNS}
+
+        for table in tables:
+            for name, _ in COLUMNS:
+                column = table.columns[name]
+                if name in DICTIONARY_COLUMNS:
+                    remap = []
+                    for value in table.dictionaries[name]:
+                        if value not in codes[name]:
+                            codes[name][value] = len(dictionaries[name])
+                            dictionaries[name].append(value)
+                        remap.append(codes[name][value])
+                    if np is not None:
+                        column = np.asarray(remap, dtype=NUMPY_TYPES["H"])[column] if remap else column
+                    else:
+                        column = array("H", (remap[c] for c in column))
+                parts[name].append(column)
+
+        columns = {}
+        for name, code in COLUMNS:
+            if np is not None:
+                columns[name] = (np.concatenate(parts[name]) if parts[name]
+                                 else np.empty(0, dtype=NUMPY_TYPES[code]))
+            else:
+                merged = array(code)
+                for part in parts[name]:
+                    merged.extend(part)
+                columns[name] = merged
+        return cls(columns, dictionaries)
+
+    def since(self, epoch_seconds: float) -> "ColumnTable":
+        """Rows with ts >= epoch_seconds."""
+        if np is not None:
+            mask = self.columns["ts"] >= epoch_seconds
+            return ColumnTable({name: col[mask] for name, col in self.columns.items()}, self.dictionaries)
+        keep = [i for i, ts in enumerate(self.columns["ts"]) if ts >= epoch_seconds]
+        return ColumnTable({name: array(code, (self.columns[name][i] for i in keep))
+                            for name, code in COLUMNS}, self.dictionaries)
+
+
+def write_columns(path: str, table: ColumnTable, source: Optional[Dict] = None):
+    """
+    Write a table to a columnar file.
+
+    Layout: MAGIC, a 4-byte little-endian header length, a JSON header with
+    row count, dictionaries, column types and byte offsets, then each column
+    as raw little-endian values.
+
+    Args:
+        path: Output file, replaced atomically
+        table: Columns to write
+        source: Description of the source file (used to detect staleness)
+    """
+    blobs = []
+    layout = []
+    offset = 0
+    for name, code in COLUMNS:
+        column = table.columns[name]
+        if np is not None:
+            blob = np.ascontiguousarray(column, dtype=NUMPY_TYPES[code]).tobytes()
+        else:
+            column = array(code, column)
+            if sys.byteorder != 'little':
+                column.byteswap()
+            blob = column.tobytes()
+        layout.append({"name": name, "type": code, "offset": offset, "length": len(blob)})
+        blobs.append(blob)
+        offset += len(blob)
+
+    header = json.dumps({
+        "rows": len(table),
+        "columns": layout,
+        "dictionaries": table.dictionaries,
+        "source": source or {},
+    }).encode('utf-8')
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def read_header(path: str) -> Dict:
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a usage column file")
+        (length,) = struct.unpack('<I', f.read(4))
+        return json.loads(f.read(length))
+
+
+def read_columns(path: str) -> ColumnTable:
+    """Load a columnar file written by write_columns."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a usage column file")
+    (length,) = struct.unpack_from('<I', data, len(MAGIC))
+    body = len(MAGIC) + 4 + length
+    header = json.loads(data[len(MAGIC) + 4:body])
+
+    columns = {}
+    for column in header["columns"]:
+        start = body + column["offset"]
+        blob = data[start:start + column["length"]]
+        if np is not None:
+            columns[column["name"]] = np.frombuffer(blob, dtype=NUMPY_TYPES[column["type"]])
+        else:
+            values = array(column["type"])
+            values.frombytes(blob)
+            if sys.byteorder != 'little':
+                values.byteswap()
+            columns[column["name"]] = values
+    return ColumnTable(columns, header["dictionaries"])
+
+
+def _percentile(sorted_values: Sequence[float], percent: float) -> float:
+    """Linear-interpolated percentile of pre-sorted values (numpy's default)."""
+    if not len(sorted_values):
+        return 0.0
+    rank = (len(sorted_values) - 1) * percent / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def duration_percentiles(
+    table: ColumnTable,
+    percentiles: Tuple[float, ...] = (50, 95)
+) -> List[Tuple]:
+    """
+    Duration percentiles per task_type and model.
+
+    Returns:
+        (task_type, model, count, *percentile values) rows, busiest first
+    """
+    tasks = table.dictionaries["task_type"]
+    models = table.dictionaries["model"]
+    rows = []
+
+    if np is not None:
+        key = table.columns["task_type"].astype(np.int64) * max(len(models), 1) + table.columns["model"]
+        # A stable sort on a 16-bit key is a radix sort; each group's
+        # percentiles then use np.percentile's linear-time partitioning
+        if len(tasks) * max(len(models), 1) <= 0xFFFF:
+            key = key.astype(np.uint16)
+        order = np.argsort(key, kind='stable')
+        keys = key[order]
+        durations = table.columns["duration_seconds"][order]
+        bounds = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(keys)]))
+        for start, end in zip(starts, ends):
+            if start == end:
+                continue
+            group = int(keys[start])
+            values = [float(v) for v in np.percentile(durations[start:end], percentiles)]
+            rows.append((tasks[group // max(len(models), 1)], models[group % max(len(models), 1)],
+                         int(end - start), *values))
+    else:
+        groups = {}
+        for task, model, duration in zip(table.columns["task_type"], table.columns["model"],
+                                         table.columns["duration_seconds"]):
+            groups.setdefault((task, model), []).append(duration)
+        for (task, model), values in groups.items():
+            values.sort()
+            rows.append((tasks[task], models[model], len(values),
+                         *[_percentile(values, p) for p in percentiles]))
+
+    return sorted(rows, key=lambda row: -row[2])
+
+
+def tokens_per_day(table: ColumnTable) -> List[Tuple[str, int, int]]:
+    """(day, tokens, requests) rows in day order."""
+    if not len(table):
+        return []
+    if np is not None:
+        days = (table.columns["ts"] // 86400).astype(np.int64)
+        first = int(days.min())
+        offsets = days - first
+        tokens = np.bincount(offsets, weights=table.columns["tokens_used"])
+        counts = np.bincount(offsets)
+        return [(_day((first + i) * 86400), int(tokens[i]), int(counts[i]))
+                for i in np.flatnonzero(counts)]
+
+    totals = {}
+    for ts, tokens in zip(table.columns["ts"], table.columns["tokens_used"]):
+        day = int(ts // 86400)
+        current = totals.setdefault(day, [0, 0])
+        current[0] += tokens
+        current[1] += 1
+    return [(_day(day * 86400), tokens, count) for day, (tokens, count) in sorted(totals.items())]
+
+
+def success_trend(table: ColumnTable, bucket_days: int = 1) -> List[Tuple[str, int, float]]:
+    """(bucket start day, requests, success rate) rows in time order."""
+    if not len(table):
+        return []
+    width = 86400 * bucket_days
+    if np is not None:
+        buckets = (table.columns["ts"] // width).astype(np.int64)
+        first = int(buckets.min())
+        offsets = buckets - first
+        counts = np.bincount(offsets)
+        successes = np.bincount(offsets, weights=table.columns["success"])
+        return [(_day((first + i) * width), int(counts[i]), float(successes[i] / counts[i]))
+                for i in np.flatnonzero(counts)]
+
+    totals = {}
+    for ts, success in zip(table.columns["ts"], table.columns["success"]):
+        current = totals.setdefault(int(ts // width), [0, 0])
+        current[0] += 1
+        current[1] += success
+    return [(_day(bucket * width), count, succeeded / count)
+            for bucket, (count, succeeded) in sorted(totals.items())]
@@ -1,16 +1,36 @@
 """Track and analyze model usage for optimization."""
 
+import gzip
 import json
-from datetime import datetime, timedelta
+import os
+from datetime import datetime, timedelta, timezone
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .cost_ledger import MODEL_PRICING, CostLedger, compute_cost, get_ledger
+from .learned_router import routing_context
+from .metrics_sink import get_sink
+from .model_router import ModelType
+from .partitioned_log import PartitionedLog
+from .usage_columns import ColumnTable, _percentile, read_columns, read_header, write_columns
+
+# Bump when the rollup layout changes so old rollups are rebuilt
+ROLLUP_VERSION = 3
 
 
 class UsageTracker:
     """Track model usage and provide insights."""
 
-    def __init__(self, log_path: str = './usage_metrics.jsonl'):
+    def __init__(self, log_path: str = './usage_metrics.jsonl', ledger: Optional[CostLedger] = None):
         self.log_path = log_path
+        self.log = PartitionedLog(log_path)
+        # Budgets apply across agents, so trackers share the process ledger
+        self.ledger = ledger or get_ledger()
+
+        # Budgets need this period's spend; the first tracker reads it once
+        if self.ledger.has_budgets() and not self.ledger.seeded:
+            self.ledger.seed(self.iter_usage(since=self.ledger.period_start()))
 
     def log_usage(
         self,
@@ -18,9 +38,37 @@ class UsageTracker:
         task_type: str,
         tokens_used: int,
         success: bool,
-        duration_seconds: float
+        duration_seconds: float,
+        usage: Optional[Dict[str, int]] = None,
+        agent: Optional[str] = None,
+        project: Optional[str] = None,
+        description: Optional[str] = None,
+        context: Optional[Dict] = None,
+        cache_hit: bool = False,
+        attempt: Optional[Dict] = None,
+        stream: Optional[Dict] = None
     ):
-        """Log usage metrics."""
+        """
+        Log usage metrics and add the request's cost to the ledger.
+
+        Args:
+            usage: input/output/cache token counts, see cost_ledger.extract_usage
+            agent: Agent that made the request, for per-agent budgets
+            project: Project the request belongs to, for per-project budgets
+            description: Task description, kept (truncated) as training
+                data for cdc-train-router
+            context: Routing context; its score-relevant flags are kept
+            cache_hit: The response came from the response cache
+            attempt: Request id, attempt number, hedge flag, outcome and
+                elapsed request time when a task took several attempts
+            stream: Time to first token, tokens per second, output tokens
+                and chunk count of a streamed response
+        """
+        usage = usage or {}
+        if not tokens_used:
+            tokens_used = sum(usage.values())
+        cost = compute_cost(model, usage)
+
         entry = {
             "timestamp": datetime.utcnow().isoformat(),
             "model": model,
@@ -29,60 +77,438 @@ class UsageTracker:
             "success": success,
             "duration_seconds": duration_seconds
         }
+        entry.update(usage)
+        entry["cost_usd"] = round(cost, 6)
+        if agent:
+            entry["agent"] = agent
+        if project:
+            entry["project"] = project
+        if description:
+            entry["description"] = description[:100]
+        context = routing_context(context)
+        if context:
+            entry["context"] = context
+        if cache_hit:
+            entry["cache_hit"] = True
+        if attempt:
+            entry["attempt"] = attempt
+        if stream:
+            entry["stream"] = stream
 
-        with open(self.log_path, 'a') as f:
-            f.write(json.dumps(entry) + '\n')
+        self.ledger.record(model, cost, agent, project, entry["timestamp"])
 
-    def analyze_usage(self, days: int = 7) -> Dict:
-        """Analyze recent usage patterns."""
-        cutoff = datetime.utcnow() - timedelta(days=days)
+        # Buffered and written in batches to the daily partition,
+        # e.g. usage_metrics.2025-01-31.jsonl
+        get_sink().write(self.log, entry)
 
-        stats = {
-            "opus": {"count": 0, "tokens": 0, "success_rate": 0},
-            "sonnet": {"count": 0, "tokens": 0, "success_rate": 0},
-            "task_distribution": defaultdict(lambda: {"opus": 0, "sonnet": 0}),
-            "potential_savings": 0
-        }
+    def get_rollup_path(self) -> str:
+        """Path of the persisted rollups kept next to the usage log."""
+        return self.log_path + '.rollup.json'
 
-        opus_successes = []
-        sonnet_successes = []
+    def _load_rollups(self) -> Dict:
+        try:
+            with open(self.get_rollup_path(), 'r') as f:
+                rollups = json.load(f)
+            if rollups.get("version") == ROLLUP_VERSION:
+                return rollups
+        except (OSError, ValueError):
+            pass
+        return {"version": ROLLUP_VERSION, "checkpoint": {}, "rollups": {}}
 
-        with open(self.log_path, 'r') as f:
-            for line in f:
+    def _save_rollups(self, rollups: Dict):
+        path = self.get_rollup_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(rollups, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            # Rollups are a cache; the next run simply re-reads more of the log
+            pass
+
+    @staticmethod
+    def _fold(table: Dict, lines):
+        """Add usage entries from raw JSON lines into a rollup table."""
+        for line in lines:
+            try:
                 entry = json.loads(line)
-                timestamp = datetime.fromisoformat(entry["timestamp"])
+            except ValueError:
+                continue
+            # Router decisions share the log but carry no outcome
+            if not isinstance(entry, dict) or "success" not in entry:
+                continue
+            # ISO timestamps start with the day, no datetime parsing needed;
+            # skip malformed entries like ColumnTable.from_entries does
+            timestamp = entry.get("timestamp")
+            if not isinstance(timestamp, str) or len(timestamp) < 10:
+                continue
+            key = f"{timestamp[:10]}|{entry.get('model') or 'unknown'}|{entry.get('task_type', 'unknown')}"
+            totals = table.setdefault(key, [0, 0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += entry.get("tokens_used", 0) or 0
+            totals[2] += 1 if entry["success"] else 0
+            totals[3] += entry.get("cost_usd", 0.0) or 0.0
+
+    def _fold_appended(self, path, checkpoint: Dict, table: Dict) -> Tuple[Dict, Dict]:
+        """
+        Fold the complete lines appended to path since its checkpoint.
+
+        Returns:
+            (new checkpoint, table) where table is reset if the file was
+            truncated or replaced
+        """
+        stat = os.stat(path)
+        offset = checkpoint.get("offset", 0)
+        if checkpoint.get("inode") != stat.st_ino or stat.st_size < offset:
+            table, offset = {}, 0
+        if stat.st_size > offset:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                chunk = f.read(stat.st_size - offset)
+            # Stop at the last complete line; a line being written is read next time
+            end = chunk.rfind(b'\n') + 1
+            self._fold(table, chunk[:end].splitlines())
+            offset += end
+        return {"inode": stat.st_ino, "offset": offset}, table
+
+    @staticmethod
+    def _retire(sources: Dict, day: str):
+        """Move a day's totals to its "day|compacted" source."""
+        retired = sources.setdefault(f"{day}|compacted", {})
+        for key, values in sources.pop(day).items():
+            totals = retired.setdefault(key, [0, 0, 0, 0.0])
+            for i, value in enumerate(values):
+                totals[i] += value
+
+    def refresh_rollups(self) -> Dict:
+        """
+        Fold usage entries appended since the last run into the rollups.
+
+        Rollups are keyed by (day, model, task_type) and hold count, tokens,
+        successes and cost. They are kept per source: the pre-partitioning log
+        file and each daily partition. The checkpoint records each file's
+        inode and the byte offset of the last complete line read, so each
+        call only parses new lines. Archived days are only read when their
+        partitions were compacted before being rolled up. A partition that
+        reappears after its day was compacted (late lines) is added to the
+        day's earlier totals, kept under "day|compacted".
+
+        Returns:
+            Dict mapping "day|model|task_type" to [count, tokens, successes, cost]
+        """
+        # Make entries still sitting in the buffer visible to the analysis
+        get_sink().flush()
+
+        rollups = self._load_rollups()
+        checkpoint = rollups["checkpoint"]
+        sources = rollups["rollups"]
+        partitions = self.log.partitions()
+        archives = self.log.archives()
+        if not (self.log.log_path.exists() or partitions or archives):
+            raise FileNotFoundError(self.log_path)
+
+        if self.log.log_path.exists():
+            checkpoint["legacy"], sources["legacy"] = self._fold_appended(
+                self.log.log_path, checkpoint.get("legacy", {}), sources.get("legacy", {}))
+
+        day_checkpoints = checkpoint.setdefault("days", {})
+        for day, path in partitions:
+            try:
+                inode = path.stat().st_ino
+                day_checkpoint = day_checkpoints.get(day, {})
+                if day_checkpoint.get("inode") != inode and sources.get(day):
+                    # A new partition for a day that was compacted (or read
+                    # from its archive) holds late lines; its archive is not
+                    # read again, so keep the day's totals and add to them
+                    self._retire(sources, day)
+                    day_checkpoint = {}
+                day_checkpoints[day], sources[day] = self._fold_appended(
+                    path, day_checkpoint, sources.get(day, {}))
+            except FileNotFoundError:
+                continue  # Compacted since listing; its days are in an archive
+
+        seen_archives = set(checkpoint.get("archives", []))
+        for month, path in archives:
+            if path.name in seen_archives:
+                continue
+            archived = {}
+            with gzip.open(path, 'rb') as f:
+                self._fold(archived, f)
+            archived_days = set()
+            for key, totals in archived.items():
+                day = key[:10]
+                if day in day_checkpoints:
+                    continue  # Rolled up from its partition before compaction
+                sources.setdefault(day, {})[key] = totals
+                archived_days.add(day)
+            for day in archived_days:
+                day_checkpoints[day] = {"archived": True}
+            seen_archives.add(path.name)
+        checkpoint["archives"] = sorted(seen_archives)
+
+        self._save_rollups(rollups)
+
+        merged = {}
+        for table in sources.values():
+            for key, values in table.items():
+                totals = merged.setdefault(key, [0, 0, 0, 0.0])
+                for i, value in enumerate(values):
+                    totals[i] += value
+        return merged
+
+    def iter_usage(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Iterator[Dict]:
+        """Yield usage entries (not router decisions) logged in [since, until)."""
+        get_sink().flush()
+        for entry in self.log.iter_entries(since, until):
+            if "success" in entry:
+                yield entry
+
+    def compact(self, older_than_days: int = 7, retain_days: Optional[int] = None) -> Dict[str, int]:
+        """
+        Merge old daily partitions into monthly gzip archives.
+
+        Rollups are refreshed first so compacted days are already counted.
+        """
+        try:
+            self.refresh_rollups()
+        except FileNotFoundError:
+            pass
+        summary = self.log.compact(older_than_days, retain_days)
+        summary["columns"] = self.build_columns()
+        return summary
+
+    def columns_path(self, name: str) -> Path:
+        """Columnar file for an archive month, or 'legacy' for the pre-partitioning log."""
+        return self.log.directory / f"{self.log.stem}.{name}.cols"
 
-                if timestamp < cutoff:
-                    continue
+    @staticmethod
+    def _source_signature(path: Path) -> Dict:
+        stat = path.stat()
+        return {"name": path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
 
-                model_key = "opus" if "opus" in entry["model"] else "sonnet"
-                stats[model_key]["count"] += 1
-                stats[model_key]["tokens"] += entry.get("tokens_used", 0)
+    def _columns_current(self, columns_path: Path, signature: Dict) -> bool:
+        try:
+            return read_header(str(columns_path)).get("source") == signature
+        except (OSError, ValueError):
+            return False
 
-                if model_key == "opus":
-                    opus_successes.append(entry["success"])
-                else:
-                    sonnet_successes.append(entry["success"])
+    def build_columns(self) -> int:
+        """
+        Convert monthly archives and the pre-partitioning log to columnar files.
 
-                task = entry.get("task_type", "unknown")
-                stats["task_distribution"][task][model_key] += 1
+        Files are only rebuilt when their source changed, and columns whose
+        archive was removed by retention are deleted.
+
+        Returns:
+            Number of columnar files written
+        """
+        built = 0
+        sources = [(month, path) for month, path in self.log.archives()]
+        if self.log.log_path.exists():
+            sources.append(("legacy", self.log.log_path))
+
+        for name, path in sources:
+            columns_path = self.columns_path(name)
+            signature = self._source_signature(path)
+            if self._columns_current(columns_path, signature):
+                continue
+            opener = gzip.open if path.name.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                table = ColumnTable.from_entries(
+                    entry for entry in (self._parse(line) for line in f) if entry)
+            write_columns(str(columns_path), table, signature)
+            built += 1
+
+        current = {self.columns_path(name).name for name, _ in sources}
+        for path in self.log.directory.glob(f"{self.log.stem}.*.cols"):
+            if path.name not in current:
+                path.unlink()
+        return built
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[Dict]:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def load_columns(self, days: Optional[int] = None) -> ColumnTable:
+        """
+        Load usage for the last `days` days (all history if None) as columns.
+
+        Compacted months and the pre-partitioning log come from their
+        columnar files; recent daily partitions are parsed from JSON.
+        A source without an up-to-date columnar file is parsed directly.
+        """
+        get_sink().flush()
+        since = datetime.utcnow() - timedelta(days=days) if days is not None else None
+        since_month = since.strftime('%Y-%m') if since else ""
+
+        tables = []
+        fallback_sources = []
+        sources = [(month, path) for month, path in self.log.archives() if month >= since_month]
+        if self.log.log_path.exists():
+            sources.append(("legacy", self.log.log_path))
+        for name, path in sources:
+            columns_path = self.columns_path(name)
+            if self._columns_current(columns_path, self._source_signature(path)):
+                tables.append(read_columns(str(columns_path)))
+            else:
+                fallback_sources.append(path)
+
+        recent = self.log.iter_entries(since, include_legacy=False, include_archives=False)
+        tables.append(ColumnTable.from_entries(recent))
+        for path in fallback_sources:
+            opener = gzip.open if path.name.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                tables.append(ColumnTable.from_entries(
+                    entry for entry in (self._parse(line) for line in f) if entry))
+
+        table = ColumnTable.concat(tables)
+        if since is not None:
+            table = table.since(since.replace(tzinfo=timezone.utc).timestamp())
+        return table
+
+    def analyze_usage(self, days: int = 7) -> Dict:
+        """
+        Analyze recent usage patterns from the incremental rollups.
+
+        The window is day-aligned: it covers the UTC day `days` ago through
+        today.
+        """
+        cutoff_day = (datetime.utcnow() - timedelta(days=days)).strftime('%Y-%m-%d')
+
+        stats = {
+            "opus": {"count": 0, "tokens": 0, "success_rate": 0, "cost": 0.0},
+            "sonnet": {"count": 0, "tokens": 0, "success_rate": 0, "cost": 0.0},
+            "task_distribution": defaultdict(lambda: {"opus": 0, "sonnet": 0}),
+            "potential_savings": 0,
+            "potential_savings_usd": 0.0
+        }
+        successes = {"opus": 0, "sonnet": 0}
+        opus_task_cost = defaultdict(float)
+
+        for key, (count, tokens, succeeded, cost) in self.refresh_rollups().items():
+            day, model, task = key.split('|', 2)
+            if day < cutoff_day:
+                continue
+
+            model_key = "opus" if "opus" in model else "sonnet"
+            stats[model_key]["count"] += count
+            stats[model_key]["tokens"] += tokens
+            stats[model_key]["cost"] += cost
+            successes[model_key] += succeeded
+            if model_key == "opus":
+                opus_task_cost[task] += cost
+            stats["task_distribution"][task][model_key] += count
 
         # Calculate success rates
-        if opus_successes:
-            stats["opus"]["success_rate"] = sum(opus_successes) / len(opus_successes)
-        if sonnet_successes:
-            stats["sonnet"]["success_rate"] = sum(sonnet_successes) / len(sonnet_successes)
+        for model_key in ("opus", "sonnet"):
+            if stats[model_key]["count"]:
+                stats[model_key]["success_rate"] = successes[model_key] / stats[model_key]["count"]
 
         # Identify optimization opportunities
+        sonnet_ratio = MODEL_PRICING[ModelType.SONNET]["input"] / MODEL_PRICING[ModelType.OPUS]["input"]
         for task, counts in stats["task_distribution"].items():
             if counts["opus"] > counts["sonnet"] and task in ["log_analysis", "generate_summary", "file_operation"]:
                 stats["potential_savings"] += counts["opus"]
+                stats["potential_savings_usd"] += opus_task_cost[task] * (1 - sonnet_ratio)
 
         return stats
 
-    def get_recommendations(self) -> List[str]:
-        """Get recommendations for model usage optimization."""
-        stats = self.analyze_usage()
+    def request_latency(self, days: int = 7) -> Dict[str, Dict]:
+        """
+        End-to-end latency and retry behaviour per task type.
+
+        Groups attempt entries by request. A request's latency is the
+        request_elapsed of its first successful attempt, so hedging and
+        timeouts show up as a lower p95 than the attempts themselves.
+
+        Returns:
+            task_type -> requests, failed, p50, p95, attempts_per_request,
+            hedged and escalated (shares of requests)
+        """
+        requests = {}
+        for entry in self.iter_usage(since=datetime.utcnow() - timedelta(days=days)):
+            attempt = entry.get("attempt")
+            if not attempt:
+                continue
+            request = requests.setdefault(attempt["request"], {
+                "task_type": entry.get("task_type", ""), "latency": None, "attempts": 0,
+                "hedged": False, "models": set()})
+            request["attempts"] += 1
+            request["hedged"] |= bool(attempt.get("hedge"))
+            request["models"].add(entry.get("model"))
+            if attempt.get("outcome") == "ok":
+                elapsed = attempt.get("request_elapsed", entry.get("duration_seconds", 0.0))
+                if request["latency"] is None or elapsed < request["latency"]:
+                    request["latency"] = elapsed
+
+        by_task = defaultdict(list)
+        for request in requests.values():
+            by_task[request["task_type"]].append(request)
+
+        report = {}
+        for task, items in sorted(by_task.items()):
+            latencies = sorted(r["latency"] for r in items if r["latency"] is not None)
+            report[task] = {
+                "requests": len(items),
+                "failed": len(items) - len(latencies),
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "attempts_per_request": sum(r["attempts"] for r in items) / len(items),
+                "hedged": sum(r["hedged"] for r in items) / len(items),
+                "escalated": sum(len(r["models"]) > 1 and not r["hedged"] for r in items) / len(items),
+            }
+        return report
+
+    def stream_latency(self, days: int = 7) -> Dict[Tuple[str, str], Dict]:
+        """
+        Time to first token and throughput of successful streamed responses.
+
+        Returns:
+            (task_type, model) -> streamed, ttft_p50, ttft_p95,
+            tokens_per_second (median, None if no stream reported output
+            tokens) and output_tokens (mean)
+        """
+        groups = defaultdict(lambda: {"ttft": [], "rates": [], "output_tokens": 0})
+        for entry in self.iter_usage(since=datetime.utcnow() - timedelta(days=days)):
+            stream = entry.get("stream")
+            if not stream or not entry["success"]:
+                continue
+            group = groups[(entry.get("task_type", ""), entry.get("model", ""))]
+            group["ttft"].append(stream.get("ttft_seconds", 0.0))
+            if stream.get("tokens_per_second"):
+                group["rates"].append(stream["tokens_per_second"])
+            group["output_tokens"] += stream.get("output_tokens", 0)
+
+        report = {}
+        for key, group in sorted(groups.items()):
+            ttft = sorted(group["ttft"])
+            rates = sorted(group["rates"])
+            report[key] = {
+                "streamed": len(ttft),
+                "ttft_p50": _percentile(ttft, 50),
+                "ttft_p95": _percentile(ttft, 95),
+                "tokens_per_second": _percentile(rates, 50) if rates else None,
+                "output_tokens": group["output_tokens"] / len(ttft),
+            }
+        return report
+
+    def get_recommendations(self, stats: Optional[Dict] = None) -> List[str]:
+        """
+        Get recommendations for model usage optimization.
+
+        Args:
+            stats: Result of analyze_usage() to reuse instead of analyzing again
+        """
+        if stats is None:
+            stats = self.analyze_usage()
         recommendations = []
 
         if stats["potential_savings"] > 10:
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark routing trigger matching.
+
+Generates synthetic descriptions and a synthetic trigger list (single words
+and two-word phrases), then reports descriptions per second for the
+TriggerMatcher and for the substring scan ModelRouter used before it. Both
+are also timed with the built-in triggers only, to show how each scales
+with the trigger count.
+
+Usage:
+- ./bench_routing.py
+- ./bench_routing.py --descriptions 10000 --triggers 1000 --repeat 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to import ai_agents module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+
+from ai_agents.base_agents.model_router import ModelRouter
+from ai_agents.base_agents.trigger_matcher import DEFAULT_FORMS, TriggerMatcher
+
+FILLER = [
+    "add", "a", "the", "for", "to", "in", "update", "fix", "test", "tests",
+    "endpoint", "user", "login", "page", "button", "query", "cache", "service",
+    "api", "flaky", "timeout", "docs", "readme", "config", "typo", "rename",
+    "variable", "function", "class", "module", "redesign", "debugger",
+    "production-ready", "system", "review", "analyze", "architecture",
+]
+
+
+def make_triggers(count, rng):
+    """Built-in triggers plus synthetic words and phrases up to count."""
+    triggers = list(ModelRouter.OPUS_TRIGGERS)
+    while len(triggers) < count:
+        word = f"kw{len(triggers):04d}"
+        triggers.append(f"{word} {rng.choice(FILLER)}" if rng.random() < 0.2 else word)
+    return triggers
+
+
+def make_descriptions(count, triggers, rng):
+    """Descriptions of 8-40 words, about a third containing a trigger."""
+    descriptions = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(8, 40))]
+        if rng.random() < 0.33:
+            words.insert(rng.randrange(len(words)), rng.choice(triggers))
+        descriptions.append(" ".join(words).capitalize())
+    return descriptions
+
+
+def substring_match(triggers):
+    """The scan select_model used before TriggerMatcher."""
+    def match(description):
+        description_lower = description.lower()
+        return any(trigger in description_lower for trigger in triggers)
+    return match
+
+
+def per_second(check, descriptions, repeat):
+    """Return descriptions handled per second."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for description in descriptions:
+            check(description)
+    elapsed = time.perf_counter() - start
+    return repeat * len(descriptions) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark routing trigger matching')
+    parser.add_argument('--descriptions', type=int, default=10000, help='Synthetic descriptions')
+    parser.add_argument('--triggers', type=int, default=1000, help='Synthetic trigger count')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the descriptions')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    triggers = make_triggers(args.triggers, rng)
+    descriptions = make_descriptions(args.descriptions, triggers, rng)
+
+    builtin = list(ModelRouter.OPUS_TRIGGERS)
+    start = time.perf_counter()
+    matcher = TriggerMatcher({t: 4 for t in triggers}, DEFAULT_FORMS)
+    compile_ms = (time.perf_counter() - start) * 1e3
+    small = TriggerMatcher({t: 4 for t in builtin}, DEFAULT_FORMS)
+
+    rows = [
+        ("TriggerMatcher", len(builtin), per_second(small.match, descriptions, args.repeat)),
+        ("TriggerMatcher", len(triggers), per_second(matcher.match, descriptions, args.repeat)),
+        ("substring scan", len(builtin), per_second(substring_match(builtin), descriptions, args.repeat)),
+        ("substring scan", len(triggers), per_second(substring_match(triggers), descriptions, args.repeat)),
+    ]
+    hits = sum(1 for d in descriptions if matcher.match(d))
+
+    print(f"Descriptions: {len(descriptions):,}, {args.repeat} passes, {hits:,} with a trigger")
+    print(f"Compiled {len(triggers):,} triggers in {compile_ms:.1f} ms")
+    print(f"  {'matcher':16} {'triggers':>8} {'desc/s':>12}")
+    for name, count, rate in rows:
+        print(f"  {name:16} {count:>8,} {rate:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,9 +10,11 @@ import argparse
 import json
 import os
 import sys
-import subprocess
 import random
-from pathlib import Path
+
+from utils.log.event_log import append_event
+from utils.daemon.hook_client import dispatch
+from utils.tts.announce_queue import enqueue_announcement
 
 try:
     from dotenv import load_dotenv
@@ -21,42 +23,9 @@ except ImportError:
     pass  # dotenv is optional
 
 
-def get_tts_script_path():
-    """
-    Determine which TTS script to use based on available API keys.
-    Priority order: ElevenLabs > OpenAI > pyttsx3
-    """
-    # Get current script directory and construct utils/tts path
-    script_dir = Path(__file__).parent
-    tts_dir = script_dir / "utils" / "tts"
-    
-    # Check for ElevenLabs API key (highest priority)
-    if os.getenv('ELEVENLABS_API_KEY'):
-        elevenlabs_script = tts_dir / "elevenlabs_tts.py"
-        if elevenlabs_script.exists():
-            return str(elevenlabs_script)
-    
-    # Check for OpenAI API key (second priority)
-    if os.getenv('OPENAI_API_KEY'):
-        openai_script = tts_dir / "openai_tts.py"
-        if openai_script.exists():
-            return str(openai_script)
-    
-    # Fall back to pyttsx3 (no API key required)
-    pyttsx3_script = tts_dir / "pyttsx3_tts.py"
-    if pyttsx3_script.exists():
-        return str(pyttsx3_script)
-    
-    return None
-
-
 def announce_notification():
-    """Announce that the agent needs user input."""
+    """Queue an announcement that the agent needs user input."""
     try:
-        tts_script = get_tts_script_path()
-        if not tts_script:
-            return  # No TTS scripts available
-        
         # Get engineer name if available
         engineer_name = os.getenv('ENGINEER_NAME', '').strip()
         
@@ -66,19 +35,11 @@ def announce_notification():
         else:
             notification_message = "Your agent needs your input"
         
-        # Call the TTS script with the notification message
-        subprocess.run([
-            "uv", "run", tts_script, notification_message
-        ], 
-        capture_output=True,  # Suppress output
-        timeout=10  # 10-second timeout
-        )
+        # The background TTS worker speaks it without holding up the hook
+        enqueue_announcement('notification', notification_message)
         
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
-        # Fail silently if TTS encounters issues
-        pass
     except Exception:
-        # Fail silently for any other errors
+        # Fail silently for any errors
         pass
 
 
@@ -92,28 +53,8 @@ def main():
         # Read JSON input from stdin
         input_data = json.loads(sys.stdin.read())
         
-        # Ensure log directory exists
-        import os
-        log_dir = os.path.join(os.getcwd(), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, 'notification.json')
-        
-        # Read existing log data or initialize empty list
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append event to logs/notification.jsonl
+        append_event('notification', input_data)
         
         # Announce notification via TTS only if --notify flag is set
         # Skip TTS for the generic "Claude is waiting for your input" message
@@ -130,4 +71,5 @@ def main():
         sys.exit(0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Hand the event to the hook daemon when it is running
+    sys.exit(dispatch('notification', main))
\ No newline at end of file
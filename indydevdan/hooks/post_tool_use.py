@@ -4,36 +4,18 @@
 # ///
 
 import json
-import os
 import sys
-from pathlib import Path
+
+from utils.log.event_log import append_event
+from utils.daemon.hook_client import dispatch
 
 def main():
     try:
         # Read JSON input from stdin
         input_data = json.load(sys.stdin)
         
-        # Ensure log directory exists
-        log_dir = Path.cwd() / 'logs'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_path = log_dir / 'post_tool_use.json'
-        
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append event to logs/post_tool_use.jsonl
+        append_event('post_tool_use', input_data)
         
         sys.exit(0)
         
@@ -45,4 +27,5 @@ def main():
         sys.exit(0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Hand the event to the hook daemon when it is running
+    sys.exit(dispatch('post_tool_use', main))
\ No newline at end of file
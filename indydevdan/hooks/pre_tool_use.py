@@ -5,81 +5,17 @@
 
 import json
 import sys
-import re
-from pathlib import Path
 
-def is_dangerous_rm_command(command):
-    """
-    Comprehensive detection of dangerous rm commands.
-    Matches various forms of rm -rf and similar destructive patterns.
-    """
-    # Normalize command by removing extra spaces and converting to lowercase
-    normalized = ' '.join(command.lower().split())
-    
-    # Pattern 1: Standard rm -rf variations
-    patterns = [
-        r'\brm\s+.*-[a-z]*r[a-z]*f',  # rm -rf, rm -fr, rm -Rf, etc.
-        r'\brm\s+.*-[a-z]*f[a-z]*r',  # rm -fr variations
-        r'\brm\s+--recursive\s+--force',  # rm --recursive --force
-        r'\brm\s+--force\s+--recursive',  # rm --force --recursive
-        r'\brm\s+-r\s+.*-f',  # rm -r ... -f
-        r'\brm\s+-f\s+.*-r',  # rm -f ... -r
-    ]
-    
-    # Check for dangerous patterns
-    for pattern in patterns:
-        if re.search(pattern, normalized):
-            return True
-    
-    # Pattern 2: Check for rm with recursive flag targeting dangerous paths
-    dangerous_paths = [
-        r'/',           # Root directory
-        r'/\*',         # Root with wildcard
-        r'~',           # Home directory
-        r'~/',          # Home directory path
-        r'\$HOME',      # Home environment variable
-        r'\.\.',        # Parent directory references
-        r'\*',          # Wildcards in general rm -rf context
-        r'\.',          # Current directory
-        r'\.\s*$',      # Current directory at end of command
-    ]
-    
-    if re.search(r'\brm\s+.*-[a-z]*r', normalized):  # If rm has recursive flag
-        for path in dangerous_paths:
-            if re.search(path, normalized):
-                return True
-    
-    return False
+from utils.log.event_log import append_event
+from utils.daemon.hook_client import dispatch
+from utils.safety.command_scanner import scan_command
+from utils.safety.policy import load_policy
 
-def is_env_file_access(tool_name, tool_input):
-    """
-    Check if any tool is trying to access .env files containing sensitive data.
-    """
-    if tool_name in ['Read', 'Edit', 'MultiEdit', 'Write', 'Bash']:
-        # Check file paths for file-based tools
-        if tool_name in ['Read', 'Edit', 'MultiEdit', 'Write']:
-            file_path = tool_input.get('file_path', '')
-            if '.env' in file_path and not file_path.endswith('.env.sample'):
-                return True
-        
-        # Check bash commands for .env file access
-        elif tool_name == 'Bash':
-            command = tool_input.get('command', '')
-            # Pattern to detect .env file access (but allow .env.sample)
-            env_patterns = [
-                r'\b\.env\b(?!\.sample)',  # .env but not .env.sample
-                r'cat\s+.*\.env\b(?!\.sample)',  # cat .env
-                r'echo\s+.*>\s*\.env\b(?!\.sample)',  # echo > .env
-                r'touch\s+.*\.env\b(?!\.sample)',  # touch .env
-                r'cp\s+.*\.env\b(?!\.sample)',  # cp .env
-                r'mv\s+.*\.env\b(?!\.sample)',  # mv .env
-            ]
-            
-            for pattern in env_patterns:
-                if re.search(pattern, command):
-                    return True
-    
-    return False
+def log_blocked(input_data, rule_id, reason):
+    """Record a blocked tool call so it can be found with cdc-hook-query."""
+    event = dict(input_data)
+    event.update({'decision': 'block', 'rule_id': rule_id, 'reason': reason})
+    append_event('pre_tool_use', event)
 
 def main():
     try:
@@ -89,42 +25,36 @@ def main():
         tool_name = input_data.get('tool_name', '')
         tool_input = input_data.get('tool_input', {})
         
-        # Check for .env file access (blocks access to sensitive environment files)
-        if is_env_file_access(tool_name, tool_input):
-            print("BLOCKED: Access to .env files containing sensitive data is prohibited", file=sys.stderr)
-            print("Use .env.sample for template files instead", file=sys.stderr)
+        # Check tool name, paths and commands against the declarative policy
+        # (blocks access to sensitive files such as .env)
+        try:
+            decision = load_policy().check_tool(tool_name, tool_input)
+        except Exception as e:
+            # A broken policy must not switch off the built-in checks below
+            print(f"policy check failed: {e}", file=sys.stderr)
+            decision = None
+        if decision:
+            log_blocked(input_data, decision.rule_id, decision.message)
+            print(f"BLOCKED: {decision.message}", file=sys.stderr)
+            if decision.hint:
+                print(decision.hint, file=sys.stderr)
             sys.exit(2)  # Exit code 2 blocks tool call and shows error to Claude
         
-        # Check for dangerous rm -rf commands
+        # Check Bash commands for dangerous rm usage and .env access
         if tool_name == 'Bash':
             command = tool_input.get('command', '')
             
-            # Block rm -rf commands with comprehensive pattern matching
-            if is_dangerous_rm_command(command):
-                print("BLOCKED: Dangerous rm command detected and prevented", file=sys.stderr)
+            # One tokenizing pass over the command against command_rules.json
+            finding = scan_command(command)
+            if finding:
+                log_blocked(input_data, finding.rule_id, finding.message)
+                print(f"BLOCKED: {finding.message}", file=sys.stderr)
+                if finding.hint:
+                    print(finding.hint, file=sys.stderr)
                 sys.exit(2)  # Exit code 2 blocks tool call and shows error to Claude
         
-        # Ensure log directory exists
-        log_dir = Path.cwd() / 'logs'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_path = log_dir / 'pre_tool_use.json'
-        
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append event to logs/pre_tool_use.jsonl
+        append_event('pre_tool_use', input_data)
         
         sys.exit(0)
         
@@ -136,4 +66,5 @@ def main():
         sys.exit(0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Hand the event to the hook daemon when it is running
+    sys.exit(dispatch('pre_tool_use', main))
\ No newline at end of file
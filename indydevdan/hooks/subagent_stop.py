@@ -10,9 +10,11 @@ import argparse
 import json
 import os
 import sys
-import subprocess
-from pathlib import Path
-from datetime import datetime
+
+from utils.log.event_log import append_event, get_log_dir
+from utils.log.transcript_export import export_transcript
+from utils.daemon.hook_client import dispatch
+from utils.tts.announce_queue import enqueue_announcement
 
 try:
     from dotenv import load_dotenv
@@ -21,58 +23,14 @@ except ImportError:
     pass  # dotenv is optional
 
 
-def get_tts_script_path():
-    """
-    Determine which TTS script to use based on available API keys.
-    Priority order: ElevenLabs > OpenAI > pyttsx3
-    """
-    # Get current script directory and construct utils/tts path
-    script_dir = Path(__file__).parent
-    tts_dir = script_dir / "utils" / "tts"
-    
-    # Check for ElevenLabs API key (highest priority)
-    if os.getenv('ELEVENLABS_API_KEY'):
-        elevenlabs_script = tts_dir / "elevenlabs_tts.py"
-        if elevenlabs_script.exists():
-            return str(elevenlabs_script)
-    
-    # Check for OpenAI API key (second priority)
-    if os.getenv('OPENAI_API_KEY'):
-        openai_script = tts_dir / "openai_tts.py"
-        if openai_script.exists():
-            return str(openai_script)
-    
-    # Fall back to pyttsx3 (no API key required)
-    pyttsx3_script = tts_dir / "pyttsx3_tts.py"
-    if pyttsx3_script.exists():
-        return str(pyttsx3_script)
-    
-    return None
-
-
 def announce_subagent_completion():
-    """Announce subagent completion using the best available TTS service."""
+    """Queue a subagent announcement; bursts are merged by the TTS worker."""
     try:
-        tts_script = get_tts_script_path()
-        if not tts_script:
-            return  # No TTS scripts available
-        
         # Use fixed message for subagent completion
-        completion_message = "Subagent Complete"
-        
-        # Call the TTS script with the completion message
-        subprocess.run([
-            "uv", "run", tts_script, completion_message
-        ], 
-        capture_output=True,  # Suppress output
-        timeout=10  # 10-second timeout
-        )
-        
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
-        # Fail silently if TTS encounters issues
-        pass
+        enqueue_announcement('subagent', "Subagent Complete")
+
     except Exception:
-        # Fail silently for any other errors
+        # Fail silently for any errors
         pass
 
 
@@ -80,7 +38,7 @@ def main():
     try:
         # Parse command line arguments
         parser = argparse.ArgumentParser()
-        parser.add_argument('--chat', action='store_true', help='Copy transcript to chat.json')
+        parser.add_argument('--chat', action='store_true', help='Export transcript to logs/chat/')
         args = parser.parse_args()
         
         # Read JSON input from stdin
@@ -90,48 +48,17 @@ def main():
         session_id = input_data.get("session_id", "")
         stop_hook_active = input_data.get("stop_hook_active", False)
 
-        # Ensure log directory exists
-        log_dir = os.path.join(os.getcwd(), "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_path = os.path.join(log_dir, "subagent_stop.json")
-
-        # Read existing log data or initialize empty list
-        if os.path.exists(log_path):
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        # Append event to logs/subagent_stop.jsonl
+        log_dir = str(get_log_dir())
+        append_event('subagent_stop', input_data)
         
         # Handle --chat switch (same as stop.py)
         if args.chat and 'transcript_path' in input_data:
             transcript_path = input_data['transcript_path']
             if os.path.exists(transcript_path):
-                # Read .jsonl file and convert to JSON array
-                chat_data = []
                 try:
-                    with open(transcript_path, 'r') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                try:
-                                    chat_data.append(json.loads(line))
-                                except json.JSONDecodeError:
-                                    pass  # Skip invalid lines
-                    
-                    # Write to logs/chat.json
-                    chat_file = os.path.join(log_dir, 'chat.json')
-                    with open(chat_file, 'w') as f:
-                        json.dump(chat_data, f, indent=2)
+                    # Only records added since the last stop are exported
+                    export_transcript(transcript_path, log_dir)
                 except Exception:
                     pass  # Fail silently
 
@@ -149,4 +76,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Hand the event to the hook daemon when it is running
+    sys.exit(dispatch("subagent_stop", main))
\ No newline at end of file
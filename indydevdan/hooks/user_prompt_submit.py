@@ -10,9 +10,12 @@ import argparse
 import json
 import os
 import sys
-from pathlib import Path
 from datetime import datetime
 
+from utils.log.event_log import append_event
+from utils.daemon.hook_client import dispatch
+from utils.safety.policy import load_policy
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -22,45 +25,24 @@ except ImportError:
 
 def log_user_prompt(session_id, input_data):
     """Log user prompt to logs directory."""
-    # Ensure logs directory exists
-    log_dir = Path("logs")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_file = log_dir / 'user_prompt_submit.json'
-    
-    # Read existing log data or initialize empty list
-    if log_file.exists():
-        with open(log_file, 'r') as f:
-            try:
-                log_data = json.load(f)
-            except (json.JSONDecodeError, ValueError):
-                log_data = []
-    else:
-        log_data = []
-    
-    # Append the entire input data
-    log_data.append(input_data)
-    
-    # Write back to file with formatting
-    with open(log_file, 'w') as f:
-        json.dump(log_data, f, indent=2)
+    # Append the entire input data to logs/user_prompt_submit.jsonl
+    append_event('user_prompt_submit', input_data)
 
 
 def validate_prompt(prompt):
     """
-    Validate the user prompt for security or policy violations.
+    Validate the user prompt against the prompt rules in the hook policy.
     Returns tuple (is_valid, reason).
     """
-    # Example validation rules (customize as needed)
-    blocked_patterns = [
-        # Add any patterns you want to block
-        # Example: ('rm -rf /', 'Dangerous command detected'),
-    ]
-    
-    prompt_lower = prompt.lower()
-    
-    for pattern, reason in blocked_patterns:
-        if pattern.lower() in prompt_lower:
-            return False, reason
+    # Rules live in utils/safety/policy.json (or HOOK_POLICY)
+    try:
+        decision = load_policy().check_prompt(prompt)
+    except Exception as e:
+        # Still log the prompt when the policy cannot be evaluated
+        print(f"policy check failed: {e}", file=sys.stderr)
+        return True, None
+    if decision:
+        return False, decision.message
     
     return True, None
 
@@ -82,16 +64,20 @@ def main():
         session_id = input_data.get('session_id', 'unknown')
         prompt = input_data.get('prompt', '')
         
-        # Log the user prompt
-        log_user_prompt(session_id, input_data)
-        
         # Validate prompt if requested and not in log-only mode
+        is_valid, reason = True, None
         if args.validate and not args.log_only:
             is_valid, reason = validate_prompt(prompt)
-            if not is_valid:
-                # Exit code 2 blocks the prompt with error message
-                print(f"Prompt blocked: {reason}", file=sys.stderr)
-                sys.exit(2)
+        
+        # Log the user prompt, recording blocked prompts with the reason
+        if not is_valid:
+            input_data = dict(input_data, decision='block', reason=reason)
+        log_user_prompt(session_id, input_data)
+        
+        if not is_valid:
+            # Exit code 2 blocks the prompt with error message
+            print(f"Prompt blocked: {reason}", file=sys.stderr)
+            sys.exit(2)
         
         # Add context information (optional)
         # You can print additional context that will be added to the prompt
@@ -109,4 +95,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Hand the event to the hook daemon when it is running
+    sys.exit(dispatch('user_prompt_submit', main))
\ No newline at end of file
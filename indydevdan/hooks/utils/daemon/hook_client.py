@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+"""
+Tiny client for the persistent hook daemon.
+
+Forwards a hook's stdin, argv, cwd and environment to logs/hook_daemon.sock
+and relays the daemon's stdout, stderr and exit code. If the daemon is not
+running the hook runs without it, so hooks work the same either way.
+
+Standard library only, and imports nothing from the hooks, so
+.claude/settings.json (see settings.json next to hooks/) runs it with plain
+python3 and a hook event costs one interpreter start and a socket round trip:
+
+    python3 .claude/hooks/utils/daemon/hook_client.py stop --chat
+
+Without a daemon the client execs the hook script itself, through its
+`uv run --script` shebang. Start the daemon with
+`.claude/hooks/utils/daemon/hook_daemon.py start`; set HOOK_DAEMON=off to
+always run hooks without it.
+"""
+
+import importlib.util
+import json
+import os
+import shutil
+import socket
+import sys
+from pathlib import Path
+
+HOOK_NAMES = [
+    'pre_tool_use',
+    'post_tool_use',
+    'notification',
+    'stop',
+    'subagent_stop',
+    'user_prompt_submit',
+]
+
+# Connecting to a live daemon is sub-millisecond, so keep this short
+CONNECT_TIMEOUT = 0.05
+RESPONSE_TIMEOUT = 30.0
+
+
+def get_socket_path():
+    """Return the daemon socket path under the project's logs/ directory."""
+    log_dir = Path.cwd() / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    return log_dir / 'hook_daemon.sock'
+
+
+def connect_to_daemon():
+    """
+    Connect to the daemon's socket.
+
+    Returns:
+        socket or None: A connected socket, or None if the daemon is
+        disabled or not running (stdin has not been read yet)
+    """
+    if os.getenv('HOOK_DAEMON', '').strip().lower() in ('off', '0', 'false'):
+        return None
+
+    socket_path = get_socket_path()
+    if not socket_path.exists():
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None  # Stale socket or daemon down, safe to run without it
+    return sock
+
+
+def forward_to_daemon(sock, hook, argv, stdin_data):
+    """
+    Send one hook event over a connected socket.
+
+    Returns:
+        dict: The daemon response. From here the daemon owns the event, so
+        errors are reported instead of running the hook a second time.
+    """
+    request = {
+        'hook': hook,
+        'argv': argv,
+        'cwd': os.getcwd(),
+        'env': dict(os.environ),
+        'stdin': stdin_data,
+    }
+    sock.settimeout(RESPONSE_TIMEOUT)
+    try:
+        sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        with sock.makefile('rb') as reader:
+            return json.loads(reader.readline())
+    except (OSError, ValueError) as e:
+        return {'exit_code': 0, 'stdout': '', 'stderr': f"Hook daemon error: {e}\n"}
+    finally:
+        sock.close()
+
+
+def dispatch(hook, main, argv=None):
+    """
+    Run a hook through the daemon, falling back to calling main().
+
+    Args:
+        hook (str): Hook name, e.g. 'pre_tool_use'
+        main (callable): The hook's main(), which reads sys.stdin and exits
+        argv (list): Hook arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: Exit code for the hook process
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    sock = connect_to_daemon()
+    if sock is not None:
+        response = forward_to_daemon(sock, hook, argv, sys.stdin.read())
+        sys.stdout.write(response.get('stdout', ''))
+        sys.stderr.write(response.get('stderr', ''))
+        return response.get('exit_code', 0)
+
+    try:
+        main()
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+
+def exec_hook(hook, argv):
+    """
+    Replace this process with the hook script, which brings its own
+    interpreter and dependencies through its shebang. Returns only if the
+    script cannot be executed.
+    """
+    script = Path(__file__).resolve().parents[2] / f'{hook}.py'
+    if shutil.which('uv') is None:
+        return  # The shebang would fail after replacing this process
+    try:
+        os.execv(str(script), [str(script)] + list(argv))
+    except OSError:
+        pass
+
+
+def load_hook_main(hook):
+    """Import a hook script from the hooks directory and return its main()."""
+    hooks_dir = Path(__file__).resolve().parents[2]
+    if str(hooks_dir) not in sys.path:
+        sys.path.insert(0, str(hooks_dir))
+    spec = importlib.util.spec_from_file_location(f'hook_{hook}', hooks_dir / f'{hook}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.main
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in HOOK_NAMES:
+        print(f"Usage: hook_client.py <{'|'.join(HOOK_NAMES)}> [hook args]", file=sys.stderr)
+        sys.exit(0)
+
+    hook = sys.argv[1]
+    hook_argv = sys.argv[2:]
+
+    # Only start the hook script if the daemon can't take the event; import
+    # it here as a last resort, e.g. when uv is not installed
+    def run_in_process():
+        exec_hook(hook, hook_argv)
+        sys.argv = [sys.argv[0]] + hook_argv
+        load_hook_main(hook)()
+
+    sys.exit(dispatch(hook, run_in_process, hook_argv))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "python-dotenv",
+# ]
+# ///
+
+"""
+Persistent hook server for Claude Code hooks.
+
+Keeps one warm interpreter with every hook module already imported and serves
+hook events over a Unix domain socket at logs/hook_daemon.sock, so a hook
+event no longer pays for `uv run` dependency resolution and imports.
+
+Usage:
+- ./hook_daemon.py start                 # Start in the background
+- ./hook_daemon.py start --foreground    # Run attached to the terminal
+- ./hook_daemon.py status
+- ./hook_daemon.py stop
+
+Protocol: the client sends one JSON line
+    {"hook": "stop", "argv": ["--chat"], "cwd": "...", "env": {...}, "stdin": "..."}
+and receives one JSON line
+    {"exit_code": 0, "stdout": "...", "stderr": "..."}
+
+Each connection is served on its own thread. stdin, stdout and stderr are
+per thread; the environment, working directory and argv are per process, so
+events that share them (e.g. parallel tool calls) run together and an event
+with different ones waits until those finish.
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.daemon.hook_client import HOOK_NAMES, get_socket_path
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv is optional
+
+
+class ThreadStream:
+    """A sys.stdin/stdout/stderr stand-in that reads or writes the calling thread's stream."""
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def set(self, stream):
+        self.local.stream = stream
+
+    def __getattr__(self, name):
+        return getattr(getattr(self.local, 'stream', None) or self.default, name)
+
+    def __iter__(self):
+        return iter(getattr(self.local, 'stream', None) or self.default)
+
+
+class ProcessContext:
+    """
+    Environment, working directory and argv shared by the hooks running
+    at once. A hook whose context differs waits until the running ones end.
+    """
+
+    def __init__(self, base_env):
+        self.base_env = base_env
+        self.base_cwd = os.getcwd()
+        self.base_argv = sys.argv
+        self.cond = threading.Condition()
+        self.active = 0
+        self.key = None
+
+    @contextmanager
+    def use(self, cwd, env, argv):
+        key = (cwd, tuple(sorted(env.items())), tuple(argv))
+        with self.cond:
+            while self.active and self.key != key:
+                self.cond.wait()
+            if not self.active:
+                os.environ.clear()
+                os.environ.update(self.base_env)
+                os.environ.update(env)
+                os.chdir(cwd)
+                sys.argv = list(argv)
+                self.key = key
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.active -= 1
+                if not self.active:
+                    os.chdir(self.base_cwd)
+                    os.environ.clear()
+                    os.environ.update(self.base_env)
+                    sys.argv = self.base_argv
+                    self.key = None
+                    self.cond.notify_all()
+
+
+class HookServer:
+    """Serve hook invocations from pre-imported hook modules."""
+
+    def __init__(self, socket_path, idle_timeout=0):
+        self.socket_path = Path(socket_path)
+        self.idle_timeout = idle_timeout
+        self.base_env = dict(os.environ)
+        self.context = ProcessContext(self.base_env)
+        self.modules = {}
+        self.modules_lock = threading.Lock()
+        self.running = False
+        self.active_connections = 0
+        self.connections_lock = threading.Lock()
+
+    def load_hook(self, hook):
+        """Import a hook script once and keep it warm."""
+        with self.modules_lock:
+            if hook not in self.modules:
+                spec = importlib.util.spec_from_file_location(f'hook_{hook}', HOOKS_DIR / f'{hook}.py')
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+                self.modules[hook] = module
+            return self.modules[hook]
+
+    def run_hook(self, request):
+        """
+        Run a hook's main() in-process with the client's stdin, argv, cwd and env.
+
+        Returns:
+            dict: exit_code, stdout and stderr of the hook
+        """
+        hook = request.get('hook')
+        if hook not in HOOK_NAMES:
+            return {'exit_code': 0, 'stdout': '', 'stderr': f"Unknown hook: {hook}"}
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        argv = [str(HOOKS_DIR / f'{hook}.py')] + list(request.get('argv') or [])
+        exit_code = 0
+
+        sys.stdin.set(io.StringIO(request.get('stdin', '')))
+        sys.stdout.set(stdout)
+        sys.stderr.set(stderr)
+        try:
+            module = self.load_hook(hook)
+            with self.context.use(request.get('cwd') or self.context.base_cwd,
+                                  request.get('env') or {}, argv):
+                try:
+                    module.main()
+                except SystemExit as e:
+                    exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+
+        except Exception as e:
+            # Hooks fail open, same as running them directly
+            stderr.write(f"Hook daemon error in {hook}: {e}\n")
+            exit_code = 0
+
+        finally:
+            sys.stdin.set(None)
+            sys.stdout.set(None)
+            sys.stderr.set(None)
+
+        return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+    def handle_connection(self, conn):
+        """Read one request line, run it and send one response line."""
+        try:
+            self.serve_request(conn)
+        except (OSError, ValueError) as e:
+            print(f"Hook daemon request failed: {e}", file=sys.stderr)
+        finally:
+            with self.connections_lock:
+                self.active_connections -= 1
+
+    def serve_request(self, conn):
+        with conn, conn.makefile('rb') as reader:
+            line = reader.readline()
+            if not line:
+                return
+            request = json.loads(line)
+
+            if request.get('command') == 'ping':
+                response = {'pong': True, 'pid': os.getpid(), 'hooks': sorted(self.modules)}
+            elif request.get('command') == 'shutdown':
+                self.running = False
+                response = {'stopping': True}
+            else:
+                response = self.run_hook(request)
+
+            conn.sendall((json.dumps(response) + '\n').encode('utf-8'))
+
+    def serve(self):
+        """Accept connections until shutdown or the idle timeout expires."""
+        # Hooks run on connection threads, each with its own stdio
+        sys.stdin, sys.stdout, sys.stderr = (ThreadStream(sys.stdin), ThreadStream(sys.stdout),
+                                             ThreadStream(sys.stderr))
+
+        # Warm every hook up front so the first event is as fast as the rest
+        for hook in HOOK_NAMES:
+            try:
+                self.load_hook(hook)
+            except Exception as e:
+                print(f"Could not preload {hook}: {e}", file=sys.stderr)
+
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        server.listen(64)
+        server.settimeout(1.0)
+        self.running = True
+        last_activity = time.time()
+
+        try:
+            while self.running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    with self.connections_lock:
+                        busy = self.active_connections > 0
+                    if busy:
+                        last_activity = time.time()
+                    elif self.idle_timeout and time.time() - last_activity > self.idle_timeout:
+                        break
+                    continue
+
+                last_activity = time.time()
+                with self.connections_lock:
+                    self.active_connections += 1
+                threading.Thread(target=self.handle_connection, args=(conn,), daemon=True,
+                                 name='hook-connection').start()
+        finally:
+            server.close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+
+
+def send_command(socket_path, command, timeout=2.0):
+    """Send a control command to a running daemon, or return None if it is down."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall((json.dumps({'command': command}) + '\n').encode('utf-8'))
+            with sock.makefile('rb') as reader:
+                return json.loads(reader.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Persistent Claude Code hook server')
+    parser.add_argument('action', choices=['start', 'stop', 'status'])
+    parser.add_argument('--foreground', action='store_true', help='Do not detach')
+    parser.add_argument('--idle-timeout', type=float, default=0,
+                        help='Exit after this many idle seconds (0 = never)')
+    args = parser.parse_args()
+
+    socket_path = get_socket_path()
+    pid_path = socket_path.with_suffix('.pid')
+
+    if args.action == 'status':
+        status = send_command(socket_path, 'ping')
+        if status:
+            print(f"Hook daemon running (pid {status['pid']}) on {socket_path}")
+        else:
+            print("Hook daemon not running")
+            sys.exit(1)
+
+    elif args.action == 'stop':
+        if send_command(socket_path, 'shutdown'):
+            print("Hook daemon stopping")
+        elif pid_path.exists():
+            try:
+                os.kill(int(pid_path.read_text().strip()), signal.SIGTERM)
+            except (OSError, ValueError):
+                pass
+        if pid_path.exists():
+            pid_path.unlink()
+
+    elif args.action == 'start':
+        if send_command(socket_path, 'ping'):
+            print(f"Hook daemon already running on {socket_path}")
+            return
+
+        if not args.foreground:
+            # Re-launch detached from the terminal and the calling hook
+            cmd = [sys.executable, str(Path(__file__).resolve()), 'start', '--foreground',
+                   '--idle-timeout', str(args.idle_timeout)]
+            subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, start_new_session=True)
+            print(f"Hook daemon starting on {socket_path}")
+            return
+
+        pid_path.write_text(str(os.getpid()))
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            HookServer(socket_path, idle_timeout=args.idle_timeout).serve()
+        finally:
+            if pid_path.exists():
+                pid_path.unlink()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Pre-generated pool of LLM completion messages.
+
+The Stop hook pops a ready-made message from the pool instead of calling an
+LLM on every stop. When the pool runs low a detached refill asks the LLM for
+a whole batch in one request. Personalized messages are stored with a {name}
+placeholder and filled in with ENGINEER_NAME when popped.
+
+The pool lives at HOOK_MESSAGE_POOL (default
+~/.cache/cdc-devtools/completion_messages.json).
+
+Usage:
+- ./message_pool.py --refill      # Fetch a batch now
+- ./message_pool.py --show        # Print the pool
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Without locks concurrent pops may reuse a message
+
+# Messages requested per LLM call
+BATCH_SIZE = 25
+
+# Start a background refill once the pool drops below this
+LOW_WATER_MARK = 5
+
+LLM_DIR = Path(__file__).resolve().parent
+
+
+def get_pool_path():
+    """Return the pool file path, creating its directory if needed."""
+    default = Path.home() / '.cache' / 'cdc-devtools' / 'completion_messages.json'
+    pool_path = Path(os.getenv('HOOK_MESSAGE_POOL', str(default))).expanduser()
+    pool_path.parent.mkdir(parents=True, exist_ok=True)
+    return pool_path
+
+
+@contextmanager
+def _locked(lock_path, blocking=True):
+    """Hold an exclusive flock on lock_path; yields False if it was busy."""
+    fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+        yield True
+    finally:
+        os.close(fd)
+
+
+def _load(pool_path):
+    """Read the pool; a missing or corrupt file is an empty pool."""
+    try:
+        with open(pool_path, 'r') as f:
+            messages = json.load(f).get('messages', [])
+        return [m for m in messages if isinstance(m, str) and m]
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+def _save(pool_path, messages):
+    """Atomically replace the pool file."""
+    tmp_path = pool_path.with_name(f'{pool_path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({'messages': messages}, f)
+    os.replace(tmp_path, pool_path)
+
+
+def render(template, engineer_name):
+    """Fill in the {name} placeholder, or drop it when no name is set."""
+    if '{name}' not in template:
+        return template
+    if engineer_name:
+        return template.replace('{name}', engineer_name)
+    # "{name}, all set!" -> "All set!"
+    text = template.replace('{name}, ', '').replace(', {name}', '').replace('{name}', '').strip()
+    return text[:1].upper() + text[1:]
+
+
+def pop_message(fallback):
+    """
+    Take the next message from the pool.
+
+    Starts a background refill when the pool is low; never waits on the LLM.
+
+    Args:
+        fallback (str): Message to use when the pool is empty
+
+    Returns:
+        str: Completion message ready to speak
+    """
+    pool_path = get_pool_path()
+    with _locked(pool_path.with_suffix('.lock')):
+        messages = _load(pool_path)
+        template = messages.pop() if messages else None
+        if template is not None:
+            _save(pool_path, messages)
+
+    if len(messages) < LOW_WATER_MARK and (os.getenv('OPENAI_API_KEY') or os.getenv('ANTHROPIC_API_KEY')):
+        start_refill()
+
+    if template is None:
+        return fallback
+    return render(template, os.getenv('ENGINEER_NAME', '').strip())
+
+
+def start_refill():
+    """Launch a detached refill process."""
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), '--refill'],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def fetch_batch(count=BATCH_SIZE):
+    """
+    Ask the available LLM helper for a batch of messages.
+    Priority order: OpenAI > Anthropic
+
+    Returns:
+        list: Message templates, empty if no LLM is available
+    """
+    for env_key, script_name in (('OPENAI_API_KEY', 'oai.py'), ('ANTHROPIC_API_KEY', 'anth.py')):
+        script = LLM_DIR / script_name
+        if not os.getenv(env_key) or not script.exists():
+            continue
+        try:
+            result = subprocess.run(
+                ["uv", "run", str(script), "--batch", str(count)],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            if result.returncode == 0:
+                messages = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+                if messages:
+                    return messages
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
+            pass
+    return []
+
+
+def refill(count=BATCH_SIZE):
+    """
+    Top the pool up with one LLM batch; only one refill runs at a time.
+
+    Returns:
+        int: Number of messages added
+    """
+    pool_path = get_pool_path()
+    with _locked(pool_path.with_suffix('.refill.lock'), blocking=False) as acquired:
+        if not acquired:
+            return 0  # Another refill is already in flight
+
+        if len(_load(pool_path)) >= LOW_WATER_MARK:
+            return 0
+
+        batch = fetch_batch(count)
+        random.shuffle(batch)
+        with _locked(pool_path.with_suffix('.lock')):
+            # New messages go to the front; pops come off the end
+            _save(pool_path, batch + _load(pool_path))
+        return len(batch)
+
+
+def main():
+    """Command line interface for managing the pool."""
+    if len(sys.argv) > 1 and sys.argv[1] == '--refill':
+        added = refill()
+        print(f"Added {added} messages to {get_pool_path()}")
+    elif len(sys.argv) > 1 and sys.argv[1] == '--show':
+        for message in _load(get_pool_path()):
+            print(message)
+    else:
+        print("Usage: ./message_pool.py --refill or ./message_pool.py --show")
+
+
+if __name__ == '__main__':
+    main()
@@ -90,6 +90,45 @@ Generate ONE completion message:"""
     return response
 
 
+def generate_completion_messages(count=20):
+    """
+    Generate a batch of completion messages in a single OpenAI request.
+
+    Personalized messages use a literal {name} placeholder so the pool can
+    fill in ENGINEER_NAME later.
+
+    Args:
+        count (int): Number of messages to request
+
+    Returns:
+        list: Completion messages, empty if error
+    """
+    prompt = f"""Generate {count} different short, friendly completion messages for when an AI coding assistant finishes a task.
+
+Requirements:
+- Keep each under 10 words
+- Make them positive and future focused
+- Use natural, conversational language
+- Focus on completion/readiness
+- About a third of them should address the engineer using the literal placeholder {{name}}, e.g. "{{name}}, all set!"
+- Put each message on its own line
+- Do NOT number them or include quotes, formatting, or explanations
+
+Examples of the style: "Work complete!", "All done!", "Ready for you, {{name}}!", "Task finished!" """
+
+    response = prompt_llm(prompt)
+    if not response:
+        return []
+
+    messages = []
+    for line in response.splitlines():
+        # Clean up each line - remove list markers, quotes and extra formatting
+        line = line.strip().lstrip("-*0123456789. ").strip().strip('"').strip("'").strip()
+        if line and len(line.split()) <= 12:
+            messages.append(line)
+    return messages[:count]
+
+
 def main():
     """Command line interface for testing."""
     if len(sys.argv) > 1:
@@ -99,6 +138,13 @@ def main():
                 print(message)
             else:
                 print("Error generating completion message")
+        elif sys.argv[1] == "--batch":
+            count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+            messages = generate_completion_messages(count)
+            if messages:
+                print("\n".join(messages))
+            else:
+                sys.exit(1)
         else:
             prompt_text = " ".join(sys.argv[1:])
             response = prompt_llm(prompt_text)
@@ -107,7 +153,7 @@ def main():
             else:
                 print("Error calling OpenAI API")
     else:
-        print("Usage: ./oai.py 'your prompt here' or ./oai.py --completion")
+        print("Usage: ./oai.py 'your prompt here' or ./oai.py --completion or ./oai.py --batch N")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,340 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Shared append-only event log for Claude Code hooks.
+
+Each hook event is written as a single JSON line to logs/<name>.jsonl, so the
+cost of logging one event no longer depends on how many events are already in
+the file.
+
+Concurrent hooks (parallel subagents, several tmux panes) are safe: every
+event is a single O_APPEND write made while holding a shared advisory lock on
+logs/.<name>.lock. When the active file grows past HOOK_LOG_MAX_BYTES it is
+rotated under an exclusive lock into a numbered segment
+(e.g. pre_tool_use.000123.jsonl) which is then compressed to .jsonl.zst when
+zstandard is installed, or .jsonl.gz otherwise.
+
+Fsync policy is controlled with the HOOK_LOG_FSYNC environment variable:
+- never   (default) leave flushing to the OS
+- always  fsync after every event
+- <secs>  fsync at most once every <secs> seconds (e.g. "5")
+"""
+
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No advisory locks on Windows, rely on O_APPEND only
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # zstandard is optional, segments fall back to gzip
+
+# Hook logs that used to be stored as a single JSON array
+LEGACY_LOG_NAMES = [
+    'pre_tool_use',
+    'post_tool_use',
+    'notification',
+    'stop',
+    'subagent_stop',
+    'user_prompt_submit',
+]
+
+# Default size of the active log before it is rotated into a segment
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+SEGMENT_PATTERN = re.compile(r'^(?P<name>.+)\.(?P<seq>\d{6})\.jsonl(?P<ext>\.gz|\.zst)?$')
+
+
+def get_log_dir():
+    """Return the project logs directory, creating it if needed."""
+    log_dir = Path.cwd() / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    return log_dir
+
+
+def get_fsync_policy():
+    """
+    Parse HOOK_LOG_FSYNC.
+
+    Returns:
+        float or None: 0 to fsync every event, N seconds between fsyncs,
+        or None to never fsync
+    """
+    value = os.getenv('HOOK_LOG_FSYNC', 'never').strip().lower()
+    if value in ('', 'never', 'none', 'off'):
+        return None
+    if value in ('always', 'on'):
+        return 0.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def get_max_bytes():
+    """Return the rotation size from HOOK_LOG_MAX_BYTES (0 disables rotation)."""
+    try:
+        return int(os.getenv('HOOK_LOG_MAX_BYTES', DEFAULT_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+@contextmanager
+def _locked(log_dir, name, exclusive=False):
+    """Hold the advisory lock for logs/<name>: shared to append, exclusive to rotate."""
+    if fcntl is None:
+        yield
+        return
+
+    fd = os.open(str(Path(log_dir) / f'.{name}.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _should_fsync(log_path, policy):
+    """Decide whether this write should be fsynced under the given policy."""
+    if policy is None:
+        return False
+    if policy == 0:
+        return True
+
+    # Hooks are short-lived processes, so the last fsync time is shared
+    # through the mtime of a stamp file next to the log
+    stamp = log_path.with_name(f'.{log_path.name}.fsync')
+    try:
+        if time.time() - stamp.stat().st_mtime < policy:
+            return False
+    except FileNotFoundError:
+        pass
+    stamp.touch()
+    return True
+
+
+def list_segments(log_dir, name):
+    """
+    Return rotated segments for logs/<name> in sequence order.
+
+    Returns:
+        list: (sequence number, Path) tuples
+    """
+    segments = {}
+    for path in Path(log_dir).glob(f'{name}.*.jsonl*'):
+        match = SEGMENT_PATTERN.match(path.name)
+        if not match or match.group('name') != name:
+            continue
+        seq = int(match.group('seq'))
+        # Prefer the compressed copy while compress_segment is finishing up
+        if seq not in segments or match.group('ext'):
+            segments[seq] = path
+    return sorted(segments.items())
+
+
+def compress_segment(segment_path):
+    """Compress a rotated segment in place, removing the uncompressed file."""
+    segment_path = Path(segment_path)
+    if zstandard is not None:
+        target = segment_path.with_name(segment_path.name + '.zst')
+        tmp = target.with_name(target.name + '.tmp')
+        with open(segment_path, 'rb') as src, open(tmp, 'wb') as dst:
+            zstandard.ZstdCompressor().copy_stream(src, dst)
+    else:
+        target = segment_path.with_name(segment_path.name + '.gz')
+        tmp = target.with_name(target.name + '.tmp')
+        with open(segment_path, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+            while True:
+                chunk = src.read(1024 * 1024)
+                if not chunk:
+                    break
+                dst.write(chunk)
+
+    os.replace(tmp, target)
+    segment_path.unlink()
+    return target
+
+
+def rotate_log(log_dir, name, max_bytes):
+    """
+    Move logs/<name>.jsonl into the next numbered segment if it is over max_bytes.
+
+    Returns:
+        Path or None: The new (uncompressed) segment, or None if nothing rotated
+    """
+    log_dir = Path(log_dir)
+    log_path = log_dir / f'{name}.jsonl'
+
+    with _locked(log_dir, name, exclusive=True):
+        # Another writer may have rotated while we waited for the lock
+        try:
+            if log_path.stat().st_size < max_bytes:
+                return None
+        except FileNotFoundError:
+            return None
+
+        segments = list_segments(log_dir, name)
+        next_seq = segments[-1][0] + 1 if segments else 1
+        segment_path = log_dir / f'{name}.{next_seq:06d}.jsonl'
+        os.replace(log_path, segment_path)
+
+    return segment_path
+
+
+def migrate_legacy_log(log_dir, name):
+    """
+    Convert logs/<name>.json (a JSON array) into logs/<name>.jsonl.
+
+    Legacy events are placed ahead of any events already in the .jsonl file
+    and the original file is kept as <name>.json.migrated.
+
+    Returns:
+        int: Number of events migrated
+    """
+    legacy_path = Path(log_dir) / f'{name}.json'
+
+    with _locked(log_dir, name, exclusive=True):
+        # Another hook may have finished the migration while we waited
+        if not legacy_path.exists():
+            return 0
+
+        try:
+            with open(legacy_path, 'r') as f:
+                events = json.load(f)
+        except (json.JSONDecodeError, ValueError):
+            events = []
+        if not isinstance(events, list):
+            events = [events]
+
+        jsonl_path = legacy_path.with_suffix('.jsonl')
+        tmp_path = legacy_path.with_suffix('.jsonl.migrating')
+        with open(tmp_path, 'w') as out:
+            for event in events:
+                out.write(json.dumps(event, separators=(',', ':')) + '\n')
+            if jsonl_path.exists():
+                with open(jsonl_path, 'r') as existing:
+                    for line in existing:
+                        out.write(line)
+
+        os.replace(tmp_path, jsonl_path)
+        legacy_path.rename(legacy_path.with_name(f'{name}.json.migrated'))
+
+    return len(events)
+
+
+def append_event(name, event, log_dir=None):
+    """
+    Append one hook event to logs/<name>.jsonl.
+
+    Write failures are reported on stderr rather than raised, so a full disk
+    never blocks a tool call.
+
+    Args:
+        name (str): Log name, usually the hook name (e.g. 'pre_tool_use')
+        event (dict): Event payload received by the hook
+        log_dir (Path): Override for the logs directory
+
+    Returns:
+        bool: True if the event was written
+    """
+    try:
+        log_dir = Path(log_dir) if log_dir else get_log_dir()
+        log_path = log_dir / f'{name}.jsonl'
+
+        # One-time conversion of the old JSON array format
+        if (log_dir / f'{name}.json').exists():
+            migrate_legacy_log(log_dir, name)
+
+        record = dict(event)
+        record.setdefault('logged_at', datetime.now().isoformat())
+        data = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+        max_bytes = get_max_bytes()
+        with _locked(log_dir, name):
+            # A single O_APPEND write keeps records whole even without locks
+            fd = os.open(str(log_path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                if _should_fsync(log_path, get_fsync_policy()):
+                    os.fsync(fd)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+
+        if max_bytes and size >= max_bytes:
+            segment = rotate_log(log_dir, name, max_bytes)
+            if segment:
+                compress_segment(segment)
+
+        return True
+
+    except (OSError, TypeError, ValueError) as e:
+        print(f"Hook log write failed for {name}: {e}", file=sys.stderr)
+        return False
+
+
+def open_segment(path):
+    """Open a plain, gzip or zstd segment for text reading."""
+    if path.name.endswith('.gz'):
+        return gzip.open(path, 'rt')
+    if path.name.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path.name}")
+        import io
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+    return open(path, 'r')
+
+
+def iter_events(name, log_dir=None):
+    """Yield events for logs/<name> oldest first: rotated segments, then the active file."""
+    log_dir = Path(log_dir) if log_dir else Path.cwd() / 'logs'
+    paths = [path for _, path in list_segments(log_dir, name)]
+    log_path = log_dir / f'{name}.jsonl'
+    if log_path.exists():
+        paths.append(log_path)
+
+    for path in paths:
+        try:
+            f = open_segment(path)
+        except FileNotFoundError:
+            continue  # Compressed by a writer between listing and opening
+        with f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def main():
+    """Command line interface for migrating legacy hook logs."""
+    if len(sys.argv) > 1 and sys.argv[1] == '--migrate':
+        log_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else Path.cwd() / 'logs'
+        for name in LEGACY_LOG_NAMES:
+            count = migrate_legacy_log(log_dir, name)
+            if count:
+                print(f"Migrated {count} events: {name}.json -> {name}.jsonl")
+    else:
+        print("Usage: ./event_log.py --migrate [logs_dir]")
+
+
+if __name__ == '__main__':
+    main()
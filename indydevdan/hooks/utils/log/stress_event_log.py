@@ -0,0 +1,109 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Stress check for the shared hook event log.
+
+Runs hundreds of concurrent post_tool_use.py hook processes against a scratch
+logs/ directory with a tiny rotation size, then reads every segment back and
+verifies that no event was lost, duplicated or corrupted.
+
+Usage:
+- ./stress_event_log.py                        # 300 processes, 4 KB segments
+- ./stress_event_log.py --processes 500 --max-bytes 2048
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from event_log import iter_events, list_segments
+
+HOOKS_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_stress(processes, max_bytes, hook='post_tool_use'):
+    """
+    Fire `processes` hook invocations at once and check the resulting log.
+
+    Returns:
+        bool: True if every event was logged exactly once
+    """
+    hook_script = HOOKS_DIR / f'{hook}.py'
+    env = dict(os.environ, HOOK_LOG_MAX_BYTES=str(max_bytes))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.time()
+        running = []
+        for i in range(processes):
+            proc = subprocess.Popen(
+                [sys.executable, str(hook_script)],
+                cwd=work_dir,
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            running.append(proc)
+
+        # Release all payloads at once so the writes overlap
+        for i, proc in enumerate(running):
+            payload = {
+                'session_id': 'stress',
+                'tool_name': 'Bash',
+                'tool_input': {'command': f'echo {i}'},
+                'stress_id': i,
+                'padding': 'x' * 200,
+            }
+            proc.stdin.write(json.dumps(payload).encode('utf-8'))
+            proc.stdin.close()
+
+        errors = []
+        for proc in running:
+            proc.wait()
+            stderr = proc.stderr.read().decode('utf-8', 'replace').strip()
+            proc.stderr.close()
+            if stderr:
+                errors.append(stderr)
+        elapsed = time.time() - start
+
+        log_dir = Path(work_dir) / 'logs'
+        seen = [event.get('stress_id') for event in iter_events(hook, log_dir)]
+        segments = list_segments(log_dir, hook)
+
+    missing = set(range(processes)) - set(seen)
+    duplicates = len(seen) - len(set(seen))
+
+    print(f"Processes:  {processes} in {elapsed:.2f}s")
+    print(f"Segments:   {len(segments)} (+ active file)")
+    print(f"Events:     {len(seen)} read back")
+    print(f"Missing:    {len(missing)}")
+    print(f"Duplicates: {duplicates}")
+    for error in errors[:5]:
+        print(f"stderr: {error}")
+
+    return not missing and not duplicates and not errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent hook logging stress check')
+    parser.add_argument('--processes', type=int, default=300, help='Concurrent hook processes')
+    parser.add_argument('--max-bytes', type=int, default=4096, help='Rotation size for the run')
+    parser.add_argument('--hook', default='post_tool_use', help='Hook script to run')
+    args = parser.parse_args()
+
+    ok = run_stress(args.processes, args.max_bytes, args.hook)
+    print("✅ No events lost" if ok else "❌ Event loss detected")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Incremental transcript export for the --chat option of the stop hooks.
+
+Each Claude transcript (.jsonl) is streamed into logs/chat/<transcript>.jsonl.
+logs/chat/index.json remembers, per transcript, the byte offset already
+exported along with its inode and record count, so every stop only reads and
+appends the records written since the previous stop.
+
+Usage:
+- ./transcript_export.py /path/to/transcript.jsonl [logs_dir]
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Without locks concurrent stops may export a record twice
+
+
+def _load_index(index_path):
+    """Read the export index; a missing or corrupt index starts over."""
+    try:
+        with open(index_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index_path, index):
+    """Atomically replace the export index."""
+    tmp_path = index_path.with_name(f'{index_path.name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_path, index_path)
+
+
+def export_transcript(transcript_path, log_dir):
+    """
+    Append transcript records added since the last export.
+
+    Only complete lines are exported; a partially written last line is
+    picked up by the next stop. If the transcript was replaced or truncated
+    the export starts again from the beginning.
+
+    Args:
+        transcript_path (str): Claude transcript .jsonl file
+        log_dir (str): Project logs directory
+
+    Returns:
+        int: Number of new records exported
+    """
+    transcript_path = Path(transcript_path)
+    chat_dir = Path(log_dir) / 'chat'
+    chat_dir.mkdir(parents=True, exist_ok=True)
+    index_path = chat_dir / 'index.json'
+    output_path = chat_dir / f'{transcript_path.stem}.jsonl'
+
+    lock_fd = os.open(str(chat_dir / '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+        index = _load_index(index_path)
+        key = str(transcript_path.resolve())
+        entry = index.get(key, {})
+        stat = transcript_path.stat()
+
+        offset = entry.get('offset', 0)
+        records = entry.get('records', 0)
+        if entry.get('inode') != stat.st_ino or stat.st_size < offset:
+            # New or rewritten transcript: re-export from scratch
+            offset, records = 0, 0
+            if output_path.exists():
+                output_path.unlink()
+
+        if stat.st_size == offset:
+            return 0
+
+        with open(transcript_path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(stat.st_size - offset)
+
+        # Stop at the last complete line
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return 0
+
+        lines = []
+        for line in chunk[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                json.loads(line)
+            except ValueError:
+                continue  # Skip invalid lines
+            lines.append(line + b'\n')
+
+        if lines:
+            with open(output_path, 'ab') as out:
+                out.write(b''.join(lines))
+
+        index[key] = {
+            'inode': stat.st_ino,
+            'offset': offset + end,
+            'records': records + len(lines),
+            'output': output_path.name,
+        }
+        _save_index(index_path, index)
+        return len(lines)
+
+    finally:
+        os.close(lock_fd)
+
+
+def main():
+    """Command line interface for exporting a transcript by hand."""
+    if len(sys.argv) > 1:
+        log_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.getcwd(), 'logs')
+        count = export_transcript(sys.argv[1], log_dir)
+        print(f"Exported {count} new records")
+    else:
+        print("Usage: ./transcript_export.py /path/to/transcript.jsonl [logs_dir]")
+
+
+if __name__ == '__main__':
+    main()
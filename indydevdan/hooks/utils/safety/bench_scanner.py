@@ -0,0 +1,160 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Benchmark the command scanner over a corpus of Bash tool inputs.
+
+The corpus is every Bash command found in logs/pre_tool_use.jsonl (including
+rotated segments) plus a built-in sample, or a file given with --corpus (one
+command per line, or JSONL hook events). Reports microseconds per command for
+the scanner and for the previous multi-regex checks, and lists commands where
+the two disagree.
+
+Usage:
+- ./bench_scanner.py
+- ./bench_scanner.py --corpus commands.txt --repeat 20
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from utils.log.event_log import iter_events
+from utils.safety.command_scanner import get_scanner
+
+SAMPLE_COMMANDS = [
+    "ls -la",
+    "git status && git diff --stat",
+    "python -m pytest -q tests/",
+    "rm -rf /",
+    "rm -rf build dist *.egg-info",
+    "rm -r build.log",
+    "rm -r ./node_modules/.cache",
+    "find . -name '*.pyc' -delete",
+    "cat .env",
+    "cat .env.sample",
+    "node -e 'console.log(process.env.HOME)'",
+    "source .venv/bin/activate && pip install -r requirements.txt",
+    "echo 'rm -rf /' >> notes.md",
+    "docker compose --env-file=.env up -d",
+    "cd /tmp && tar xzf archive.tar.gz && rm -r archive",
+    "grep -rn 'TODO' src/ | head -20",
+    "bash -c 'rm -rf ~'",
+    "echo \"$(rm -rf /)\"",
+    "npm run build 2>&1 | tail -5",
+    "sudo -u deploy rm -rf /var/www/releases/old",
+    "find . -exec rm -rf {} +",
+    "find / -name x -exec rm -r {} \\;",
+    "find . -name '*.tmp' -execdir rm {} \\;",
+    "find ~ -type d -ok rm -r {} \\;",
+    "eval 'rm -rf /'",
+    "eval \"echo hello\"",
+    "sh -c 'find / -exec rm -r {} +'",
+]
+
+
+def legacy_is_blocked(command):
+    """The multi-pass regex checks pre_tool_use.py used before the scanner."""
+    normalized = ' '.join(command.lower().split())
+    patterns = [
+        r'\brm\s+.*-[a-z]*r[a-z]*f',
+        r'\brm\s+.*-[a-z]*f[a-z]*r',
+        r'\brm\s+--recursive\s+--force',
+        r'\brm\s+--force\s+--recursive',
+        r'\brm\s+-r\s+.*-f',
+        r'\brm\s+-f\s+.*-r',
+    ]
+    for pattern in patterns:
+        if re.search(pattern, normalized):
+            return True
+    dangerous_paths = [r'/', r'/\*', r'~', r'~/', r'\$HOME', r'\.\.', r'\*', r'\.', r'\.\s*$']
+    if re.search(r'\brm\s+.*-[a-z]*r', normalized):
+        for path in dangerous_paths:
+            if re.search(path, normalized):
+                return True
+    env_patterns = [
+        r'\b\.env\b(?!\.sample)',
+        r'cat\s+.*\.env\b(?!\.sample)',
+        r'echo\s+.*>\s*\.env\b(?!\.sample)',
+        r'touch\s+.*\.env\b(?!\.sample)',
+        r'cp\s+.*\.env\b(?!\.sample)',
+        r'mv\s+.*\.env\b(?!\.sample)',
+    ]
+    for pattern in env_patterns:
+        if re.search(pattern, command):
+            return True
+    return False
+
+
+def load_corpus(corpus_path=None):
+    """Collect Bash commands from a corpus file or the project hook logs."""
+    commands = []
+    if corpus_path:
+        with open(corpus_path, 'r') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                    if isinstance(event, dict):
+                        line = event.get('tool_input', {}).get('command', '')
+                except json.JSONDecodeError:
+                    pass
+                if line:
+                    commands.append(line)
+        return commands
+
+    for event in iter_events('pre_tool_use'):
+        if event.get('tool_name') == 'Bash':
+            command = event.get('tool_input', {}).get('command', '')
+            if command:
+                commands.append(command)
+    return commands + SAMPLE_COMMANDS
+
+
+def time_per_command(check, commands, repeat):
+    """Return mean microseconds per command."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            check(command)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(commands)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Bash command scanner')
+    parser.add_argument('--corpus', help='File with one command per line or JSONL hook events')
+    parser.add_argument('--repeat', type=int, default=50, help='Passes over the corpus')
+    args = parser.parse_args()
+
+    commands = load_corpus(args.corpus)
+    scanner = get_scanner()
+
+    scanner_us = time_per_command(scanner.scan, commands, args.repeat)
+    legacy_us = time_per_command(legacy_is_blocked, commands, args.repeat)
+
+    disagreements = []
+    for command in commands:
+        new_blocked = scanner.scan(command) is not None
+        if new_blocked != legacy_is_blocked(command):
+            disagreements.append((new_blocked, command))
+
+    print(f"Corpus:   {len(commands)} commands, {args.repeat} passes")
+    print(f"Scanner:  {scanner_us:8.1f} µs/command")
+    print(f"Legacy:   {legacy_us:8.1f} µs/command")
+    print(f"Verdicts differ on {len(disagreements)} commands:")
+    for new_blocked, command in disagreements[:20]:
+        verdict = "now blocked " if new_blocked else "now allowed "
+        print(f"  {verdict} {command[:100]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Single-pass safety scanner for Bash tool commands.
+
+The command line is tokenized once with a precompiled shell-aware tokenizer
+that understands quoting, pipelines, &&/||/;, redirections and $(...) or
+backtick subshells. Commands run by other commands are checked too: the
+command after wrappers such as sudo or xargs, the string given to
+`sh -c` or `eval` (tokenized again), and the command after find's
+-exec/-execdir/-ok, with {} standing for find's starting paths. Each
+resulting simple command is checked against rules loaded from
+command_rules.json:
+
+- commands: per-command flag rules (e.g. rm with recursive + force) and
+  dangerous target patterns, combined into one regex per rule
+- tokens:   patterns checked against every word (e.g. .env files), combined
+  into one regex
+
+Usage:
+- ./command_scanner.py "rm -rf /tmp/build && ls"
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+
+RULES_PATH = Path(__file__).resolve().parent / 'command_rules.json'
+
+# One regex tokenizes the whole command line in a single pass
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>[ \t\r]+)
+  | (?P<squote>'[^']*'?)
+  | (?P<dquote>"(?:[^"\\]|\\.)*"?)
+  | (?P<escape>\\.?)
+  | (?P<subst>\$\(|`)
+  | (?P<op>&&|\|\||;;|\|&|[;&|()\n])
+  | (?P<redirect>\d*(?:>>|>&|<&|&>|>\||<<<|<<|>|<))
+  | (?P<text>[^\s'"\\|&;()<>`$]+|\$)
+""", re.VERBOSE)
+
+# Subshells nested inside double quotes
+QUOTED_SUBST_PATTERN = re.compile(r'\$\(([^()]*)\)|`([^`]*)`')
+
+# VAR=value prefix before a command
+ASSIGNMENT_PATTERN = re.compile(r'^[A-Za-z_]\w*=')
+
+
+class Finding:
+    """A rule that matched a command."""
+
+    def __init__(self, rule_id, message, hint=None, command=None):
+        self.rule_id = rule_id
+        self.message = message
+        self.hint = hint
+        self.command = command
+
+    def __repr__(self):
+        return f"Finding({self.rule_id!r}, command={self.command!r})"
+
+
+def split_commands(command_line):
+    """
+    Split a shell command line into simple commands.
+
+    Pipelines, &&, ||, ;, & and subshells all start a new command, and any
+    $(...) or backticks inside double quotes are split out as well.
+
+    Returns:
+        list: One list of words per simple command
+    """
+    commands = []
+    words = []
+    word = []
+    in_word = False
+
+    def end_word():
+        nonlocal word, in_word
+        if in_word:
+            words.append(''.join(word))
+        word, in_word = [], False
+
+    def end_command():
+        nonlocal words
+        end_word()
+        if words:
+            commands.append(words)
+        words = []
+
+    for match in TOKEN_PATTERN.finditer(command_line):
+        kind = match.lastgroup
+        value = match.group()
+
+        if kind == 'space':
+            end_word()
+        elif kind == 'text':
+            word.append(value)
+            in_word = True
+        elif kind == 'squote':
+            word.append(value[1:-1] if value.endswith("'") and len(value) > 1 else value[1:])
+            in_word = True
+        elif kind == 'dquote':
+            body = value[1:-1] if value.endswith('"') and len(value) > 1 else value[1:]
+            for inner in QUOTED_SUBST_PATTERN.finditer(body):
+                commands.extend(split_commands(inner.group(1) or inner.group(2) or ''))
+            word.append(re.sub(r'\\(.)', r'\1', body))
+            in_word = True
+        elif kind == 'escape':
+            word.append(value[1:])
+            in_word = True
+        elif kind == 'redirect':
+            # The redirect target stays a word of the current command
+            end_word()
+        else:  # op or subst
+            end_command()
+
+    end_command()
+    return commands
+
+
+class CommandScanner:
+    """Check commands against compiled rules from command_rules.json."""
+
+    def __init__(self, rules):
+        self.wrappers = {name: set(opts) for name, opts in rules.get('wrappers', {}).items()}
+        self.shells = set(rules.get('shells', []))
+        self.evaluators = set(rules.get('evaluators', []))
+        self.exec_options = {name: set(opts) for name, opts in rules.get('exec_options', {}).items()}
+
+        self.commands = {}
+        for name, spec in rules.get('commands', {}).items():
+            compiled = []
+            for rule in spec.get('rules', []):
+                targets = rule.get('targets')
+                target_re = re.compile('|'.join(f'(?:{t})' for t in targets)) if targets else None
+                compiled.append((rule, set(rule.get('requires', [])), target_re))
+            self.commands[name] = (spec.get('flags', {}), compiled)
+
+        self.token_rules = rules.get('tokens', [])
+        self.token_re = None
+        if self.token_rules:
+            # Named group per rule so one search tells us which rule hit
+            self.token_re = re.compile('|'.join(
+                f'(?P<t{i}>{rule["pattern"]})' for i, rule in enumerate(self.token_rules)))
+
+    def check_word(self, word):
+        """Return the token rule matching a single word, or None."""
+        if self.token_re is None:
+            return None
+        match = self.token_re.search(word)
+        if not match:
+            return None
+        rule = self.token_rules[int(match.lastgroup[1:])]
+        return Finding(rule['id'], rule['message'], rule.get('hint'), word)
+
+    def _unwrap(self, words):
+        """Skip env assignments and wrappers like sudo/xargs to find the real command."""
+        i = 0
+        while i < len(words):
+            word = words[i]
+            if ASSIGNMENT_PATTERN.match(word):
+                i += 1
+                continue
+            name = word.rsplit('/', 1)[-1]
+            if name not in self.wrappers:
+                break
+            takes_arg = self.wrappers[name]
+            i += 1
+            while i < len(words) and (words[i].startswith('-') or
+                                      (name == 'env' and '=' in words[i])):
+                i += 2 if words[i] in takes_arg else 1
+            # timeout takes a duration before the command
+            if name == 'timeout' and i < len(words):
+                i += 1
+        return words[i:]
+
+    def _check_command_rules(self, name, args):
+        flag_names, rules = self.commands[name]
+        flags = set()
+        targets = []
+        options_done = False
+        for arg in args:
+            if options_done or not arg.startswith('-') or arg == '-':
+                targets.append(arg)
+            elif arg == '--':
+                options_done = True
+            elif arg.startswith('--'):
+                flag = flag_names.get(arg[2:])
+                if flag:
+                    flags.add(flag)
+            else:
+                for letter in arg[1:]:
+                    flag = flag_names.get(letter)
+                    if flag:
+                        flags.add(flag)
+
+        for rule, requires, target_re in rules:
+            if not requires <= flags:
+                continue
+            if target_re is None or any(target_re.fullmatch(t) for t in targets):
+                return Finding(rule['id'], rule['message'], rule.get('hint'), ' '.join([name] + args))
+        return None
+
+    def _exec_commands(self, name, args):
+        """
+        Commands that find runs with -exec/-execdir/-ok, each ending at ; or +.
+        {} is replaced by find's starting paths, the widest set of files
+        the command can be given.
+        """
+        options = self.exec_options[name]
+        roots = []
+        for arg in args:
+            if arg.startswith('-') or arg in ('(', '!'):
+                break
+            roots.append(arg)
+        roots = roots or ['.']
+
+        commands = []
+        i = 0
+        while i < len(args):
+            if args[i] not in options:
+                i += 1
+                continue
+            command = []
+            i += 1
+            while i < len(args) and args[i] not in (';', '+'):
+                command.extend(roots if args[i] == '{}' else [args[i]])
+                i += 1
+            if command:
+                commands.append(command)
+        return commands
+
+    def _scan_words(self, words):
+        """Check one simple command, including any command it runs."""
+        words = self._unwrap(words)
+        if not words:
+            return None
+        name = words[0].rsplit('/', 1)[-1]
+
+        # bash -c "..." and eval "..." run another command line
+        payload = None
+        if name in self.shells and '-c' in words[1:]:
+            index = words.index('-c', 1)
+            if index + 1 < len(words):
+                payload = words[index + 1]
+        elif name in self.evaluators:
+            payload = ' '.join(words[1:])
+        if payload:
+            finding = self.scan(payload)
+            if finding:
+                return finding
+
+        if name in self.exec_options:
+            for command in self._exec_commands(name, words[1:]):
+                finding = self._scan_words(command)
+                if finding:
+                    return finding
+
+        if name in self.commands:
+            return self._check_command_rules(name, words[1:])
+        return None
+
+    def scan(self, command_line):
+        """
+        Scan a full command line.
+
+        Returns:
+            Finding or None: The first rule that matched
+        """
+        for words in split_commands(command_line):
+            for word in words:
+                finding = self.check_word(word)
+                if finding:
+                    return finding
+
+            finding = self._scan_words(words)
+            if finding:
+                return finding
+        return None
+
+
+_scanner = None
+
+
+def get_scanner(rules_path=RULES_PATH):
+    """Return the process-wide scanner, compiling the rules on first use."""
+    global _scanner
+    if _scanner is None:
+        with open(rules_path, 'r') as f:
+            _scanner = CommandScanner(json.load(f))
+    return _scanner
+
+
+def scan_command(command_line):
+    """Scan a Bash command line with the default rules."""
+    return get_scanner().scan(command_line)
+
+
+def main():
+    """Command line interface for testing."""
+    if len(sys.argv) > 1:
+        command_line = " ".join(sys.argv[1:])
+        finding = scan_command(command_line)
+        if finding:
+            print(f"BLOCKED [{finding.rule_id}]: {finding.message} ({finding.command})")
+            sys.exit(2)
+        print("Allowed")
+    else:
+        print("Usage: ./command_scanner.py 'command to check'")
+
+
+if __name__ == '__main__':
+    main()
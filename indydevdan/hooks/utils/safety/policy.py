@@ -0,0 +1,483 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Declarative hook policy engine.
+
+Rules in policy.json (or the file named by HOOK_POLICY) match on:
+- tools             tool names the rule applies to ("*" for all)
+- paths             globs checked against file_path / notebook_path / path
+- except_paths      globs that exempt a path from the rule
+- commands          regexes checked against Bash commands
+- command_contains  literal substrings of Bash commands
+- prompt_patterns   regexes checked against user prompts
+- prompt_contains   literal substrings of user prompts (case-insensitive)
+
+All rules are compiled together: literals go into one Aho-Corasick automaton,
+globs with a fixed file name go into a dict keyed by that name, and the
+remaining globs and regexes are merged into one alternation per tool. Each
+regex is compiled on its own first; invalid ones are dropped with a warning
+on stderr, and a leading inline flag such as (?i) is scoped to its own
+pattern. The tables (automata, name dicts, regex sources) are pickled under
+~/.cache/cdc-devtools/policy/, keyed by the policy file's mtime and SHA-256,
+so a hook invocation skips parsing and building them. Python cannot persist
+compiled regexes, so each tool's alternation is compiled the first time that
+tool is checked, and the loaded Policy is reused within a process (e.g. the
+hook daemon) until the file changes. Matching cost depends on the input
+length, not on the number of literal or fixed-name rules.
+
+Usage:
+- ./policy.py --check-tool Read '{"file_path": ".env"}'
+- ./policy.py --check-prompt "please rm -rf / for me"
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+from collections import deque
+from pathlib import Path
+
+DEFAULT_POLICY_PATH = Path(__file__).resolve().parent / 'policy.json'
+
+# Bump when the compiled layout changes so stale caches are ignored
+CACHE_FORMAT = 2
+
+PATH_FIELDS = ('file_path', 'notebook_path', 'path')
+
+# Inline flags at the start of a pattern, e.g. (?i), which are only valid
+# at the start of the whole combined alternation
+GLOBAL_FLAGS_PATTERN = re.compile(r'^\(\?([aiLmsux]+)\)')
+
+# Backreferences change meaning, and a group name used by two rules is a
+# redefinition, once patterns are combined
+OWN_GROUPS_PATTERN = re.compile(r'\\[1-9]|\(\?P[<=]')
+
+# Policy loaded in this process, reused while the file is unchanged
+_loaded = {}
+
+
+def warn(message):
+    print(f"policy: {message}", file=sys.stderr)
+
+
+def prepare_pattern(source, rule_id, flags=0):
+    """
+    Validate a rule's regex on its own.
+
+    Returns:
+        tuple: (source safe to embed in an alternation, standalone) or
+        None if the pattern is invalid. Standalone patterns use named groups
+        or backreferences and are matched separately.
+    """
+    match = GLOBAL_FLAGS_PATTERN.match(source)
+    if match:
+        source = f'(?{match.group(1)}:{source[match.end():]})'
+    try:
+        re.compile(source, flags)
+    except (re.error, TypeError, ValueError) as e:
+        warn(f"dropping invalid pattern {source!r} in rule {rule_id!r}: {e}")
+        return None
+    return source, bool(OWN_GROUPS_PATTERN.search(source))
+
+
+def get_policy_path():
+    """Return the policy file, HOOK_POLICY overriding the bundled one."""
+    return Path(os.getenv('HOOK_POLICY', str(DEFAULT_POLICY_PATH))).expanduser()
+
+
+def get_cache_path(policy_path):
+    """Return the compiled-policy cache file for a policy path."""
+    cache_dir = Path.home() / '.cache' / 'cdc-devtools' / 'policy'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = hashlib.sha1(str(Path(policy_path).resolve()).encode('utf-8')).hexdigest()[:16]
+    return cache_dir / f'{key}.pickle'
+
+
+def glob_to_regex(pattern):
+    """Translate a path glob (**, *, ?) into a regex source for fullmatch."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+
+def fixed_name(pattern):
+    """Return the file name for globs like '**/.env', else None."""
+    if pattern.startswith('**/'):
+        name = pattern[3:]
+        if name and not any(c in name for c in '*?[/'):
+            return name
+    return None
+
+
+def build_automaton(literals):
+    """
+    Build an Aho-Corasick automaton.
+
+    Args:
+        literals (list): (lowercase literal, rule index) pairs
+
+    Returns:
+        tuple: (goto list of dicts, fail list, output list of rule-index lists)
+    """
+    goto, fail, output = [{}], [0], [[]]
+    for literal, rule_index in literals:
+        state = 0
+        for char in literal:
+            if char not in goto[state]:
+                goto.append({})
+                fail.append(0)
+                output.append([])
+                goto[state][char] = len(goto) - 1
+            state = goto[state][char]
+        output[state].append(rule_index)
+
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for char, child in goto[state].items():
+            queue.append(child)
+            fallback = fail[state]
+            while fallback and char not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[child] = goto[fallback].get(char, 0) if goto[fallback].get(char, 0) != child else 0
+            output[child] = output[child] + output[fail[child]]
+    return goto, fail, output
+
+
+def search_automaton(automaton, text):
+    """Return the rule indexes whose literals occur in text, in one pass."""
+    goto, fail, output = automaton
+    state = 0
+    hits = set()
+    for char in text:
+        while state and char not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(char, 0)
+        if output[state]:
+            hits.update(output[state])
+    return hits
+
+
+def compile_policy(policy):
+    """
+    Compile a parsed policy into picklable lookup tables.
+
+    Returns:
+        dict: Tables consumed by Policy
+    """
+    rules = policy.get('rules', [])
+    by_tool = {}
+    prompt_literals = []
+    prompt_patterns = []
+
+    def bucket(tool):
+        return by_tool.setdefault(tool, {
+            'names': {}, 'path_patterns': [], 'command_patterns': [], 'command_literals': [],
+        })
+
+    if not isinstance(rules, list):
+        warn("'rules' is not a list; ignoring it")
+        rules = []
+    valid_rules = []
+    for index, rule in enumerate(rules):
+        if isinstance(rule, dict):
+            valid_rules.append(rule)
+        else:
+            warn(f"dropping rule {index}: not an object")
+    rules = valid_rules
+
+    for index, rule in enumerate(rules):
+        rule_id = rule.get('id', f'rule-{index}')
+        commands = [p for p in (prepare_pattern(s, rule_id) for s in rule.get('commands', [])) if p]
+        prompts = [p for p in (prepare_pattern(s, rule_id, re.IGNORECASE)
+                               for s in rule.get('prompt_patterns', [])) if p]
+        for tool in rule.get('tools', []):
+            tables = bucket(tool)
+            for glob in rule.get('paths', []):
+                name = fixed_name(glob)
+                if name:
+                    tables['names'].setdefault(name, []).append(index)
+                else:
+                    tables['path_patterns'].append((index, (glob_to_regex(glob), False)))
+            for pattern in commands:
+                tables['command_patterns'].append((index, pattern))
+            for literal in rule.get('command_contains', []):
+                tables['command_literals'].append((literal, index))
+
+        for literal in rule.get('prompt_contains', []):
+            prompt_literals.append((literal.lower(), index))
+        for pattern in prompts:
+            prompt_patterns.append((index, pattern))
+
+    def combined(patterns):
+        """
+        One alternation with a named group per pattern, for a single
+        search, plus the standalone patterns.
+
+        Returns:
+            tuple: (alternation source or None, {group name: rule index},
+            [(rule index, source)] matched one by one)
+        """
+        groups = {}
+        alternatives = []
+        standalone = []
+        for index, (source, alone) in patterns:
+            if alone:
+                standalone.append((index, source))
+                continue
+            name = f'_policy_rule_{len(groups)}'
+            groups[name] = index
+            alternatives.append(f'(?P<{name}>{source})')
+        return ('|'.join(alternatives) or None), groups, standalone
+
+    tools = {}
+    for tool, tables in by_tool.items():
+        tools[tool] = {
+            'names': tables['names'],
+            'path_regex': combined(tables['path_patterns']),
+            'command_regex': combined(tables['command_patterns']),
+            'command_automaton': build_automaton(tables['command_literals']) if tables['command_literals'] else None,
+        }
+
+    return {
+        'format': CACHE_FORMAT,
+        'rules': [{
+            'id': rule.get('id', f'rule-{i}'),
+            'message': rule.get('message', 'Blocked by policy'),
+            'hint': rule.get('hint'),
+            'except_regex': '|'.join(glob_to_regex(g) for g in rule.get('except_paths', [])) or None,
+        } for i, rule in enumerate(rules)],
+        'tools': tools,
+        'prompt_automaton': build_automaton(prompt_literals) if prompt_literals else None,
+        'prompt_regex': combined(prompt_patterns),
+    }
+
+
+class Decision:
+    """Outcome of a policy check."""
+
+    def __init__(self, rule_id, message, hint=None):
+        self.rule_id = rule_id
+        self.message = message
+        self.hint = hint
+
+    def __repr__(self):
+        return f"Decision({self.rule_id!r})"
+
+
+class RuleMatcher:
+    """A combined alternation of rule patterns plus the standalone ones."""
+
+    def __init__(self, combined, flags=0):
+        source, self.groups, standalone = combined
+        self.regex = re.compile(source, flags) if source else None
+        self.standalone = [(index, re.compile(pattern, flags)) for index, pattern in standalone]
+
+    def hits(self, text, full=False):
+        """Rule indexes whose pattern matches; the combined regex finds the first."""
+        hits = []
+        if self.regex is not None:
+            match = self.regex.fullmatch(text) if full else self.regex.search(text)
+            if match:
+                hits = [self.groups[name] for name, value in match.groupdict().items()
+                        if value is not None and name in self.groups]
+        for index, regex in self.standalone:
+            if (regex.fullmatch(text) if full else regex.search(text)):
+                hits.append(index)
+        return hits
+
+
+class Policy:
+    """Evaluate tool calls and prompts against compiled policy tables."""
+
+    def __init__(self, compiled):
+        self.rules = compiled['rules']
+        self.except_res = [re.compile(r['except_regex']) if r['except_regex'] else None
+                           for r in self.rules]
+        # Regexes are compiled per tool on first use, see _tables
+        self._compiled_tools = compiled['tools']
+        self.tools = {}
+        self.prompt_automaton = compiled['prompt_automaton']
+        self._prompt_regex = compiled['prompt_regex']
+        self.prompt_matcher = None
+
+    def _tables(self, tool_name):
+        if tool_name not in self.tools:
+            tables = self._compiled_tools.get(tool_name)
+            self.tools[tool_name] = tables and {
+                'names': tables['names'],
+                'path_matcher': RuleMatcher(tables['path_regex']),
+                'command_matcher': RuleMatcher(tables['command_regex']),
+                'command_automaton': tables['command_automaton'],
+            }
+        return self.tools[tool_name]
+
+    def _decision(self, index):
+        rule = self.rules[index]
+        return Decision(rule['id'], rule['message'], rule.get('hint'))
+
+    def _check_path(self, tables, path):
+        candidates = list(tables['names'].get(path.rsplit('/', 1)[-1], []))
+        candidates += tables['path_matcher'].hits(path, full=True)
+        for index in sorted(set(candidates)):
+            except_re = self.except_res[index]
+            if except_re is None or not except_re.fullmatch(path):
+                return self._decision(index)
+        return None
+
+    def check_tool(self, tool_name, tool_input):
+        """
+        Check a tool call.
+
+        Returns:
+            Decision or None: The blocking rule, or None if allowed
+        """
+        for tables in (self._tables(tool_name), self._tables('*')):
+            if not tables:
+                continue
+            for field in PATH_FIELDS:
+                path = tool_input.get(field)
+                if isinstance(path, str) and path:
+                    decision = self._check_path(tables, path)
+                    if decision:
+                        return decision
+
+            command = tool_input.get('command')
+            if isinstance(command, str) and command:
+                hits = set()
+                if tables['command_automaton'] is not None:
+                    hits |= search_automaton(tables['command_automaton'], command)
+                hits |= set(tables['command_matcher'].hits(command))
+                if hits:
+                    return self._decision(min(hits))
+        return None
+
+    def check_prompt(self, prompt):
+        """
+        Check a user prompt.
+
+        Returns:
+            Decision or None: The blocking rule, or None if allowed
+        """
+        hits = set()
+        if self.prompt_automaton is not None:
+            hits |= search_automaton(self.prompt_automaton, prompt.lower())
+        if self.prompt_matcher is None:
+            self.prompt_matcher = RuleMatcher(self._prompt_regex, re.IGNORECASE)
+        hits |= set(self.prompt_matcher.hits(prompt))
+        return self._decision(min(hits)) if hits else None
+
+
+def load_policy(policy_path=None):
+    """
+    Load the compiled policy, rebuilding the on-disk cache only when needed.
+
+    The cache is reused when the policy file's mtime and size are unchanged,
+    or when its content hash still matches after a touch. The Policy itself
+    is kept for later calls in the same process.
+
+    A policy file that cannot be read or parsed gives an empty policy and
+    a warning on stderr, so callers still run their built-in checks.
+
+    Returns:
+        Policy: Ready-to-use matcher (empty if the policy file is missing)
+    """
+    policy_path = Path(policy_path) if policy_path else get_policy_path()
+    try:
+        stat = policy_path.stat()
+    except OSError:
+        return Policy(compile_policy({}))
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    loaded = _loaded.get(str(policy_path))
+    if loaded and loaded[0] == signature:
+        return loaded[1]
+
+    try:
+        cache_path = get_cache_path(policy_path)
+    except OSError:
+        cache_path = None
+    cached = None
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('format') != CACHE_FORMAT:
+            cached = None
+    except (OSError, TypeError, pickle.PickleError, EOFError, AttributeError, ValueError):
+        cached = None
+
+    if cached and (cached['mtime_ns'], cached['size']) == signature:
+        policy = Policy(cached['compiled'])
+        _loaded[str(policy_path)] = (signature, policy)
+        return policy
+
+    try:
+        data = policy_path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if cached and cached['sha256'] == digest:
+            compiled = cached['compiled']
+        else:
+            compiled = compile_policy(json.loads(data))
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        # Not cached, so a fixed file is picked up on the next call
+        warn(f"ignoring {policy_path}: {e}")
+        return Policy(compile_policy({}))
+
+    if cache_path is not None:
+        try:
+            tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({
+                    'format': CACHE_FORMAT,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'sha256': digest,
+                    'compiled': compiled,
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # The cache only saves the next invocation some work
+    policy = Policy(compiled)
+    _loaded[str(policy_path)] = (signature, policy)
+    return policy
+
+
+def main():
+    """Command line interface for testing."""
+    if len(sys.argv) > 3 and sys.argv[1] == '--check-tool':
+        decision = load_policy().check_tool(sys.argv[2], json.loads(sys.argv[3]))
+    elif len(sys.argv) > 2 and sys.argv[1] == '--check-prompt':
+        decision = load_policy().check_prompt(" ".join(sys.argv[2:]))
+    else:
+        print("Usage: ./policy.py --check-tool TOOL 'JSON input' or ./policy.py --check-prompt 'text'")
+        return
+
+    if decision:
+        print(f"BLOCKED [{decision.rule_id}]: {decision.message}")
+        sys.exit(2)
+    print("Allowed")
+
+
+if __name__ == '__main__':
+    main()
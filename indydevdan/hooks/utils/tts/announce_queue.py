@@ -0,0 +1,239 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Non-blocking TTS announcements for Claude Code hooks.
+
+Hooks drop a small message file into logs/announce_queue/ and return
+immediately. A single detached worker drains the queue, waits briefly so
+bursts can be merged (five subagent stops become "5 subagents complete"),
+then speaks the announcements one at a time.
+
+Usage:
+- enqueue_announcement('subagent', "Subagent Complete")  # From a hook
+- ./announce_queue.py --worker                           # Started automatically
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Without locks a second worker may occasionally run
+
+# Drop new announcements once this many are waiting
+MAX_QUEUE_SIZE = 20
+
+# How long the worker waits for a burst to settle before speaking
+BURST_WINDOW_SECONDS = 1.5
+
+HOOKS_DIR = Path(__file__).resolve().parents[2]
+
+
+def get_queue_dir():
+    """Return logs/announce_queue, creating it if needed."""
+    queue_dir = Path.cwd() / 'logs' / 'announce_queue'
+    queue_dir.mkdir(parents=True, exist_ok=True)
+    return queue_dir
+
+
+def get_tts_script_path():
+    """
+    Determine which TTS script to use based on available API keys.
+    Priority order: ElevenLabs > OpenAI > pyttsx3
+    """
+    tts_dir = HOOKS_DIR / "utils" / "tts"
+
+    # Check for ElevenLabs API key (highest priority)
+    if os.getenv('ELEVENLABS_API_KEY'):
+        elevenlabs_script = tts_dir / "elevenlabs_tts.py"
+        if elevenlabs_script.exists():
+            return str(elevenlabs_script)
+
+    # Check for OpenAI API key (second priority)
+    if os.getenv('OPENAI_API_KEY'):
+        openai_script = tts_dir / "openai_tts.py"
+        if openai_script.exists():
+            return str(openai_script)
+
+    # Fall back to pyttsx3 (no API key required)
+    pyttsx3_script = tts_dir / "pyttsx3_tts.py"
+    if pyttsx3_script.exists():
+        return str(pyttsx3_script)
+
+    return None
+
+
+def _try_lock(lock_path):
+    """Take the worker lock without blocking; return the fd or None if held."""
+    fd = os.open(str(lock_path), os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return fd
+    except OSError:
+        os.close(fd)
+        return None
+
+
+def _worker_running(queue_dir):
+    """Check whether a worker currently holds the lock."""
+    fd = _try_lock(queue_dir / '.worker.lock')
+    if fd is None:
+        return True
+    os.close(fd)
+    return False
+
+
+def start_worker(queue_dir):
+    """Launch a detached worker process for this project's queue."""
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), '--worker'],
+        cwd=str(queue_dir.parents[1]),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def enqueue_announcement(kind, text):
+    """
+    Queue an announcement and make sure a worker will speak it.
+
+    Args:
+        kind (str): 'completion', 'subagent' or 'notification'; messages of
+            the same kind that arrive together are merged
+        text (str): Message to speak
+
+    Returns:
+        bool: False if the queue was full and the message was dropped
+    """
+    queue_dir = get_queue_dir()
+    if sum(1 for _ in queue_dir.glob('*.json')) >= MAX_QUEUE_SIZE:
+        return False
+
+    message = {'kind': kind, 'text': text, 'queued_at': time.time()}
+    name = f'{time.time_ns()}-{os.getpid()}'
+    tmp_path = queue_dir / f'{name}.tmp'
+    tmp_path.write_text(json.dumps(message))
+    os.replace(tmp_path, queue_dir / f'{name}.json')
+
+    if not _worker_running(queue_dir):
+        start_worker(queue_dir)
+    return True
+
+
+def take_messages(queue_dir):
+    """Read and remove every queued message, oldest first."""
+    messages = []
+    for path in sorted(queue_dir.glob('*.json')):
+        try:
+            messages.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            pass
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+    return messages
+
+
+def coalesce_messages(messages):
+    """
+    Merge a burst of queued messages into the announcements to speak.
+
+    Returns:
+        list: One message dict per kind, in order of first arrival
+    """
+    merged = {}
+    counts = {}
+    for message in messages:
+        kind = message.get('kind', 'notification')
+        counts[kind] = counts.get(kind, 0) + 1
+        # Dict order keeps first arrival, the value keeps the latest wording
+        merged[kind] = dict(message, kind=kind)
+
+    for message in merged.values():
+        count = counts[message['kind']]
+        if message['kind'] == 'subagent' and count > 1:
+            message['text'] = f"{count} subagents complete"
+    return list(merged.values())
+
+
+def speak(message):
+    """Play a message through the best available TTS script."""
+    tts_script = get_tts_script_path()
+    if not tts_script:
+        return
+
+    text = message.get('text')
+    if not text:
+        return
+
+    try:
+        subprocess.run(
+            ["uv", "run", tts_script, text],
+            capture_output=True,  # Suppress output
+            timeout=10  # 10-second timeout
+        )
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
+        # Fail silently if TTS encounters issues
+        pass
+
+
+def run_worker():
+    """Drain the queue until it stays empty, speaking merged bursts."""
+    queue_dir = get_queue_dir()
+    lock_path = queue_dir / '.worker.lock'
+
+    while True:
+        fd = _try_lock(lock_path)
+        if fd is None:
+            return  # Another worker owns the queue
+
+        try:
+            while True:
+                # Let the burst settle: wait until nothing new arrived for a window
+                while True:
+                    pending = sorted(queue_dir.glob('*.json'))
+                    if not pending:
+                        break
+                    newest = max(p.stat().st_mtime for p in pending if p.exists())
+                    wait = BURST_WINDOW_SECONDS - (time.time() - newest)
+                    if wait <= 0:
+                        break
+                    time.sleep(wait)
+
+                messages = take_messages(queue_dir)
+                if not messages:
+                    break
+                for message in coalesce_messages(messages):
+                    speak(message)
+        finally:
+            os.close(fd)
+
+        # A hook may have queued a message just before we released the lock
+        if not any(queue_dir.glob('*.json')):
+            return
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        run_worker()
+    elif len(sys.argv) > 1:
+        enqueue_announcement('notification', " ".join(sys.argv[1:]))
+    else:
+        print("Usage: ./announce_queue.py --worker or ./announce_queue.py 'message'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Content-addressed cache of synthesized TTS audio.
+
+Audio is stored under TTS_CACHE_DIR (default ~/.cache/cdc-devtools/tts) in a
+file named by the SHA-256 of (provider, voice, text), so a repeated
+announcement plays straight from disk with no network round trip or
+synthesis. The cache is trimmed least-recently-used first once it grows past
+TTS_CACHE_MAX_BYTES (default 50 MB); a hit refreshes the file's mtime.
+
+Usage:
+- ./audio_cache.py --stats
+- ./audio_cache.py --clear
+- uv run elevenlabs_tts.py --prewarm    # Pre-warm the fixed phrases per provider
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# Phrases the hooks speak over and over, worth synthesizing ahead of time
+FIXED_PHRASES = [
+    "Subagent Complete",
+    "Your agent needs your input",
+    "Work complete!",
+    "All done!",
+    "Task finished!",
+    "Job complete!",
+    "Ready for next task!",
+]
+
+
+def get_cache_dir():
+    """Return the audio cache directory, creating it if needed."""
+    default = Path.home() / '.cache' / 'cdc-devtools' / 'tts'
+    cache_dir = Path(os.getenv('TTS_CACHE_DIR', str(default))).expanduser()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_max_bytes():
+    """Return the cache size limit from TTS_CACHE_MAX_BYTES."""
+    try:
+        return int(os.getenv('TTS_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+
+def get_prewarm_phrases():
+    """Return the fixed phrases, including the personalised notification."""
+    phrases = list(FIXED_PHRASES)
+    engineer_name = os.getenv('ENGINEER_NAME', '').strip()
+    if engineer_name:
+        phrases.append(f"{engineer_name}, your agent needs your input")
+    return phrases
+
+
+def cache_path(provider, voice, text, ext):
+    """Return the content-addressed path for (provider, voice, text)."""
+    digest = hashlib.sha256(f"{provider}\0{voice}\0{text}".encode('utf-8')).hexdigest()
+    return get_cache_dir() / digest[:2] / f"{digest}.{ext}"
+
+
+def get_cached_audio(provider, voice, text, ext):
+    """
+    Look up cached audio.
+
+    Returns:
+        Path or None: The cached file, with its mtime refreshed for LRU
+    """
+    path = cache_path(provider, voice, text, ext)
+    try:
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        return None
+
+
+def store_audio(provider, voice, text, ext, data):
+    """Write audio bytes into the cache and trim it to the size limit."""
+    path = cache_path(provider, voice, text, ext)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    evict(get_max_bytes(), keep=path)
+    return path
+
+
+def evict(max_bytes, keep=None):
+    """
+    Delete least recently used files until the cache fits in max_bytes.
+
+    Returns:
+        int: Number of files removed
+    """
+    entries = []
+    total = 0
+    for path in get_cache_dir().glob('*/*'):
+        if path.name.endswith('.tmp'):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and path == keep:
+            continue
+        try:
+            path.unlink()
+            total -= size
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def find_audio_players(ext):
+    """
+    Return the installed system players that can play files of type ext
+    ('mp3' or 'wav'), best first. Empty if there are none, so callers can
+    pick a playback path before synthesizing anything.
+    """
+    players = [
+        ['afplay'],                                           # macOS
+        ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet'],
+        ['mpg123', '-q'],
+        ['paplay'],
+        ['aplay', '-q'],
+    ]
+    suffix = f".{ext.lstrip('.').lower()}"
+    found = []
+    for player in players:
+        if shutil.which(player[0]) is None:
+            continue
+        # mpg123 only handles mp3, aplay/paplay only wav
+        if player[0] == 'mpg123' and suffix != '.mp3':
+            continue
+        if player[0] in ('paplay', 'aplay') and suffix != '.wav':
+            continue
+        found.append(player)
+    return found
+
+
+def play_audio_file(path):
+    """
+    Play an audio file with the first available system player.
+
+    Returns:
+        bool: False if no player was found or playback failed
+    """
+    for player in find_audio_players(Path(path).suffix):
+        try:
+            result = subprocess.run(player + [str(path)], capture_output=True, timeout=30)
+            return result.returncode == 0
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+            continue
+    return False
+
+
+def cache_stats():
+    """Return (file count, total bytes) for the cache."""
+    files = [p for p in get_cache_dir().glob('*/*') if not p.name.endswith('.tmp')]
+    return len(files), sum(p.stat().st_size for p in files)
+
+
+def main():
+    """Command line interface for inspecting the cache."""
+    if len(sys.argv) > 1 and sys.argv[1] == '--clear':
+        shutil.rmtree(get_cache_dir(), ignore_errors=True)
+        print("🧹 TTS cache cleared")
+    elif len(sys.argv) > 1 and sys.argv[1] == '--stats':
+        count, total = cache_stats()
+        print(f"📦 {count} cached clips, {total / 1024:.1f} KB of {get_max_bytes() / 1024:.0f} KB")
+        print(f"📁 {get_cache_dir()}")
+    else:
+        print("Usage: ./audio_cache.py --stats or ./audio_cache.py --clear")
+
+
+if __name__ == '__main__':
+    main()
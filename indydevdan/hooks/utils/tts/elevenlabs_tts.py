@@ -12,6 +12,27 @@ import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from audio_cache import get_cached_audio, get_prewarm_phrases, play_audio_file, store_audio
+
+PROVIDER = "elevenlabs"
+VOICE_ID = "WejK3H1m7MI9CHnIjW9K"  # Specified voice
+MODEL_ID = "eleven_turbo_v2_5"
+OUTPUT_FORMAT = "mp3_44100_128"
+VOICE_KEY = f"{VOICE_ID}:{MODEL_ID}:{OUTPUT_FORMAT}"
+
+
+def synthesize(elevenlabs, text):
+    """Generate speech for text and store it in the audio cache."""
+    audio = elevenlabs.text_to_speech.convert(
+        text=text,
+        voice_id=VOICE_ID,
+        model_id=MODEL_ID,
+        output_format=OUTPUT_FORMAT,
+    )
+    return store_audio(PROVIDER, VOICE_KEY, text, "mp3", b"".join(audio))
+
+
 def main():
     """
     ElevenLabs Turbo v2.5 TTS Script
@@ -22,12 +43,14 @@ def main():
     Usage:
     - ./eleven_turbo_tts.py                    # Uses default text
     - ./eleven_turbo_tts.py "Your custom text" # Uses provided text
+    - ./eleven_turbo_tts.py --prewarm          # Cache the fixed hook phrases
     
     Features:
     - Fast generation (optimized for real-time use)
     - High-quality voice synthesis
     - Stable production model
     - Cost-effective for high-volume usage
+    - Repeated phrases play from the local audio cache
     """
     
     # Load environment variables
@@ -51,6 +74,16 @@ def main():
         print("🎙️  ElevenLabs Turbo v2.5 TTS")
         print("=" * 40)
         
+        # Synthesize the fixed hook phrases ahead of time
+        if len(sys.argv) > 1 and sys.argv[1] == "--prewarm":
+            for phrase in get_prewarm_phrases():
+                if get_cached_audio(PROVIDER, VOICE_KEY, phrase, "mp3"):
+                    print(f"📦 Cached: {phrase}")
+                else:
+                    synthesize(elevenlabs, phrase)
+                    print(f"💾 Stored: {phrase}")
+            return
+        
         # Get text from command line argument or use default
         if len(sys.argv) > 1:
             text = " ".join(sys.argv[1:])  # Join all arguments as text
@@ -58,18 +91,17 @@ def main():
             text = "The first move is what sets everything in motion."
         
         print(f"🎯 Text: {text}")
-        print("🔊 Generating and playing...")
         
         try:
-            # Generate and play audio directly
-            audio = elevenlabs.text_to_speech.convert(
-                text=text,
-                voice_id="WejK3H1m7MI9CHnIjW9K",  # Specified voice
-                model_id="eleven_turbo_v2_5",
-                output_format="mp3_44100_128",
-            )
+            cached = get_cached_audio(PROVIDER, VOICE_KEY, text, "mp3")
+            if cached:
+                print("📦 Playing from cache...")
+            else:
+                print("🔊 Generating and playing...")
+                cached = synthesize(elevenlabs, text)
             
-            play(audio)
+            if not play_audio_file(cached):
+                play(cached.read_bytes())
             print("✅ Playback complete!")
             
         except Exception as e:
@@ -14,6 +14,41 @@ import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from audio_cache import (find_audio_players, get_cached_audio, get_prewarm_phrases, play_audio_file,
+                         store_audio)
+
+PROVIDER = "openai"
+MODEL = "gpt-4o-mini-tts"
+VOICE = "nova"
+INSTRUCTIONS = "Speak in a cheerful, positive yet professional tone."
+VOICE_KEY = f"{MODEL}:{VOICE}:{INSTRUCTIONS}"
+
+
+async def synthesize(openai, text, audio_format="mp3"):
+    """
+    Generate speech for text and store it in the audio cache.
+
+    mp3 is for system players; pcm (24 kHz 16-bit mono) is what
+    LocalAudioPlayer plays when there is none.
+    """
+    response = await openai.audio.speech.create(
+        model=MODEL,
+        voice=VOICE,
+        input=text,
+        instructions=INSTRUCTIONS,
+        response_format=audio_format,
+    )
+    return store_audio(PROVIDER, VOICE_KEY, text, audio_format, response.content)
+
+
+async def play_pcm_file(path):
+    """Play cached pcm audio through LocalAudioPlayer."""
+    import numpy as np
+    from openai.helpers import LocalAudioPlayer
+
+    await LocalAudioPlayer().play(np.frombuffer(path.read_bytes(), dtype=np.int16))
+
 
 async def main():
     """
@@ -25,12 +60,14 @@ async def main():
     Usage:
     - ./openai_tts.py                    # Uses default text
     - ./openai_tts.py "Your custom text" # Uses provided text
+    - ./openai_tts.py --prewarm          # Cache the fixed hook phrases
 
     Features:
     - OpenAI gpt-4o-mini-tts model (latest)
     - Nova voice (engaging and warm)
-    - Streaming audio with instructions support
-    - Live audio playback via LocalAudioPlayer
+    - Instructions support for tone of voice
+    - Audio playback via a system player, or LocalAudioPlayer without one
+    - Repeated phrases play from the local audio cache
     """
 
     # Load environment variables
@@ -46,7 +83,6 @@ async def main():
 
     try:
         from openai import AsyncOpenAI
-        from openai.helpers import LocalAudioPlayer
 
         # Initialize OpenAI client
         openai = AsyncOpenAI(api_key=api_key)
@@ -54,6 +90,19 @@ async def main():
         print("🎙️  OpenAI TTS")
         print("=" * 20)
 
+        # Without a system player, cache pcm that LocalAudioPlayer can play
+        audio_format = "mp3" if find_audio_players("mp3") else "pcm"
+
+        # Synthesize the fixed hook phrases ahead of time
+        if len(sys.argv) > 1 and sys.argv[1] == "--prewarm":
+            for phrase in get_prewarm_phrases():
+                if get_cached_audio(PROVIDER, VOICE_KEY, phrase, audio_format):
+                    print(f"📦 Cached: {phrase}")
+                else:
+                    await synthesize(openai, phrase, audio_format)
+                    print(f"💾 Stored: {phrase}")
+            return
+
         # Get text from command line argument or use default
         if len(sys.argv) > 1:
             text = " ".join(sys.argv[1:])  # Join all arguments as text
@@ -61,18 +110,21 @@ async def main():
             text = "Today is a wonderful day to build something people love!"
 
         print(f"🎯 Text: {text}")
-        print("🔊 Generating and streaming...")
 
         try:
-            # Generate and stream audio using OpenAI TTS
-            async with openai.audio.speech.with_streaming_response.create(
-                model="gpt-4o-mini-tts",
-                voice="nova",
-                input=text,
-                instructions="Speak in a cheerful, positive yet professional tone.",
-                response_format="mp3",
-            ) as response:
-                await LocalAudioPlayer().play(response)
+            cached = get_cached_audio(PROVIDER, VOICE_KEY, text, audio_format)
+            if cached:
+                print("📦 Playing from cache...")
+            else:
+                print("🔊 Generating and playing...")
+                cached = await synthesize(openai, text, audio_format)
+
+            # Play the audio just cached rather than synthesizing it again
+            if audio_format == "pcm":
+                await play_pcm_file(cached)
+            elif not play_audio_file(cached):
+                print(f"❌ Error: could not play {cached}")
+                return
 
             print("✅ Playback complete!")
 
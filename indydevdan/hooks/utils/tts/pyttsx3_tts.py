@@ -6,8 +6,39 @@
 # ]
 # ///
 
+import os
 import sys
 import random
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from audio_cache import find_audio_players, get_cached_audio, get_prewarm_phrases, play_audio_file, store_audio
+
+PROVIDER = "pyttsx3"
+RATE = 180
+VOLUME = 0.8
+
+
+def get_voice_key(engine):
+    """Identify the engine voice and settings the audio was made with."""
+    return f"{engine.getProperty('voice')}:{RATE}:{VOLUME}"
+
+
+def synthesize(engine, text):
+    """Render speech for text to a WAV file and store it in the audio cache."""
+    fd, tmp_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        engine.save_to_file(text, tmp_path)
+        engine.runAndWait()
+        data = Path(tmp_path).read_bytes()
+    finally:
+        os.unlink(tmp_path)
+    if not data:
+        return None
+    return store_audio(PROVIDER, get_voice_key(engine), text, "wav", data)
+
 
 def main():
     """
@@ -19,12 +50,14 @@ def main():
     Usage:
     - ./pyttsx3_tts.py                    # Uses default text
     - ./pyttsx3_tts.py "Your custom text" # Uses provided text
+    - ./pyttsx3_tts.py --prewarm          # Cache the fixed hook phrases
     
     Features:
     - Offline TTS (no API key required)
     - Cross-platform compatibility
     - Configurable voice settings
     - Immediate audio playback
+    - Repeated phrases play from the local audio cache
     """
     
     try:
@@ -34,12 +67,21 @@ def main():
         engine = pyttsx3.init()
         
         # Configure engine settings
-        engine.setProperty('rate', 180)    # Speech rate (words per minute)
-        engine.setProperty('volume', 0.8)  # Volume (0.0 to 1.0)
+        engine.setProperty('rate', RATE)      # Speech rate (words per minute)
+        engine.setProperty('volume', VOLUME)  # Volume (0.0 to 1.0)
         
         print("🎙️  pyttsx3 TTS")
         print("=" * 15)
         
+        # Render the fixed hook phrases ahead of time
+        if len(sys.argv) > 1 and sys.argv[1] == "--prewarm":
+            for phrase in get_prewarm_phrases():
+                if get_cached_audio(PROVIDER, get_voice_key(engine), phrase, "wav"):
+                    print(f"📦 Cached: {phrase}")
+                elif synthesize(engine, phrase):
+                    print(f"💾 Stored: {phrase}")
+            return
+        
         # Get text from command line argument or use default
         if len(sys.argv) > 1:
             text = " ".join(sys.argv[1:])  # Join all arguments as text
@@ -55,11 +97,23 @@ def main():
             text = random.choice(completion_messages)
         
         print(f"🎯 Text: {text}")
-        print("🔊 Speaking...")
         
-        # Speak the text
-        engine.say(text)
-        engine.runAndWait()
+        # Without a wav player the engine speaks directly; rendering to the
+        # cache first would synthesize the text twice
+        cached = None
+        if find_audio_players("wav"):
+            cached = get_cached_audio(PROVIDER, get_voice_key(engine), text, "wav")
+            if cached:
+                print("📦 Playing from cache...")
+            else:
+                cached = synthesize(engine, text)
+        
+        if not cached or not play_audio_file(cached):
+            print("🔊 Speaking...")
+            
+            # Speak the text
+            engine.say(text)
+            engine.runAndWait()
         
         print("✅ Playback complete!")
         
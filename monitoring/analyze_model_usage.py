@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Analyze model usage and provide optimization recommendations."""
 
+import argparse
 import sys
 import os
 
@@ -8,13 +9,125 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from ai_agents.base_agents.usage_tracker import UsageTracker
+from ai_agents.base_agents.usage_columns import duration_percentiles, success_trend, tokens_per_day
+from ai_agents.base_agents.shared_limiter import SharedRateLimiter
+
+
+def print_reports(tracker, args):
+    """Columnar reports over the analysis window."""
+    table = tracker.load_columns(args.days)
+    print(f"=== Usage Reports (Last {args.days} days, {len(table):,} requests) ===")
+
+    if args.latency:
+        print("\nDuration by Task and Model (seconds):")
+        print(f"  {'task_type':24} {'model':32} {'count':>8} {'p50':>8} {'p95':>8}")
+        for task, model, count, p50, p95 in duration_percentiles(table, (50, 95)):
+            print(f"  {task[:24]:24} {model[:32]:32} {count:>8,} {p50:>8.2f} {p95:>8.2f}")
+
+    if args.tokens_per_day:
+        print("\nTokens per Day:")
+        for day, tokens, count in tokens_per_day(table):
+            print(f"  {day}  {tokens:>12,} tokens  {count:>8,} requests")
+
+    if args.success_trend:
+        print(f"\nSuccess Rate ({args.bucket_days}-day buckets):")
+        for day, count, rate in success_trend(table, args.bucket_days):
+            print(f"  {day}  {rate:7.2%}  ({count:,} requests)")
+
+
+def print_retries(tracker, days):
+    """End-to-end latency and retry behaviour per task type."""
+    report = tracker.request_latency(days)
+    print(f"=== Requests and Retries (Last {days} days) ===")
+    print(f"  {'task_type':24} {'requests':>9} {'failed':>7} {'p50':>8} {'p95':>8} "
+          f"{'attempts':>9} {'hedged':>7} {'escalated':>10}")
+    for task, row in report.items():
+        print(f"  {task[:24]:24} {row['requests']:>9,} {row['failed']:>7,} {row['p50']:>8.2f} "
+              f"{row['p95']:>8.2f} {row['attempts_per_request']:>9.2f} {row['hedged']:>7.1%} "
+              f"{row['escalated']:>10.1%}")
+
+
+def print_streaming(tracker, days):
+    """Time to first token and throughput of streamed responses."""
+    report = tracker.stream_latency(days)
+    print(f"=== Streamed Responses (Last {days} days) ===")
+    print(f"  {'task_type':24} {'model':32} {'count':>8} {'ttft p50':>9} {'ttft p95':>9} "
+          f"{'tok/s':>8} {'out tok':>8}")
+    for (task, model), row in report.items():
+        rate = f"{row['tokens_per_second']:>8.1f}" if row['tokens_per_second'] is not None else f"{'-':>8}"
+        print(f"  {task[:24]:24} {model[:32]:32} {row['streamed']:>8,} {row['ttft_p50']:>9.2f} "
+              f"{row['ttft_p95']:>9.2f} {rate} {row['output_tokens']:>8.0f}")
+
+
+def print_rate_limits(minutes):
+    """Requests and tokens admitted across all agent processes, per agent."""
+    limiter = SharedRateLimiter()
+    if not limiter.path.exists():
+        print(f"No shared rate limit state at {limiter.path}")
+        return
+    rows = limiter.usage(minutes)
+    if rows is None:
+        print(f"Could not read {limiter.path}: {limiter.last_error}")
+        return
+    print(f"=== Shared Rate Limit Usage (Last {minutes} minutes, {limiter.path}) ===")
+    print(f"  {'model':8} {'agent':24} {'requests':>10} {'tokens':>12} {'rate limited':>13}")
+    for row in rows:
+        print(f"  {row['family']:8} {row['agent'][:24]:24} {row['requests']:>10,} "
+              f"{row['tokens']:>12,} {row['rate_limited']:>13,}")
+    for family, paused in ((f, limiter.paused_for(f)) for f in sorted({r['family'] for r in rows})):
+        if paused:
+            print(f"  {family} requests paused for another {paused:.1f}s")
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Analyze model usage and provide optimization recommendations')
+    parser.add_argument('days', nargs='?', type=int, default=7, help='Analysis period in days (default: 7)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Merge old daily usage partitions into monthly .gz archives')
+    parser.add_argument('--older-than', type=int, default=7,
+                        help='With --compact: only merge partitions at least this many days old (default: 7)')
+    parser.add_argument('--retain-days', type=int,
+                        help='With --compact: delete partitions and archives older than this many days')
+    parser.add_argument('--latency', action='store_true',
+                        help='p50/p95 duration per task type and model')
+    parser.add_argument('--tokens-per-day', action='store_true', help='Token usage per day')
+    parser.add_argument('--success-trend', action='store_true', help='Success rate over time')
+    parser.add_argument('--bucket-days', type=int, default=1,
+                        help='With --success-trend: days per bucket (default: 1)')
+    parser.add_argument('--rate-limits', action='store_true',
+                        help='Usage admitted by the shared rate limiter, per agent')
+    parser.add_argument('--minutes', type=int, default=60,
+                        help='With --rate-limits: window in minutes (default: 60)')
+    parser.add_argument('--retries', action='store_true',
+                        help='End-to-end p50/p95 latency, attempts, hedges and escalations per task type')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Time to first token, tokens per second and output tokens of streamed responses')
+    args = parser.parse_args()
+
+    if args.rate_limits:
+        print_rate_limits(args.minutes)
+        return
+
     tracker = UsageTracker()
+    days = args.days
+
+    if args.retries:
+        print_retries(tracker, days)
+        return
+
+    if args.streaming:
+        print_streaming(tracker, days)
+        return
+
+    if args.compact:
+        summary = tracker.compact(args.older_than, args.retain_days)
+        print(f"Compacted {summary['compacted']} daily partitions, deleted {summary['deleted']} expired files, "
+              f"wrote {summary['columns']} columnar files")
+        return
 
-    # Get analysis period from args
-    days = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    if args.latency or args.tokens_per_day or args.success_trend:
+        print_reports(tracker, args)
+        return
 
     print(f"=== Model Usage Analysis (Last {days} days) ===\n")
 
@@ -25,18 +138,20 @@ def main():
         print(f"  Requests: {stats['opus']['count']}")
         print(f"  Success Rate: {stats['opus']['success_rate']:.2%}")
         print(f"  Total Tokens: {stats['opus']['tokens']:,}")
+        print(f"  Cost: ${stats['opus']['cost']:,.2f}")
 
         print(f"\nSonnet Usage:")
         print(f"  Requests: {stats['sonnet']['count']}")
         print(f"  Success Rate: {stats['sonnet']['success_rate']:.2%}")
         print(f"  Total Tokens: {stats['sonnet']['tokens']:,}")
+        print(f"  Cost: ${stats['sonnet']['cost']:,.2f}")
 
         print(f"\nTask Distribution:")
         for task, counts in stats['task_distribution'].items():
             print(f"  {task}: Opus={counts['opus']}, Sonnet={counts['sonnet']}")
 
         print(f"\nOptimization Opportunities:")
-        recommendations = tracker.get_recommendations()
+        recommendations = tracker.get_recommendations(stats)
         if recommendations:
             for rec in recommendations:
                 print(f"  - {rec}")
@@ -45,6 +160,7 @@ def main():
 
         if stats['potential_savings'] > 0:
             print(f"\n💰 Potential Opus requests that could use Sonnet: {stats['potential_savings']}")
+            print(f"   Estimated savings: ${stats['potential_savings_usd']:,.2f}")
 
     except FileNotFoundError:
         print("No usage data found. Model usage will be tracked as agents run.")
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""Query Claude Code hook events through an incrementally maintained SQLite index.
+
+Every hook log under a project's logs/ directory (active .jsonl files and
+rotated .gz/.zst segments) is indexed into one SQLite database shared by all
+projects. Each run only parses what was appended since the previous run:
+rotated segments are immutable and indexed once, and the active file is read
+from the byte offset where the last run stopped.
+
+Examples:
+    # Bash commands blocked yesterday
+    cdc-hook-query --tool Bash --decision block --since yesterday --until today
+
+    # Tool calls per session
+    cdc-hook-query --hook pre_tool_use --count-by session
+
+    # Index another project's logs as well
+    cdc-hook-query --logs ~/repos/myproject/logs --count-by project,hook
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Reuse the hook log reader (segment naming, gzip/zstd handling)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'indydevdan', 'hooks'))
+
+from utils.log.event_log import LEGACY_LOG_NAMES, SEGMENT_PATTERN, list_segments, migrate_legacy_log, open_segment
+
+SCHEMA_VERSION = 1
+
+# Hooks that can block; their events without a decision were allowed
+DECISION_LOGS = ('pre_tool_use', 'user_prompt_submit')
+
+PATH_FIELDS = ('file_path', 'notebook_path', 'path')
+
+# --count-by names and the SQL expression they group on
+GROUP_COLUMNS = {
+    'project': 'p.name',
+    'hook': 'e.log',
+    'session': 'e.session_id',
+    'tool': 'e.tool_name',
+    'decision': 'e.decision',
+    'rule': 'e.rule_id',
+    'file': 'e.file_path',
+    'day': 'substr(e.ts, 1, 10)',
+    'hour': 'substr(e.ts, 1, 13)',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    log_dir TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    project_id INTEGER NOT NULL,
+    log TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    inode INTEGER,
+    offset INTEGER NOT NULL DEFAULT 0,
+    lines INTEGER NOT NULL DEFAULT 0,
+    complete INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, log, seq)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL,
+    log TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    ts TEXT,
+    session_id TEXT,
+    tool_name TEXT,
+    decision TEXT,
+    rule_id TEXT,
+    file_path TEXT,
+    command TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS events_session ON events (session_id, ts);
+CREATE INDEX IF NOT EXISTS events_tool ON events (tool_name, ts);
+CREATE INDEX IF NOT EXISTS events_decision ON events (decision, ts);
+CREATE INDEX IF NOT EXISTS events_file ON events (file_path);
+CREATE INDEX IF NOT EXISTS events_source ON events (project_id, log, seq);
+"""
+
+
+def get_db_path():
+    """Return the index database, HOOK_INDEX_DB overriding the default."""
+    default = Path.home() / '.cache' / 'cdc-devtools' / 'hook_index.sqlite'
+    return Path(os.getenv('HOOK_INDEX_DB', str(default))).expanduser()
+
+
+def connect(db_path):
+    """Open the index database, creating the schema on first use."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version != SCHEMA_VERSION:
+        conn.executescript('DROP TABLE IF EXISTS events; DROP TABLE IF EXISTS files;')
+        conn.executescript(SCHEMA)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        conn.commit()
+    return conn
+
+
+def event_row(log, line):
+    """
+    Extract the indexed columns from one log line.
+
+    Returns:
+        tuple or None: (ts, session_id, tool_name, decision, rule_id,
+        file_path, command, data), or None for invalid lines
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(event, dict):
+        return None
+
+    tool_input = event.get('tool_input')
+    if not isinstance(tool_input, dict):
+        tool_input = {}
+    file_path = next((tool_input[f] for f in PATH_FIELDS if isinstance(tool_input.get(f), str)), None)
+    command = tool_input.get('command') if isinstance(tool_input.get('command'), str) else None
+
+    decision = event.get('decision')
+    if decision is None and log in DECISION_LOGS:
+        decision = 'allow'
+
+    return (
+        event.get('logged_at') or event.get('timestamp'),
+        event.get('session_id'),
+        event.get('tool_name'),
+        decision,
+        event.get('rule_id'),
+        file_path,
+        command,
+        line,
+    )
+
+
+def log_names(log_dir):
+    """Return the hook log names present in a logs directory."""
+    names = set()
+    for path in Path(log_dir).glob('*.jsonl*'):
+        match = SEGMENT_PATTERN.match(path.name)
+        if match:
+            names.add(match.group('name'))
+        elif path.name.endswith('.jsonl'):
+            names.add(path.name[:-len('.jsonl')])
+    return sorted(names)
+
+
+def _insert(conn, project_id, log, seq, numbered_lines):
+    """Insert (line number, text) pairs; returns the number of events added."""
+    rows = []
+    for number, line in numbered_lines:
+        row = event_row(log, line)
+        if row:
+            rows.append((project_id, log, seq, number) + row)
+    conn.executemany(
+        'INSERT INTO events (project_id, log, seq, line, ts, session_id, tool_name, decision,'
+        ' rule_id, file_path, command, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    return len(rows)
+
+
+def _save_state(conn, project_id, log, seq, inode, offset, lines, complete):
+    conn.execute(
+        'INSERT OR REPLACE INTO files (project_id, log, seq, inode, offset, lines, complete)'
+        ' VALUES (?, ?, ?, ?, ?, ?, ?)', (project_id, log, seq, inode, offset, lines, complete))
+
+
+def update_log(conn, project_id, log_dir, log):
+    """
+    Index what is new in one hook log.
+
+    Rotation turns the active file into the next numbered segment, so rows
+    from the active file are stored under that future sequence number. When
+    the segment shows up, the lines already indexed from it are skipped.
+
+    Returns:
+        int: Number of events added
+    """
+    state = {row[0]: row[1:] for row in conn.execute(
+        'SELECT seq, inode, offset, lines, complete FROM files WHERE project_id = ? AND log = ?',
+        (project_id, log))}
+    added = 0
+
+    segments = list_segments(log_dir, log)
+    for seq, path in segments:
+        inode, offset, lines, complete = state.get(seq, (None, 0, 0, 0))
+        if complete:
+            continue
+        try:
+            f = open_segment(path)
+        except (FileNotFoundError, RuntimeError):
+            continue  # Being compressed, or no zstandard to read it
+        with f:
+            total = 0
+            new_lines = []
+            for total, line in enumerate(f, 1):
+                if total > lines:
+                    new_lines.append((total - 1, line))
+        added += _insert(conn, project_id, log, seq, new_lines)
+        _save_state(conn, project_id, log, seq, None, 0, max(total, lines), 1)
+
+    active_seq = (segments[-1][0] if segments else 0) + 1
+    active_path = Path(log_dir) / f'{log}.jsonl'
+    try:
+        f = open(active_path, 'rb')
+    except FileNotFoundError:
+        return added
+
+    with f:
+        stat = os.fstat(f.fileno())
+        inode, offset, lines, _ = state.get(active_seq, (None, 0, 0, 0))
+        if (inode is not None and inode != stat.st_ino) or stat.st_size < offset:
+            # Rewritten in place (e.g. legacy migration): index it again
+            conn.execute('DELETE FROM events WHERE project_id = ? AND log = ? AND seq = ?',
+                         (project_id, log, active_seq))
+            offset, lines = 0, 0
+
+        f.seek(offset)
+        chunk = f.read(stat.st_size - offset)
+
+    # A rotation between listing segments and opening the file would put
+    # these lines under the wrong sequence number; catch up next run instead
+    current = list_segments(log_dir, log)
+    if (current[-1][0] if current else 0) + 1 != active_seq:
+        return added
+
+    # Only complete lines; a line still being written is picked up next time
+    end = chunk.rfind(b'\n') + 1
+    new_lines = chunk[:end].decode('utf-8', errors='replace').splitlines()
+    added += _insert(conn, project_id, log, active_seq,
+                     ((lines + i, line) for i, line in enumerate(new_lines)))
+    _save_state(conn, project_id, log, active_seq, stat.st_ino, offset + end, lines + len(new_lines), 0)
+    return added
+
+
+def register_project(conn, log_dir):
+    """Add a logs directory to the index and return its project id."""
+    log_dir = str(Path(log_dir).expanduser().resolve())
+    row = conn.execute('SELECT id FROM projects WHERE log_dir = ?', (log_dir,)).fetchone()
+    if row:
+        return row[0]
+    name = Path(log_dir).parent.name
+    with conn:
+        cursor = conn.execute('INSERT INTO projects (log_dir, name) VALUES (?, ?)', (log_dir, name))
+    return cursor.lastrowid
+
+
+def update_index(conn):
+    """
+    Bring every registered project up to date.
+
+    Returns:
+        int: Number of events added
+    """
+    added = 0
+    for project_id, log_dir in conn.execute('SELECT id, log_dir FROM projects').fetchall():
+        if not os.path.isdir(log_dir):
+            continue
+        # Hooks migrate these on their next write; doing it here avoids
+        # indexing the JSON array and then its .jsonl copy
+        for name in LEGACY_LOG_NAMES:
+            if os.path.exists(os.path.join(log_dir, f'{name}.json')):
+                migrate_legacy_log(log_dir, name)
+        with conn:
+            for log in log_names(log_dir):
+                added += update_log(conn, project_id, log_dir, log)
+    return added
+
+
+def parse_time(value, now=None):
+    """
+    Parse a --since/--until value into an ISO timestamp string.
+
+    Accepts 'today', 'yesterday', relative ages such as 30m, 12h or 7d,
+    and dates or datetimes in ISO format (local time, like logged_at).
+    """
+    now = now or datetime.now()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if value == 'today':
+        return midnight.isoformat()
+    if value == 'yesterday':
+        return (midnight - timedelta(days=1)).isoformat()
+
+    match = re.fullmatch(r'(\d+)([mhdw])', value)
+    if match:
+        unit = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}[match.group(2)]
+        return (now - timedelta(**{unit: int(match.group(1))})).isoformat()
+
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value}")
+
+
+def build_filters(args):
+    """Translate command line filters into a WHERE clause and parameters."""
+    clauses = []
+    params = []
+
+    def add(clause, value):
+        clauses.append(clause)
+        params.append(value)
+
+    if args.since:
+        add('e.ts >= ?', args.since)
+    if args.until:
+        add('e.ts < ?', args.until)
+    if args.project:
+        add('p.name = ?', args.project)
+    if args.hook:
+        add('e.log = ?', args.hook)
+    if args.session:
+        add('e.session_id LIKE ?', args.session + '%')
+    if args.tool:
+        add('e.tool_name = ?', args.tool)
+    if args.decision:
+        add('e.decision = ?', args.decision)
+    if args.rule:
+        add('e.rule_id = ?', args.rule)
+    if args.file:
+        add('e.file_path GLOB ?', args.file)
+    if args.command:
+        add('instr(e.command, ?) > 0', args.command)
+
+    where = ('WHERE ' + ' AND '.join(clauses)) if clauses else ''
+    return where, params
+
+
+def query_events(conn, args):
+    """Return matching events, newest first."""
+    where, params = build_filters(args)
+    sql = (f'SELECT e.ts, p.name, e.log, e.session_id, e.tool_name, e.decision, e.rule_id,'
+           f' e.file_path, e.command, e.data FROM events e JOIN projects p ON p.id = e.project_id'
+           f' {where} ORDER BY e.ts DESC LIMIT ?')
+    return conn.execute(sql, params + [args.limit]).fetchall()
+
+
+def count_events(conn, args, group_by):
+    """Return (group values..., count) rows, largest groups first."""
+    columns = [GROUP_COLUMNS[name] for name in group_by]
+    where, params = build_filters(args)
+    sql = (f'SELECT {", ".join(columns)}, COUNT(*) AS n FROM events e JOIN projects p ON p.id = e.project_id'
+           f' {where} GROUP BY {", ".join(columns)} ORDER BY n DESC LIMIT ?')
+    return conn.execute(sql, params + [args.limit]).fetchall()
+
+
+def print_events(rows, as_json):
+    if as_json:
+        for row in rows:
+            print(row[-1])
+        return
+    for ts, project, log, session_id, tool_name, decision, rule_id, file_path, command, _ in rows:
+        detail = file_path or command or ''
+        if rule_id:
+            detail = f'[{rule_id}] {detail}'
+        print(f"{(ts or '')[:19]:19}  {project[:16]:16}  {log[:18]:18}  {(session_id or '-')[:8]:8}  "
+              f"{(tool_name or '-')[:12]:12}  {(decision or '-'):6}  {detail[:80]}")
+
+
+def print_counts(rows, group_by, as_json):
+    if as_json:
+        print(json.dumps([dict(zip(group_by + ['count'], row)) for row in rows], indent=2))
+        return
+    for row in rows:
+        labels = '  '.join(str(value if value is not None else '-') for value in row[:-1])
+        print(f"{row[-1]:>8}  {labels}")
+
+
+def print_stats(conn, db_path):
+    print(f"Index: {db_path} ({os.path.getsize(db_path) / 1024 / 1024:.1f} MB)")
+    rows = conn.execute(
+        'SELECT p.name, p.log_dir, COUNT(e.id), MIN(e.ts), MAX(e.ts) FROM projects p'
+        ' LEFT JOIN events e ON e.project_id = p.id GROUP BY p.id ORDER BY p.name').fetchall()
+    for name, log_dir, count, first, last in rows:
+        span = f"{(first or '')[:10]} .. {(last or '')[:10]}" if count else "no events"
+        print(f"  {name:20} {count:>10,} events  {span}  {log_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query hook events across project logs')
+    parser.add_argument('--logs', action='append', default=[],
+                        help='Logs directory to index (repeatable, default: ./logs)')
+    parser.add_argument('--db', help='Index database (default: ~/.cache/cdc-devtools/hook_index.sqlite)')
+    parser.add_argument('--no-update', action='store_true', help='Query the index without refreshing it')
+    parser.add_argument('--rebuild', action='store_true', help='Drop indexed events and re-read all logs')
+    parser.add_argument('--since', type=parse_time, help='Start time: today, yesterday, 12h, 7d or ISO date')
+    parser.add_argument('--until', type=parse_time, help='End time (exclusive), same formats as --since')
+    parser.add_argument('--project', help='Project name (the directory holding logs/)')
+    parser.add_argument('--hook', help='Hook log name, e.g. pre_tool_use')
+    parser.add_argument('--session', help='Session id or prefix')
+    parser.add_argument('--tool', help='Tool name, e.g. Bash')
+    parser.add_argument('--decision', help='allow or block')
+    parser.add_argument('--rule', help='Id of the rule that blocked the event')
+    parser.add_argument('--file', help='File path glob, e.g. "*/src/*.py"')
+    parser.add_argument('--command', help='Substring of the Bash command')
+    parser.add_argument('--count-by', help=f'Comma-separated groups: {", ".join(GROUP_COLUMNS)}')
+    parser.add_argument('--sql', help='Run a raw SQL query against the index')
+    parser.add_argument('--stats', action='store_true', help='Show indexed projects and event counts')
+    parser.add_argument('--limit', type=int, default=50, help='Maximum rows to print (default: 50)')
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    args = parser.parse_args()
+
+    group_by = [g.strip() for g in args.count_by.split(',')] if args.count_by else []
+    unknown = [g for g in group_by if g not in GROUP_COLUMNS]
+    if unknown:
+        parser.error(f"unknown --count-by group: {', '.join(unknown)}")
+
+    db_path = Path(args.db).expanduser() if args.db else get_db_path()
+    conn = connect(db_path)
+
+    log_dirs = args.logs or ([os.path.join(os.getcwd(), 'logs')] if os.path.isdir('logs') else [])
+    for log_dir in log_dirs:
+        if not os.path.isdir(log_dir):
+            print(f"Error: Log directory not found: {log_dir}")
+            return 1
+        register_project(conn, log_dir)
+
+    if args.rebuild:
+        with conn:
+            conn.execute('DELETE FROM events')
+            conn.execute('DELETE FROM files')
+
+    if not args.no_update:
+        added = update_index(conn)
+        if added and not args.json:
+            print(f"Indexed {added:,} new events", file=sys.stderr)
+
+    if args.stats:
+        print_stats(conn, db_path)
+    elif args.sql:
+        for row in conn.execute(args.sql):
+            print(json.dumps(row) if args.json else '  '.join(str(v) for v in row))
+    elif group_by:
+        print_counts(count_events(conn, args, group_by), group_by, args.json)
+    else:
+        print_events(query_events(conn, args), args.json)
+
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
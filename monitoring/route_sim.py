@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Replay logged routing decisions under alternative router settings.
+
+Every decision ModelRouter logged in the window is re-scored from its
+base_score and matched triggers under each scenario (an Opus threshold plus
+trigger weight changes) and paired with the usage it led to. Decisions
+routed as logged keep their actual cost and outcome; for the others cost is
+the mean for the model and task type, and success is the learned routing
+model's prediction or the model's success rate on the task type, so treat
+projections for changed decisions as estimates. Decisions made by the
+learned model or downgraded by a budget keep their logged model.
+
+Examples:
+    # Thresholds 2-6 over the last 30 days
+    cdc-route-sim
+
+    # What if "design" no longer forced Opus and "migrate" did?
+    cdc-route-sim --thresholds 4 --weight design=0 --weight migrate=4
+
+    # Every threshold with each trigger removed in turn
+    cdc-route-sim --days 30 --sweep-triggers
+"""
+
+import argparse
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import ai_agents module
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+from ai_agents.base_agents.metrics_sink import get_sink
+from ai_agents.base_agents.model_router import ModelRouter
+from ai_agents.base_agents.partitioned_log import PartitionedLog
+from ai_agents.base_agents.routing_sim import RoutingReplay, Scenario, request_outcomes
+
+
+def parse_weights(parser, values):
+    """TRIGGER=WEIGHT arguments as a dict."""
+    weights = {}
+    for value in values:
+        trigger, _, weight = value.rpartition('=')
+        try:
+            if not trigger.strip():
+                raise ValueError(value)
+            weights[trigger.strip().lower()] = float(weight)
+        except ValueError:
+            parser.error(f'--weight expects TRIGGER=WEIGHT, got {value!r}')
+    return weights
+
+
+def load_log(log_path, days):
+    """
+    Logged decisions that can be replayed, usage entries, and how many
+    decisions were skipped (cache hit counts, or logged before base_score).
+    """
+    get_sink().flush()
+    since = datetime.utcnow() - timedelta(days=days)
+    decisions, usage, skipped = [], [], 0
+    for entry in PartitionedLog(log_path).iter_entries(since=since):
+        if "success" in entry:
+            usage.append(entry)
+        elif "reason" in entry:
+            if entry.get("base_score") is None or "description" not in entry:
+                skipped += entry.get("count", 1)
+            else:
+                decisions.append(entry)
+    return decisions, usage, skipped
+
+
+def format_weights(weights):
+    return " ".join(f"{trigger}={weight:g}" for trigger, weight in sorted(weights.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay routing decisions under alternative router settings')
+    parser.add_argument('--days', type=int, default=30, help='Decisions from the last N days (default: 30)')
+    parser.add_argument('--thresholds', default='2,3,4,5,6',
+                        help='Comma-separated Opus thresholds to replay (default: 2,3,4,5,6)')
+    parser.add_argument('--weight', action='append', default=[], metavar='TRIGGER=WEIGHT',
+                        help='Change a trigger weight in every scenario; 0 removes it, new triggers '
+                             'are matched against logged descriptions (repeatable)')
+    parser.add_argument('--sweep-triggers', action='store_true',
+                        help='Also replay each threshold with each logged trigger removed')
+    parser.add_argument('--min-examples', type=int, default=20,
+                        help='Requests a task type needs before its success rate is used (default: 20)')
+    args = parser.parse_args()
+
+    try:
+        thresholds = [float(value) for value in args.thresholds.split(',') if value.strip()]
+    except ValueError:
+        parser.error('--thresholds expects comma-separated numbers')
+    weights = parse_weights(parser, args.weight)
+
+    started = time.perf_counter()
+    router = ModelRouter(cache_size=0)
+    decisions, usage, skipped = load_log(router.usage_log_path, args.days)
+    if not decisions:
+        print("No replayable routing decisions found. Decisions are logged as ModelRouter selects models.")
+        return 1
+
+    replay = RoutingReplay(decisions, request_outcomes(usage), router.trigger_matcher.triggers,
+                           router.learned, args.min_examples)
+    loaded = time.perf_counter()
+
+    changed = f" {format_weights(weights)}" if weights else ""
+    scenarios = [Scenario(f"threshold={threshold:g}{changed}", threshold, weights) for threshold in thresholds]
+    if args.sweep_triggers:
+        for threshold in thresholds:
+            for trigger in sorted(replay.trigger_rows):
+                if weights.get(trigger) != 0:
+                    scenarios.append(Scenario(f"threshold={threshold:g}{changed} -{trigger}", threshold,
+                                              dict(weights, **{trigger: 0})))
+    results = [(scenario.name, replay.evaluate(scenario)) for scenario in scenarios]
+    replayed = time.perf_counter()
+
+    logged = replay.logged()
+    print(f"=== Routing Replay (Last {args.days} days, {len(replay):,} decisions, "
+          f"{replay.joined:,} paired with usage) ===")
+    if skipped:
+        print(f"  {skipped:,} decisions without a base_score (cache hit counts, older logs) were skipped")
+    print(f"  Current router: threshold {router.default_threshold}, "
+          f"{len(router.trigger_matcher.triggers)} triggers"
+          f"{', learned model loaded' if router.learned is not None else ''}\n")
+    width = max(len("scenario"), *(len(name) for name, _ in results))
+    print(f"  {'scenario':{width}} {'opus':>7} {'changed':>8} {'est. cost':>12} {'vs logged':>10} "
+          f"{'est. success':>13}")
+    for name, stats in [("logged", logged)] + results:
+        delta = (stats['cost'] - logged['cost']) / logged['cost'] if logged['cost'] else 0.0
+        print(f"  {name:{width}} {stats['opus_share']:>7.1%} {stats['changed']:>8.1%} "
+              f"${stats['cost']:>11,.2f} {delta:>+10.1%} {stats['success_rate']:>13.2%}")
+
+    print(f"\nLoaded in {loaded - started:.2f}s, replayed {len(scenarios)} scenarios in "
+          f"{replayed - loaded:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
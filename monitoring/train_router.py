@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Train the learned routing model from logged usage and compare it to the rules.
+
+Usage entries are split by time: the oldest part trains one success
+classifier per model, the newest (--holdout) is held out. On held-out
+entries both the learned router and the rule-based router are replayed.
+Where a router picks the model that was actually used, the logged cost and
+outcome count; otherwise cost is the training mean for that model and task
+type and success is the learned model's prediction, so treat the estimates
+for disagreements as approximate.
+
+Examples:
+    # Train on the last 90 days and save next to the usage log
+    cdc-train-router --days 90
+
+    # Only report, keep the current model
+    cdc-train-router --no-save --max-success-drop 0.02
+"""
+
+import argparse
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import ai_agents module
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), '..'))
+
+from ai_agents.base_agents.learned_router import DEFAULT_DIMS, LearnedRouter
+from ai_agents.base_agents.model_router import ModelRouter
+from ai_agents.base_agents.usage_tracker import UsageTracker
+
+
+def mean_costs(entries):
+    """Mean cost per (model, task_type), plus per model under task_type None."""
+    totals = {}
+    for entry in entries:
+        cost = float(entry.get("cost_usd", 0.0) or 0.0)
+        for key in ((entry["model"], entry.get("task_type", "")), (entry["model"], None)):
+            total = totals.setdefault(key, [0.0, 0])
+            total[0] += cost
+            total[1] += 1
+    return {key: total / count for key, (total, count) in totals.items()}
+
+
+def evaluate(choose, entries, learned, costs):
+    """
+    Replay held-out entries through a routing function.
+
+    Returns:
+        Dict with requests, agreement, opus_share, cost and success_rate
+    """
+    result = {"requests": 0, "agreement": 0, "opus": 0, "cost": 0.0, "successes": 0.0}
+    for entry in entries:
+        task_type = entry.get("task_type", "")
+        description = entry.get("description", "")
+        context = dict(entry.get("context") or {}, agent=entry.get("agent"))
+        model = choose(task_type, description, context)
+
+        result["requests"] += 1
+        result["opus"] += "opus" in model
+        if model == entry["model"]:
+            result["agreement"] += 1
+            result["cost"] += float(entry.get("cost_usd", 0.0) or 0.0)
+            result["successes"] += bool(entry["success"])
+        else:
+            result["cost"] += costs.get((model, task_type), costs.get((model, None), 0.0))
+            predicted = learned.predict(model, task_type, description, context, entry.get("agent"))
+            result["successes"] += predicted if predicted is not None else 0.0
+
+    count = result["requests"] or 1
+    return {
+        "requests": result["requests"],
+        "agreement": result["agreement"] / count,
+        "opus_share": result["opus"] / count,
+        "cost": result["cost"],
+        "success_rate": result["successes"] / count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the learned routing model from usage logs')
+    parser.add_argument('--days', type=int, help='Train on the last N days (default: all history)')
+    parser.add_argument('--holdout', type=float, default=0.2,
+                        help='Newest fraction of entries held out for the report (default: 0.2)')
+    parser.add_argument('--epochs', type=int, default=5, help='SGD passes over the data (default: 5)')
+    parser.add_argument('--dims', type=int, default=DEFAULT_DIMS,
+                        help=f'Hashed feature space, a power of two (default: {DEFAULT_DIMS})')
+    parser.add_argument('--max-success-drop', type=float, default=0.05,
+                        help='Predicted success a cheaper model may give up (default: 0.05)')
+    parser.add_argument('--min-examples', type=int, default=20,
+                        help='Rows per model a task type needs before the model decides it (default: 20)')
+    parser.add_argument('--output', help='Model file (default: CDC_ROUTER_MODEL or <usage log>.router)')
+    parser.add_argument('--no-save', action='store_true', help='Report only, do not write the model')
+    args = parser.parse_args()
+
+    if args.dims & (args.dims - 1):
+        parser.error('--dims must be a power of two')
+
+    tracker = UsageTracker(os.getenv('CDC_USAGE_LOG', './usage_metrics.jsonl'))
+    since = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+    entries = [entry for entry in tracker.iter_usage(since=since)
+               if entry.get("model") and not entry.get("cache_hit")]
+    entries.sort(key=lambda entry: entry.get("timestamp", ""))
+    if not entries:
+        print("No usage data found. Usage is logged as ModelAwareAgent tasks run.")
+        return 1
+
+    split = int(len(entries) * (1 - args.holdout))
+    train, heldout = entries[:split], entries[split:]
+    learned = LearnedRouter.train(train, dims=args.dims, epochs=args.epochs,
+                                  max_success_drop=args.max_success_drop,
+                                  min_examples=args.min_examples)
+
+    print(f"Trained on {len(train):,} requests, holding out {len(heldout):,}")
+    for model, count in sorted(learned.meta["examples"].items()):
+        print(f"  {model}: {count:,} examples, mean cost ${learned.model_costs.get(model, 0.0):.4f}")
+
+    if heldout:
+        rules = ModelRouter(cache_size=0)
+        rules.learned = None
+        costs = mean_costs(train)
+
+        def learned_choice(task_type, description, context):
+            verdict = learned.choose(task_type, description, context, context.get("agent"))
+            return verdict or rules.decide(task_type, description, context)[0]
+
+        def rule_choice(task_type, description, context):
+            return rules.decide(task_type, description, context)[0]
+
+        logged = {
+            "requests": len(heldout),
+            "agreement": 1.0,
+            "opus_share": sum("opus" in e["model"] for e in heldout) / len(heldout),
+            "cost": sum(float(e.get("cost_usd", 0.0) or 0.0) for e in heldout),
+            "success_rate": sum(bool(e["success"]) for e in heldout) / len(heldout),
+        }
+        print(f"\n=== Held-out Comparison ({len(heldout):,} requests) ===")
+        print(f"  {'router':10} {'agrees':>8} {'opus':>8} {'est. cost':>12} {'est. success':>13}")
+        for name, stats in (("logged", logged),
+                            ("rules", evaluate(rule_choice, heldout, learned, costs)),
+                            ("learned", evaluate(learned_choice, heldout, learned, costs))):
+            print(f"  {name:10} {stats['agreement']:>8.1%} {stats['opus_share']:>8.1%} "
+                  f"${stats['cost']:>11,.2f} {stats['success_rate']:>13.2%}")
+
+    if not args.no_save:
+        # Retrain on everything so the saved model sees the newest requests
+        if heldout:
+            learned = LearnedRouter.train(entries, dims=args.dims, epochs=args.epochs,
+                                          max_success_drop=args.max_success_drop,
+                                          min_examples=args.min_examples)
+        output = args.output or ModelRouter(cache_size=0).learned_model_path
+        learned.save(output)
+        print(f"\nSaved routing model to {output} ({os.path.getsize(output):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())